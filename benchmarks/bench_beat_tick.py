@@ -0,0 +1,149 @@
+"""
+Duration of one scheduler tick with many schedules due at the same time.
+
+    poetry run python -m benchmarks.bench_beat_tick --schedules 100000 --workers 4
+
+Seeds a throwaway user with its own channels and schedules in the configured
+database, runs one tick and removes everything it created afterwards. With
+--workers N the schedules are split into N shards by channel_id and every shard
+is processed by its own scheduler process, as with SCHEDULER_SHARDS=N.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, select
+
+from src.db import sessionmaker_null_pool
+from src.models import (
+    MessageBody,
+    NotificationLog,
+    NotificationOutbox,
+    NotificationSchedule,
+    User,
+    UserContactChannel,
+)
+from src.repos.bodies import MessageBodyRepository, message_hash
+from src.tasks.beat import _process_scheduled_notifications
+from src.tasks.shards import shard_filter
+from src.utils.db_manager import DB_Manager
+from src.utils.enums import ContactChannelType, ScheduleType
+
+
+BENCH_USERNAME = "bench_beat_tick"
+BENCH_MESSAGE = "bench message"
+CHANNELS = 100
+CHUNK_SIZE = 3000
+
+
+async def seed(schedules: int) -> int:
+    async with DB_Manager(session_factory=sessionmaker_null_pool) as db:
+        user_id = (
+            await db.session.execute(
+                insert(User)
+                .values(username=BENCH_USERNAME, password_hash="-")
+                .returning(User.id)
+            )
+        ).scalar_one()
+        channel_ids = (
+            (
+                await db.session.execute(
+                    insert(UserContactChannel)
+                    .values(
+                        [
+                            {
+                                "user_id": user_id,
+                                "contact_value": f"bench{i}@example.com",
+                                "channel_type": ContactChannelType.EMAIL,
+                            }
+                            for i in range(CHANNELS)
+                        ]
+                    )
+                    .returning(UserContactChannel.id)
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+        due_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+        for start in range(0, schedules, CHUNK_SIZE):
+            rows, bodies = [], {}
+            for i in range(start, min(start + CHUNK_SIZE, schedules)):
+                recurring = i % 2 == 0
+                body = f"{BENCH_MESSAGE} {i}"
+                bodies[message_hash(body)] = body
+                rows.append(
+                    {
+                        "message_hash": message_hash(body),
+                        "channel_id": channel_ids[i % CHANNELS],
+                        "schedule_type": (
+                            ScheduleType.RECURRING if recurring else ScheduleType.ONCE
+                        ),
+                        "crontab": "0 * * * *" if recurring else None,
+                        "scheduled_at": None if recurring else due_at,
+                        "max_executions": 0,
+                        "current_executions": 0,
+                        "next_execution_at": due_at,
+                    }
+                )
+            await MessageBodyRepository(db.session).store(bodies)
+            await db.session.execute(insert(NotificationSchedule).values(rows))
+        await db.commit()
+        return user_id
+
+
+async def cleanup(user_id: int) -> None:
+    async with DB_Manager(session_factory=sessionmaker_null_pool) as db:
+        channel_ids = select(UserContactChannel.id).filter_by(user_id=user_id)
+        log_ids = select(NotificationLog.id).filter_by(sender_id=user_id)
+        await db.session.execute(
+            delete(NotificationOutbox).filter(NotificationOutbox.log_id.in_(log_ids))
+        )
+        await db.session.execute(delete(NotificationLog).filter_by(sender_id=user_id))
+        await db.session.execute(
+            delete(NotificationSchedule).filter(
+                NotificationSchedule.channel_id.in_(channel_ids)
+            )
+        )
+        await db.session.execute(delete(UserContactChannel).filter_by(user_id=user_id))
+        await db.session.execute(delete(User).filter_by(id=user_id))
+        await db.session.execute(
+            delete(MessageBody).filter(MessageBody.body.like(f"{BENCH_MESSAGE} %"))
+        )
+        await db.commit()
+
+
+def _run_shard(args: tuple[int, int]) -> None:
+    shard, workers = args
+    asyncio.run(_process_scheduled_notifications(filter=shard_filter({shard}, workers)))
+
+
+async def main(schedules: int, workers: int):
+    user_id = await seed(schedules)
+    try:
+        started = time.perf_counter()
+        if workers == 1:
+            await _process_scheduled_notifications()
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                await asyncio.to_thread(
+                    pool.map, _run_shard, [(i, workers) for i in range(workers)]
+                )
+        elapsed = time.perf_counter() - started
+    finally:
+        await cleanup(user_id)
+
+    print(f"tick with {schedules} due schedules, {workers} workers: {elapsed:.2f}s")
+    print(f"throughput: {schedules / elapsed:10.1f} schedules/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schedules", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.schedules, args.workers))
@@ -0,0 +1,156 @@
+"""
+Bulk insert of pending logs and schedules: multi-row INSERT ... VALUES against
+COPY into a staging table followed by INSERT ... SELECT ... ON CONFLICT.
+
+    poetry run python -m benchmarks.bench_bulk_insert --rows 10000 100000 1000000
+
+Seeds a throwaway user with one channel in the configured database. Every run
+happens in its own transaction that is rolled back, the seeded rows are removed
+afterwards. A single VALUES statement cannot carry more than 32767 bind
+parameters, so the VALUES path is split into the largest chunks that fit.
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from src.db import sessionmaker_null_pool
+from src.models import NotificationLog, NotificationSchedule, User, UserContactChannel
+from src.repos.bodies import MessageBodyRepository
+from src.schemas.notifications import AddScheduleDTO, RequestAddLogDTO
+from src.utils.db_manager import DB_Manager
+from src.utils.enums import ContactChannelType, ScheduleType
+
+
+BENCH_USERNAME = "bench_bulk_insert"
+MAX_PARAMS = 32767
+
+
+def iter_logs(rows: int, user_id: int):
+    for i in range(rows):
+        yield RequestAddLogDTO(
+            sender_id=user_id,
+            message=f"bench bulk insert {i}",
+            contact_data=f"bench{i}@example.com",
+            provider_name=ContactChannelType.EMAIL,
+        )
+
+
+def iter_schedules(rows: int, channel_id: int):
+    next_execution_at = datetime.now(timezone.utc) + timedelta(days=1)
+    for i in range(rows):
+        yield AddScheduleDTO(
+            message=f"bench bulk insert {i}",
+            channel_id=channel_id,
+            schedule_type=ScheduleType.RECURRING,
+            crontab="0 * * * *",
+            max_executions=5,
+            next_execution_at=next_execution_at,
+        )
+
+
+async def insert_values(db: DB_Manager, target: str, items: list) -> int:
+    chunk_size = MAX_PARAMS // len(items[0].model_dump())
+    bodies_repo = MessageBodyRepository(db.session)
+    inserted = 0
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start : start + chunk_size]
+        rows, bodies = await bodies_repo.replace_with_hashes(
+            item.model_dump() for item in chunk
+        )
+        if target == "logs":
+            inserted += len(
+                await db.notification_logs._insert_skipping_pending(
+                    pg_insert(NotificationLog).values(rows), bodies
+                )
+            )
+        else:
+            inserted += len(
+                await db.schedules._upsert(pg_insert(NotificationSchedule).values(rows))
+            )
+    return inserted
+
+
+async def run(target: str, method: str, rows: int, user_id: int, channel_id: int):
+    async with DB_Manager(session_factory=sessionmaker_null_pool) as db:
+        if target == "logs":
+            repo = db.notification_logs
+            items = iter_logs(rows, user_id)
+        else:
+            repo = db.schedules
+            items = iter_schedules(rows, channel_id)
+
+        started = time.perf_counter()
+        if method == "values":
+            inserted = await insert_values(db, target, list(items))
+        else:
+            inserted = len(await repo.copy_bulk(items))
+        elapsed = time.perf_counter() - started
+        await db.rollback()
+
+    assert inserted == rows, (inserted, rows)
+    print(
+        f"[{target:>9} {method:>6}] {rows:>8} rows {elapsed:8.2f}s "
+        f"{rows / elapsed:10.0f} rows/sec"
+    )
+
+
+async def main(sizes: list[int], targets: list[str]):
+    async with DB_Manager(session_factory=sessionmaker_null_pool) as db:
+        user_id = (
+            await db.session.execute(
+                insert(User)
+                .values(username=BENCH_USERNAME, password_hash="-")
+                .returning(User.id)
+            )
+        ).scalar_one()
+        channel_id = (
+            await db.session.execute(
+                insert(UserContactChannel)
+                .values(
+                    user_id=user_id,
+                    contact_value="bench_bulk_insert@example.com",
+                    channel_type=ContactChannelType.EMAIL,
+                )
+                .returning(UserContactChannel.id)
+            )
+        ).scalar_one()
+        await db.commit()
+
+    try:
+        for rows in sizes:
+            for target in targets:
+                for method in ("values", "copy"):
+                    await run(target, method, rows, user_id, channel_id)
+    finally:
+        async with DB_Manager(session_factory=sessionmaker_null_pool) as db:
+            await db.session.execute(
+                delete(NotificationSchedule).filter_by(channel_id=channel_id)
+            )
+            await db.session.execute(
+                delete(NotificationLog).filter_by(sender_id=user_id)
+            )
+            await db.session.execute(
+                delete(UserContactChannel).filter_by(id=channel_id)
+            )
+            await db.session.execute(delete(User).filter_by(id=user_id))
+            await db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument(
+        "--target",
+        choices=("logs", "schedules"),
+        nargs="+",
+        default=["logs", "schedules"],
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.target))
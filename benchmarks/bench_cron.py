@@ -0,0 +1,106 @@
+"""
+Next-fire computation for many recurring schedules sharing a few crontabs.
+
+    poetry run python -m benchmarks.bench_cron --schedules 100000 --expressions 40
+
+Compares a fresh croniter per schedule (the previous beat and service code) with
+the cached layer in src.utils.cron, per schedule and batched per expression.
+"""
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from croniter import croniter
+
+from src.utils.cron import (
+    compile_crontab,
+    is_valid_crontab,
+    next_fire_time,
+    next_fire_times,
+)
+
+
+def make_expressions(count: int) -> list[str]:
+    expressions = ["* * * * *", "*/5 * * * *", "0 * * * *", "0 9 * * 1-5"]
+    minute = 0
+    while len(expressions) < count:
+        expressions.append(f"{minute % 60} {minute // 60 % 24} * * *")
+        minute += 7
+    return expressions[:count]
+
+
+def measure(name: str, schedules: int, func) -> float:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"[{name:>24}] {elapsed * 1000:9.1f}ms {schedules / elapsed:12.0f}/sec")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schedules", type=int, default=100_000)
+    parser.add_argument("--expressions", type=int, default=40)
+    args = parser.parse_args()
+
+    expressions = make_expressions(args.expressions)
+    crontabs = [random.choice(expressions) for _ in range(args.schedules)]
+    now = datetime.now(timezone.utc)
+    starts = [now - timedelta(seconds=random.randint(0, 3600)) for _ in crontabs]
+
+    by_crontab: dict[str, list[datetime]] = defaultdict(list)
+    for crontab, start in zip(crontabs, starts):
+        by_crontab[crontab].append(start)
+
+    compile_crontab.cache_clear()
+    measure(
+        "validate, croniter",
+        args.schedules,
+        lambda: [croniter(crontab) for crontab in crontabs],
+    )
+    measure(
+        "validate, cached",
+        args.schedules,
+        lambda: [is_valid_crontab(crontab) for crontab in crontabs],
+    )
+    measure(
+        "next at now, croniter",
+        args.schedules,
+        lambda: [croniter(crontab, now).get_next(datetime) for crontab in crontabs],
+    )
+    measure(
+        "next at now, cached",
+        args.schedules,
+        lambda: [next_fire_time(crontab, now) for crontab in crontabs],
+    )
+    measure(
+        "next at now, batched",
+        args.schedules,
+        lambda: [
+            next_fire_times(crontab, [now] * len(group))
+            for crontab, group in by_crontab.items()
+        ],
+    )
+    measure(
+        "next from own, croniter",
+        args.schedules,
+        lambda: [
+            croniter(crontab, start).get_next(datetime)
+            for crontab, start in zip(crontabs, starts)
+        ],
+    )
+    measure(
+        "next from own, batched",
+        args.schedules,
+        lambda: [
+            next_fire_times(crontab, group) for crontab, group in by_crontab.items()
+        ],
+    )
+    print(f"cache: {compile_crontab.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Telegram/ntfy sender throughput: fresh event loop + ClientSession per message
+(old behaviour) vs the worker-lifetime runtime with a keep-alive pool.
+
+    poetry run python -m benchmarks.bench_http_sessions --messages 2000
+
+The stub server speaks plain HTTP on localhost, so the numbers exclude TLS and
+DNS, i.e. they are a lower bound of the real-world gain.
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+import aiohttp
+from aiohttp import web
+
+from src.tasks.runtime import WorkerRuntime
+from src.utils.enums import ContactChannelType
+
+
+async def _handle(request: web.Request) -> web.Response:
+    await request.read()
+    return web.json_response({"ok": True})
+
+
+def start_stub_server(port: int) -> None:
+    loop = asyncio.new_event_loop()
+
+    async def _serve():
+        app = web.Application()
+        app.router.add_post("/{tail:.*}", _handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+
+    loop.run_until_complete(_serve())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+
+async def _send_with_new_session(url: str) -> None:
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, json={"chat_id": "1", "text": "bench"}) as resp:
+            await resp.read()
+
+
+async def _send_with_runtime(runtime: WorkerRuntime, url: str) -> None:
+    session = await runtime.get_http_session(ContactChannelType.TELEGRAM)
+    async with session.post(url, json={"chat_id": "1", "text": "bench"}) as resp:
+        await resp.read()
+
+
+def bench_before(url: str, messages: int) -> float:
+    started = time.perf_counter()
+    for _ in range(messages):
+        asyncio.run(_send_with_new_session(url))
+    return messages / (time.perf_counter() - started)
+
+
+def bench_after(url: str, messages: int) -> float:
+    runtime = WorkerRuntime()
+    runtime.start()
+    try:
+        started = time.perf_counter()
+        for _ in range(messages):
+            runtime.run(_send_with_runtime(runtime, url))
+        return messages / (time.perf_counter() - started)
+    finally:
+        runtime.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=18080)
+    args = parser.parse_args()
+
+    start_stub_server(args.port)
+    url = f"http://127.0.0.1:{args.port}/bot/sendMessage"
+
+    before = bench_before(url, args.messages)
+    after = bench_after(url, args.messages)
+    print(f"asyncio.run + new ClientSession: {before:10.1f} msgs/sec")
+    print(f"worker runtime + pooled session: {after:10.1f} msgs/sec")
+    print(f"speedup: x{after / before:.2f}")
+
+
+if __name__ == "__main__":
+    main()
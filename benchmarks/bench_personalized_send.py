@@ -0,0 +1,131 @@
+"""
+Throughput and peak memory of the personalized mass send pipeline.
+
+    poetry run python -m benchmarks.bench_personalized_send --recipients 1000000
+    poetry run python -m benchmarks.bench_personalized_send --format csv --buffered
+
+Streams a generated NDJSON or CSV recipients list through the same parser and
+chunking the upload uses, renders each chunk with render_messages as the
+fan-out worker does and builds the pending log batches, without the database. --buffered reads the whole body and all
+recipients into memory first, as a single request handler would without
+streaming. Peak RSS is per process, so compare modes in separate runs.
+"""
+
+import argparse
+import asyncio
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from src.schemas.notifications import AddMassSendLogDTO
+from src.settings import settings
+from src.utils.enums import ContactChannelType
+from src.utils.recipients import chunked, iter_recipients, render_messages
+from src.utils.template_cache import TemplateCache
+
+
+CONTENT = "Здравствуйте, {{ name }}! Ваш промокод {{ code }} действует до {{ until }}."
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+BODY_CHUNK_SIZE = 64 * 1024
+
+
+def generate_rows(fmt: str, recipients: int):
+    if fmt == "csv":
+        yield "user_id,name,code,until\n"
+        for i in range(1, recipients + 1):
+            yield f'{i},"Пользователь {i}",PROMO{i:08d},31.12\n'
+    else:
+        for i in range(1, recipients + 1):
+            yield (
+                f'{{"user_id": {i}, "name": "Пользователь {i}", '
+                f'"code": "PROMO{i:08d}", "until": "31.12"}}\n'
+            )
+
+
+async def stream_body(fmt: str, recipients: int) -> AsyncIterator[bytes]:
+    buffer: list[bytes] = []
+    size = 0
+    for row in generate_rows(fmt, recipients):
+        data = row.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= BODY_CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+async def buffered_body(fmt: str, recipients: int) -> AsyncIterator[bytes]:
+    body = b"".join([chunk async for chunk in stream_body(fmt, recipients)])
+    yield body
+
+
+async def run(fmt: str, recipients: int, chunk_size: int, buffered: bool) -> dict:
+    cache = TemplateCache(env=settings.JINGA2_ENV, maxsize=16)
+    compiled = cache.get(1, datetime.now(timezone.utc), CONTENT)
+    body = buffered_body if buffered else stream_body
+    source = iter_recipients(body(fmt, recipients), CONTENT_TYPES[fmt])
+    if buffered:
+        materialized = [recipient async for recipient in source]
+
+        async def replay():
+            for recipient in materialized:
+                yield recipient
+
+        source = replay()
+
+    report = {"pending": 0, "skipped": 0, "batches": 0}
+    async for chunk in chunked(source, chunk_size):
+        recipients = [recipient for recipient in chunk if recipient is not None]
+        messages, skipped = render_messages(compiled, {}, recipients)
+        pendings = [
+            AddMassSendLogDTO(
+                job_id=1,
+                sender_id=1,
+                message=message,
+                contact_data=f"user{user_id}@example.com",
+                provider_name=ContactChannelType.EMAIL,
+            )
+            for user_id, message in messages.items()
+        ]
+        report["skipped"] += len(chunk) - len(recipients) + skipped
+        report["pending"] += len(pendings)
+        report["batches"] += 1
+    return report
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipients", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=CONTENT_TYPES, default="ndjson")
+    parser.add_argument(
+        "--chunk-size", type=int, default=settings.PERSONALIZED_CHUNK_SIZE
+    )
+    parser.add_argument("--buffered", action="store_true")
+    args = parser.parse_args()
+
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    report = asyncio.run(
+        run(args.format, args.recipients, args.chunk_size, args.buffered)
+    )
+    elapsed = time.perf_counter() - started
+    mode = "buffered" if args.buffered else "streamed"
+    print(
+        f"[{mode} {args.format}] {report['pending']} pending, "
+        f"{report['skipped']} skipped in {report['batches']} batches, "
+        f"{elapsed:.1f}s, {report['pending'] / elapsed:.0f} recipients/sec"
+    )
+    print(f"peak RSS {peak_rss_mb():.1f} MiB (at start {baseline:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
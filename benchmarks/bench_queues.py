@@ -0,0 +1,134 @@
+"""
+Telegram delivery latency while the email queue is saturated: one shared
+queue (old behaviour) vs dedicated per-channel queues with their own workers.
+
+    poetry run python -m benchmarks.bench_queues --emails 400 --telegrams 50
+
+Needs the Redis broker from settings. Sends are simulated with sleeps, so the
+numbers show queueing delay only, not provider latency.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+import redis
+from celery import Celery
+
+from src.settings import settings
+from src.tasks.extras import queue_for
+from src.utils.enums import ContactChannelType
+
+
+EMAIL_SEND_TIME = 0.2
+TELEGRAM_SEND_TIME = 0.01
+LATENCY_KEY = "notihub:bench:telegram_latency"
+
+bench_app = Celery("bench", broker=settings.redis_url)
+bench_app.conf.worker_hijack_root_logger = False
+
+
+@bench_app.task(name="bench.send_email")
+def send_email():
+    time.sleep(EMAIL_SEND_TIME)
+
+
+@bench_app.task(name="bench.send_telegram")
+def send_telegram(enqueued_at: float):
+    time.sleep(TELEGRAM_SEND_TIME)
+    client = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+    client.rpush(LATENCY_KEY, time.time() - enqueued_at)
+
+
+def start_worker(queue: str, concurrency: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "celery",
+            "--app=benchmarks.bench_queues:bench_app",
+            "worker",
+            "-Q",
+            queue,
+            "-n",
+            f"{queue}@%h",
+            f"--concurrency={concurrency}",
+            "--prefetch-multiplier=1",
+            "-l",
+            "WARNING",
+        ]
+    )
+
+
+def run_phase(
+    client: redis.Redis,
+    workers: dict[str, int],
+    email_queue: str,
+    telegram_queue: str,
+    emails: int,
+    telegrams: int,
+) -> list[float]:
+    client.delete(LATENCY_KEY, email_queue, telegram_queue)
+    processes = [start_worker(queue, size) for queue, size in workers.items()]
+    try:
+        time.sleep(5)
+        for _ in range(emails):
+            send_email.apply_async(queue=email_queue)
+        for _ in range(telegrams):
+            send_telegram.apply_async(args=(time.time(),), queue=telegram_queue)
+            time.sleep(0.05)
+
+        while client.llen(LATENCY_KEY) < telegrams:
+            time.sleep(0.1)
+        return sorted(float(value) for value in client.lrange(LATENCY_KEY, 0, -1))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        client.delete(LATENCY_KEY, email_queue, telegram_queue)
+
+
+def report(label: str, latencies: list[float]) -> None:
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(
+        f"{label:>10}: telegram latency p50={p50 * 1000:8.1f}ms p99={p99 * 1000:8.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=400)
+    parser.add_argument("--telegrams", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    client = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+    email_queue = "bench." + queue_for(ContactChannelType.EMAIL)
+    telegram_queue = "bench." + queue_for(ContactChannelType.TELEGRAM)
+
+    shared = run_phase(
+        client,
+        {"bench.shared": args.concurrency},
+        "bench.shared",
+        "bench.shared",
+        args.emails,
+        args.telegrams,
+    )
+    dedicated = run_phase(
+        client,
+        {email_queue: args.concurrency - 1, telegram_queue: 1},
+        email_queue,
+        telegram_queue,
+        args.emails,
+        args.telegrams,
+    )
+    report("shared", shared)
+    report("dedicated", dedicated)
+
+
+if __name__ == "__main__":
+    main()
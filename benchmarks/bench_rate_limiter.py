@@ -0,0 +1,81 @@
+"""
+Overhead of the Redis token-bucket limiter with many concurrent workers.
+
+    poetry run python -m benchmarks.bench_rate_limiter --workers 16 --acquires 2000
+
+Phase 1 uses a limit that is never hit, so it measures pure acquire() cost.
+Phase 2 uses the configured TELEGRAM limit and checks the achieved rate.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import time
+
+from src.settings import settings
+from src.utils.enums import ContactChannelType
+from src.utils.rate_limiter import TokenBucketRateLimiter
+from src.utils.redis_manager import RedisManager
+
+
+UNLIMITED = {"TELEGRAM": {"global": (1_000_000, 1_000_000), "destination": None}}
+
+
+async def _worker(limits: dict, acquires: int, concurrency: int) -> list[float]:
+    redis = await RedisManager(settings.REDIS_HOST, settings.REDIS_PORT).connect()
+    limiter = TokenBucketRateLimiter(redis, limits, prefix="notihub:bench")
+    latencies: list[float] = []
+
+    async def _acquire_many(count: int):
+        for i in range(count):
+            started = time.perf_counter()
+            await limiter.acquire(ContactChannelType.TELEGRAM, str(i))
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(
+        *[_acquire_many(acquires // concurrency) for _ in range(concurrency)]
+    )
+    await redis.aclose()
+    return latencies
+
+
+def _run_worker(args: tuple[dict, int, int]) -> list[float]:
+    return asyncio.run(_worker(*args))
+
+
+def run_phase(limits: dict, workers: int, acquires: int, concurrency: int):
+    started = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        results = pool.map(_run_worker, [(limits, acquires, concurrency)] * workers)
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for result in results for latency in result)
+    return len(latencies) / elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--acquires", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    rate, latencies = run_phase(
+        UNLIMITED, args.workers, args.acquires, args.concurrency
+    )
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"[overhead] {args.workers} workers: {rate:10.1f} acquires/sec")
+    print(
+        f"[overhead] latency p50={statistics.median(latencies) * 1000:.2f}ms "
+        f"p99={p99 * 1000:.2f}ms"
+    )
+
+    telegram_limit = settings.RATE_LIMITS["TELEGRAM"]["global"]
+    limited = {"TELEGRAM": {"global": telegram_limit, "destination": None}}
+    rate, _ = run_phase(limited, args.workers, max(1, 300 // args.workers), 1)
+    print(f"[limited] target {telegram_limit[0]}/sec, achieved {rate:.1f}/sec")
+
+
+if __name__ == "__main__":
+    main()
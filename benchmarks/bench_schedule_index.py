@@ -0,0 +1,76 @@
+"""
+Redis schedule index at a large number of schedules: rebuild time, due-id
+lookup latency and the cost of syncing one advanced batch.
+
+    poetry run python -m benchmarks.bench_schedule_index --schedules 1000000
+
+Uses a separate key in the configured Redis and deletes it afterwards.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from src.settings import settings
+from src.utils.redis_manager import redis_manager
+from src.utils.schedule_index import ScheduleIndex
+
+
+CHUNK_SIZE = 10000
+
+
+async def synthetic_chunks(schedules: int, now: datetime, due_share: float):
+    for start in range(0, schedules, CHUNK_SIZE):
+        chunk = []
+        for schedule_id in range(start + 1, min(start + CHUNK_SIZE, schedules) + 1):
+            if random.random() < due_share:
+                offset = -random.uniform(0, 60)
+            else:
+                offset = random.uniform(1, 30 * 24 * 3600)
+            chunk.append((schedule_id, None, now + timedelta(seconds=offset)))
+        yield chunk
+
+
+async def main(schedules: int, batch_size: int, lookups: int):
+    index = ScheduleIndex(redis=redis_manager, key="notihub:bench:schedules")
+    now = datetime.now(timezone.utc)
+
+    started = time.perf_counter()
+    await index.rebuild(synthetic_chunks(schedules, now, due_share=0.01))
+    print(f"rebuild of {schedules} schedules: {time.perf_counter() - started:.2f}s")
+
+    latencies = []
+    for _ in range(lookups):
+        started = time.perf_counter()
+        due_ids = await index.due_ids(now, limit=batch_size)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    print(
+        f"due_ids(limit={batch_size}) -> {len(due_ids)} ids: "
+        f"p50={statistics.median(latencies) * 1000:.2f}ms "
+        f"p99={latencies[int(len(latencies) * 0.99)] * 1000:.2f}ms"
+    )
+
+    advanced = {
+        schedule_id: (None, now + timedelta(hours=1)) for schedule_id in due_ids
+    }
+    started = time.perf_counter()
+    await index.apply(advanced)
+    print(
+        f"sync of {len(advanced)} advanced schedules: "
+        f"{(time.perf_counter() - started) * 1000:.2f}ms"
+    )
+
+    await redis_manager.client().delete(index.shard_key(0))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schedules", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=settings.SCHEDULER_BATCH_SIZE)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.schedules, args.batch_size, args.lookups))
@@ -0,0 +1,187 @@
+"""
+Query plans of the scheduler and pagination queries on a large
+notification_schedules table, with and without the next_execution_at indexes.
+
+    poetry run python -m benchmarks.bench_schedule_indexes --schedules 1000000
+
+Seeds throwaway users, channels and schedules with generate_series, prints
+EXPLAIN (ANALYZE, BUFFERS) for the exact statements ScheduleRepository builds,
+then removes the seeded rows. "Without" plans drop the indexes inside a
+transaction that is rolled back.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from src.db import engine_null_pool
+from src.repos.scheudles import ScheduleRepository
+
+
+BENCH_PREFIX = "bench_schedule_indexes_"
+USERS = 1000
+INDEXES = (
+    "ix_notification_schedules_due",
+    "ix_notification_schedules_channel_next_execution",
+)
+
+SEED_USERS = text(
+    """
+    INSERT INTO users (username, password_hash)
+    SELECT :prefix || g, '-' FROM generate_series(1, :users) AS g
+    """
+)
+SEED_CHANNELS = text(
+    """
+    INSERT INTO user_contact_channels (user_id, contact_value, channel_type)
+    SELECT id, username || '@example.com', 'EMAIL'
+    FROM users WHERE username LIKE :prefix || '%'
+    """
+)
+SEED_BODIES = text(
+    """
+    INSERT INTO message_bodies (hash, body)
+    SELECT sha256(convert_to('bench schedule ' || g, 'UTF8')), 'bench schedule ' || g
+    FROM generate_series(1, :schedules) AS g
+    ON CONFLICT (hash) DO NOTHING
+    """
+)
+SEED_SCHEDULES = text(
+    """
+    WITH channels AS (
+        SELECT array_agg(c.id ORDER BY c.id) AS ids
+        FROM user_contact_channels AS c
+        JOIN users AS u ON u.id = c.user_id
+        WHERE u.username LIKE :prefix || '%'
+    )
+    INSERT INTO notification_schedules (
+        message_hash, channel_id, schedule_type, crontab, max_executions,
+        current_executions, next_execution_at, updated_at
+    )
+    SELECT
+        sha256(convert_to('bench schedule ' || g, 'UTF8')),
+        channels.ids[g % array_length(channels.ids, 1) + 1],
+        'RECURRING',
+        '0 * * * *',
+        0,
+        0,
+        CASE
+            WHEN g % 1000 = 0 THEN now() - random() * interval '1 hour'
+            ELSE now() + random() * interval '30 days'
+        END,
+        now()
+    FROM generate_series(1, :schedules) AS g, channels
+    """
+)
+CLEANUP = (
+    """
+    DELETE FROM notification_schedules WHERE channel_id IN (
+        SELECT c.id FROM user_contact_channels AS c
+        JOIN users AS u ON u.id = c.user_id WHERE u.username LIKE :prefix || '%'
+    )
+    """,
+    """
+    DELETE FROM user_contact_channels WHERE user_id IN (
+        SELECT id FROM users WHERE username LIKE :prefix || '%'
+    )
+    """,
+    "DELETE FROM users WHERE username LIKE :prefix || '%'",
+    "DELETE FROM message_bodies WHERE body LIKE 'bench schedule %'",
+)
+
+
+class _Captured(Exception):
+    pass
+
+
+class _CapturingSession:
+    async def execute(self, statement):
+        raise _Captured(statement)
+
+
+async def capture(coro) -> str:
+    try:
+        await coro
+    except _Captured as exc:
+        return str(
+            exc.args[0].compile(
+                dialect=postgresql.dialect(),
+                compile_kwargs={"literal_binds": True},
+            )
+        )
+    raise RuntimeError("Repository method did not execute a statement")
+
+
+async def build_queries(user_id: int) -> dict[str, str]:
+    repo = ScheduleRepository(_CapturingSession())  # type: ignore
+    now = datetime.now(timezone.utc)
+    return {
+        "due claim": await capture(
+            repo.get_current_schedules_to_perform(now=now, limit=2000, skip_locked=True)
+        ),
+        "upcoming heap": await capture(repo.get_upcoming_execution_times(limit=1000)),
+        "user pagination": await capture(
+            repo.get_all_nearest_with_pagination(
+                limit=20,
+                offset=0,
+                user_id=user_id,
+                date_begin=now,
+                date_end=now + timedelta(days=7),
+            )
+        ),
+    }
+
+
+async def explain(conn, query: str) -> list[str]:
+    result = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {query}"))
+    return [row[0] for row in result.all()]
+
+
+async def main(schedules: int):
+    params = {"prefix": BENCH_PREFIX}
+    async with engine_null_pool.begin() as conn:
+        await conn.execute(SEED_USERS, {**params, "users": USERS})
+        await conn.execute(SEED_CHANNELS, params)
+        await conn.execute(SEED_BODIES, {"schedules": schedules})
+        await conn.execute(SEED_SCHEDULES, {**params, "schedules": schedules})
+        user_id = (
+            await conn.execute(
+                text("SELECT min(id) FROM users WHERE username LIKE :prefix || '%'"),
+                params,
+            )
+        ).scalar_one()
+
+    try:
+        async with engine_null_pool.begin() as conn:
+            await conn.execute(text("ANALYZE notification_schedules"))
+
+        queries = await build_queries(user_id)
+        for name, query in queries.items():
+            async with engine_null_pool.connect() as conn:
+                with_indexes = await explain(conn, query)
+                await conn.rollback()
+
+                for index in INDEXES:
+                    await conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+                without_indexes = await explain(conn, query)
+                await conn.rollback()
+
+            print(f"=== {name}: with indexes")
+            print("\n".join(with_indexes))
+            print(f"=== {name}: without indexes")
+            print("\n".join(without_indexes))
+            print()
+    finally:
+        async with engine_null_pool.begin() as conn:
+            for statement in CLEANUP:
+                await conn.execute(text(statement), params)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schedules", type=int, default=1_000_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.schedules))
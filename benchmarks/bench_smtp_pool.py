@@ -0,0 +1,80 @@
+"""
+Email throughput against a local aiosmtpd stand-in: aiosmtplib.send() per
+message (connect + EHLO per email, old behaviour) vs SMTPConnectionPool.
+
+    poetry run pip install aiosmtpd
+    poetry run python -m benchmarks.bench_smtp_pool --messages 2000
+"""
+
+import argparse
+import asyncio
+import time
+
+import aiosmtplib
+from aiosmtpd.controller import Controller
+from aiosmtpd.handlers import Sink
+
+from src.tasks.smtp_pool import SMTPConnectionPool
+
+SENDER = "noreply@notihub.test"
+RECIPIENTS = ["user@notihub.test"]
+MESSAGE = "Subject: bench\n\n" + "Hello, NotiHub!\n" * 64
+
+
+async def _run_concurrently(send, messages: int, concurrency: int) -> float:
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(messages):
+        queue.put_nowait(i)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            await send()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return messages / (time.perf_counter() - started)
+
+
+async def bench(port: int, messages: int, concurrency: int) -> tuple[float, float]:
+    async def send_once():
+        await aiosmtplib.send(
+            MESSAGE,
+            sender=SENDER,
+            recipients=RECIPIENTS,
+            hostname="127.0.0.1",
+            port=port,
+        )
+
+    pool = SMTPConnectionPool(
+        hostname="127.0.0.1", port=port, use_tls=False, max_size=concurrency
+    )
+
+    async def send_pooled():
+        await pool.sendmail(sender=SENDER, recipients=RECIPIENTS, message=MESSAGE)
+
+    before = await _run_concurrently(send_once, messages, concurrency)
+    after = await _run_concurrently(send_pooled, messages, concurrency)
+    await pool.close()
+    return before, after
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=18026)
+    args = parser.parse_args()
+
+    controller = Controller(Sink(), hostname="127.0.0.1", port=args.port)
+    controller.start()
+    try:
+        print(f"{'connections':>11} | {'send() per email':>16} | {'pooled':>10}")
+        for concurrency in (1, 8, 32):
+            before, after = asyncio.run(bench(args.port, args.messages, concurrency))
+            print(f"{concurrency:>11} | {before:>10.1f} /sec | {after:>5.1f} /sec")
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Rendering a hot template with and without the compiled template cache.
+
+    poetry run python -m benchmarks.bench_template_render --renders 100000
+
+"uncached" repeats what the send path did before: parse, find the undeclared
+variables and compile the template again on every send.
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from jinja2 import meta
+
+from src.settings import settings
+from src.utils.template_cache import TemplateCache
+
+
+CONTENT = """
+<h1>Здравствуйте, {{ name }}!</h1>
+<p>Заказ №{{ order_id }} {% if paid %}оплачен{% else %}не оплачен{% endif %}.</p>
+<ul>{% for item in items.split(",") %}<li>{{ item }}</li>{% endfor %}</ul>
+"""
+VARIABLES = {"name": "Иван", "order_id": "42", "paid": "1", "items": "a,b,c"}
+
+
+def render_uncached() -> str:
+    parsed = settings.JINGA2_ENV.parse(CONTENT)
+    missing = meta.find_undeclared_variables(parsed) - VARIABLES.keys()
+    assert not missing
+    return settings.JINGA2_ENV.from_string(CONTENT).render(**VARIABLES)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--renders", type=int, default=100_000)
+    args = parser.parse_args()
+
+    cache = TemplateCache(env=settings.JINGA2_ENV, maxsize=16)
+    updated_at = datetime.now(timezone.utc)
+
+    def render_cached() -> str:
+        compiled = cache.get(1, updated_at, CONTENT)
+        assert not compiled.variables - VARIABLES.keys()
+        return compiled.template.render(**VARIABLES)
+
+    assert render_cached() == render_uncached()
+    for name, render in (("uncached", render_uncached), ("cached", render_cached)):
+        started = time.perf_counter()
+        for _ in range(args.renders):
+            render()
+        elapsed = time.perf_counter() - started
+        print(
+            f"[{name:>8}] {elapsed / args.renders * 1e6:8.1f}us/render "
+            f"{args.renders / elapsed:10.0f} renders/sec"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -101,4 +101,16 @@ EXAMPLE_NOTIFICATIONS_FOR_ALL: Dict[str, Example] = {
             },
         },
     },
+    "RECURRING_AUDIENCE": {
+        "summary": "Периодическая рассылка только на email",
+        "value": {
+            "schedule_type": "RECURRING",
+            "template_id": 1,
+            "crontab": "0 9 * * 1",
+            "audience": "EMAIL",
+            "variables": {
+                "key": "value",
+            },
+        },
+    },
 }
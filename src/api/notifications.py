@@ -1,12 +1,16 @@
 import math
 
-from fastapi import APIRouter, Body, Depends, Path
+from fastapi import APIRouter, Body, Depends, Path, Query, Request, Response, status
 from fastapi_cache.decorator import cache
 
 from src.api.texts.notifications import (
     API_DESCR_NOTIFICATIONS_SENDALL,
     API_DESCR_NOTIFICATIONS_SENDONE,
+    API_DESCR_NOTIFICATIONS_SENDPERSONALIZED,
+    API_DESCR_NOTIFICATIONS_SENDPERSONALIZED_UPLOAD,
+    DESCR_API_GET_MASS_SEND_JOB,
     DESCR_API_GET_REPORT,
+    DESCR_API_GET_SCHEDULER_METRICS,
     DESCR_API_GET_SCHEDULES,
     DESCR_API_GET_HISTORY,
 )
@@ -15,18 +19,26 @@ from src.api.examples.notifications import (
     EXAMPLE_NOTIFICATIONS_FOR_ALL,
 )
 
-from src.schemas.notifications import NotificationMassSendDTO, NotificationSendDTO
+from src.schemas.notifications import (
+    NotificationMassSendDTO,
+    NotificationSendDTO,
+    PersonalizedMassSendDTO,
+)
 from src.dependencies.db import DBDep
 from src.dependencies.users import auth_required, UserMetaDep, only_staff
 from src.dependencies.pagination import PaginationDep
 from src.dependencies.schedule import ScheduleFiltrationDep
 from src.services.notifications import NotificationService
+from src.utils.enums import BroadcastAudience
+from src.utils.recipients import iter_recipients
 
 from src.utils.exceptions import (
     ChannelNotFoundError,
     ChannelNotFoundHTTPError,
     ForbiddenHTMLTemplateError,
     ForbiddenHTMLTemplateHTTPError,
+    MassSendJobNotFoundError,
+    MassSendJobNotFoundHTTPError,
     MissingTemplateVariablesError,
     MissingTemplateVariablesHTTPError,
     NotificationExistsError,
@@ -35,8 +47,14 @@ from src.utils.exceptions import (
     ScheduleAlreadyExistsHTTPError,
     ScheduleNotFoundError,
     ScheduleNotFoundHTTPError,
+    SchedulerMetricsUnavailableError,
+    SchedulerMetricsUnavailableHTTPError,
     TemplateNotFoundError,
     TemplateNotFoundHTTPError,
+    TemplateSyntaxCheckError,
+    TemplateSyntaxCheckHTTPError,
+    UnsupportedRecipientsFormatError,
+    UnsupportedRecipientsFormatHTTPError,
     ValueOutOfRangeError,
     ValueOutOfRangeHTTPError,
 )
@@ -87,17 +105,19 @@ async def send_one_notification(
     summary="Массовая рассылка всем пользователям | Только для персонала",
     dependencies=[Depends(only_staff)],
     description=API_DESCR_NOTIFICATIONS_SENDALL,
+    responses={status.HTTP_202_ACCEPTED: {"description": "Задача рассылки создана"}},
 )
 async def send_many_notifications(
     db: DBDep,
     user_meta: UserMetaDep,
+    response: Response,
     data: NotificationMassSendDTO = Body(
         description="Параметры уведомеления",
         openapi_examples=EXAMPLE_NOTIFICATIONS_FOR_ALL,
     ),
 ):
     try:
-        response = await NotificationService(db).send_notifications(
+        result = await NotificationService(db).send_notifications(
             data=data, user_meta=user_meta
         )
     except ScheduleAlreadyExistsError as exc:
@@ -112,6 +132,93 @@ async def send_many_notifications(
         raise ForbiddenHTMLTemplateHTTPError(detail=exc.detail) from exc
     except MissingTemplateVariablesError as exc:
         raise MissingTemplateVariablesHTTPError(detail=exc.detail) from exc
+    if "job_id" in result:
+        response.status_code = status.HTTP_202_ACCEPTED
+    return {"status": "OK", "data": result}
+
+
+@router.post(
+    "/sendPersonalized",
+    summary="Персональная рассылка по данным пользователей | Только для персонала",
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(only_staff)],
+    description=API_DESCR_NOTIFICATIONS_SENDPERSONALIZED,
+)
+async def send_personalized_notifications(
+    db: DBDep,
+    user_meta: UserMetaDep,
+    data: PersonalizedMassSendDTO = Body(description="Параметры рассылки"),
+):
+    try:
+        response = await NotificationService(db).send_personalized(
+            template_id=data.template_id,
+            audience=data.audience,
+            variables=data.variables,
+            user_meta=user_meta,
+        )
+    except TemplateNotFoundError as exc:
+        raise TemplateNotFoundHTTPError from exc
+    except TemplateSyntaxCheckError as exc:
+        raise TemplateSyntaxCheckHTTPError from exc
+    except ForbiddenHTMLTemplateError as exc:
+        raise ForbiddenHTMLTemplateHTTPError(detail=exc.detail) from exc
+    return {"status": "OK", "data": response}
+
+
+@router.post(
+    "/sendPersonalized/upload",
+    summary="Персональная рассылка по файлу NDJSON/CSV | Только для персонала",
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(only_staff)],
+    description=API_DESCR_NOTIFICATIONS_SENDPERSONALIZED_UPLOAD,
+)
+async def upload_personalized_notifications(
+    request: Request,
+    db: DBDep,
+    user_meta: UserMetaDep,
+    template_id: int = Query(description="ID шаблона"),
+    audience: BroadcastAudience = Query(
+        BroadcastAudience.ALL, description="Типы каналов получателей"
+    ),
+):
+    recipients = iter_recipients(
+        request.stream(), request.headers.get("content-type", "")
+    )
+    try:
+        response = await NotificationService(db).send_personalized(
+            template_id=template_id,
+            audience=audience,
+            variables={},
+            user_meta=user_meta,
+            recipients=recipients,
+        )
+    except TemplateNotFoundError as exc:
+        raise TemplateNotFoundHTTPError from exc
+    except TemplateSyntaxCheckError as exc:
+        raise TemplateSyntaxCheckHTTPError from exc
+    except ForbiddenHTMLTemplateError as exc:
+        raise ForbiddenHTMLTemplateHTTPError(detail=exc.detail) from exc
+    except UnsupportedRecipientsFormatError as exc:
+        raise UnsupportedRecipientsFormatHTTPError from exc
+    return {"status": "OK", "data": response}
+
+
+@router.get(
+    "/jobs/{job_id}",
+    summary="Прогресс массовой рассылки | Только для персонала",
+    dependencies=[Depends(only_staff)],
+    description=DESCR_API_GET_MASS_SEND_JOB,
+)
+async def get_mass_send_job(
+    db: DBDep,
+    job_id: int = Path(description="ID задачи рассылки"),
+):
+    try:
+        response = await NotificationService(db).get_mass_send_job(job_id)
+    except MassSendJobNotFoundError as exc:
+        raise MassSendJobNotFoundHTTPError from exc
+    except ValueOutOfRangeError as exc:
+        raise ValueOutOfRangeHTTPError(detail=exc.detail) from exc
     return {"status": "OK", "data": response}
 
 
@@ -226,3 +333,17 @@ async def get_report(db: DBDep, filtration: ScheduleFiltrationDep):
         date_begin=filtration.date_begin, date_end=filtration.date_end
     )
     return {"status": "OK", "data": response}
+
+
+@router.get(
+    "/getSchedulerMetrics",
+    summary="Получить метрики планировщика | Только для персонала",
+    dependencies=[Depends(only_staff)],
+    description=DESCR_API_GET_SCHEDULER_METRICS,
+)
+async def get_scheduler_metrics(db: DBDep):
+    try:
+        response = await NotificationService(db).get_scheduler_metrics()
+    except SchedulerMetricsUnavailableError as exc:
+        raise SchedulerMetricsUnavailableHTTPError from exc
+    return {"status": "OK", "data": response}
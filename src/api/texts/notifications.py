@@ -25,6 +25,12 @@ API_DESCR_NOTIFICATIONS_SENDALL = """
 и на все их каналы. Если возникнет ошибка, она будет пропущена и отправка продолжится.
 Если у пользователя уже есть такое же запланированное уведомление, то его поля `updated_at` и
 `next_execution_time` будут перезаписаны.
+
+Немедленная рассылка не выполняется в рамках запроса: метод создаёт задачу рассылки и сразу
+возвращает её `job_id` с кодом 202. Фоновый воркер обходит каналы порциями и ставит уведомления
+в очередь отправки, а прогресс задачи можно отслеживать методом `/notifications/jobs/{job_id}`.
+Отложенная или повторяющаяся рассылка сохраняется в расписание, и метод возвращает её
+`scheduled_ids` с кодом 200.
 """
 
 API_DESCR_NOTIFICATIONS_SENDONE = """
@@ -43,3 +49,46 @@ API_DESCR_NOTIFICATIONS_SENDONE = """
 Также можно предоставить максимальное количество повторов уведомления `max_executions`, после которых 
 оно перестанет отправляться и удалится из запланированных. 
 """
+
+API_DESCR_NOTIFICATIONS_SENDPERSONALIZED = """
+Персональная рассылка пользователям
+
+Шаблон `template_id` отрисовывается отдельно для каждого пользователя. Помимо общих переменных
+`variables` в шаблоне доступны атрибуты пользователя: `username`, `first_name` и `last_name`.
+Метод создаёт задачу рассылки и сразу возвращает её `job_id` с кодом 202. Фоновый воркер обходит
+пользователей порциями, а прогресс задачи можно отслеживать методом `/notifications/jobs/{job_id}`.
+Пользователи, для которых шаблон не удалось отрисовать, пропускаются и учитываются в поле `skipped`.
+HTML-шаблон можно отправить только получателям `EMAIL`.
+"""
+
+API_DESCR_NOTIFICATIONS_SENDPERSONALIZED_UPLOAD = """
+Персональная рассылка по списку получателей
+
+Тело запроса - список получателей в формате NDJSON (`Content-Type: application/x-ndjson`)
+или CSV с заголовком (`Content-Type: text/csv`). Каждая строка должна содержать `user_id`
+получателя, остальные поля подставляются в шаблон `template_id` как переменные.
+Файл читается потоком и сохраняется вместе с задачей рассылки, поэтому размер списка не ограничен
+памятью сервера. Метод возвращает `job_id` задачи с кодом 202 и количество некорректных строк в поле
+`skipped`. Строки, для которых не хватает переменных, пропускаются воркером и учитываются в поле
+`skipped` задачи.
+"""
+
+DESCR_API_GET_MASS_SEND_JOB = """
+Прогресс массовой рассылки
+
+Возвращает статус задачи рассылки и количество её уведомлений: `total` - поставлено в очередь
+всего, `queued` - ожидают отправки, `sent` - доставлены, `failed` - не доставлены,
+`skipped` - получатели персональной рассылки, для которых не удалось отрисовать шаблон.
+`throughput` - количество обработанных уведомлений в секунду с момента начала рассылки.
+Если воркер рассылки был остановлен, задача продолжится с последней обработанной порции.
+"""
+
+DESCR_API_GET_SCHEDULER_METRICS = """
+Метрики планировщика
+
+Возвращает счётчики восстановления пропущенных запусков: `misfired_total` - найдено пропущенных
+запусков, `misfire_fired_total` - отправлено, `misfire_skipped_total` - пропущено по политике,
+`misfire_truncated_total` - урезано до лимита догоняющих запусков. `recovery_backlog` - оценка
+числа просроченных расписаний, `recovery_updated_at` - время последнего восстановления (Unix time).
+Если хранилище метрик недоступно, метод возвращает код 503.
+"""
@@ -0,0 +1,59 @@
+"""new: notification outbox for transactional dispatch
+
+Revision ID: 023e721916fd
+Revises: 5f9cd10690b1
+Create Date: 2026-10-18 09:10:12.418305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "023e721916fd"
+down_revision: Union[str, Sequence[str], None] = "5f9cd10690b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "notification_outbox",
+        sa.Column("log_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "provider_name",
+            postgresql.ENUM(
+                "EMAIL",
+                "TELEGRAM",
+                "PUSH",
+                name="contactchanneltype",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["log_id"],
+            ["notification_logs.id"],
+            name=op.f("fk_notification_outbox_log_id_notification_logs"),
+            onupdate="cascade",
+            ondelete="cascade",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_notification_outbox")),
+        sa.UniqueConstraint("log_id", name=op.f("uq_notification_outbox_log_id")),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("notification_outbox")
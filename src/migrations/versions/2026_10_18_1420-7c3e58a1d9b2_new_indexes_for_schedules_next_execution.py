@@ -0,0 +1,56 @@
+"""new: indexes for schedules next_execution_at
+
+Revision ID: 7c3e58a1d9b2
+Revises: 023e721916fd
+Create Date: 2026-10-18 14:20:37.904112
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c3e58a1d9b2"
+down_revision: Union[str, Sequence[str], None] = "023e721916fd"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_notification_schedules_due",
+            "notification_schedules",
+            ["next_execution_at"],
+            postgresql_include=["channel_id"],
+            postgresql_where="next_execution_at IS NOT NULL",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_notification_schedules_channel_next_execution",
+            "notification_schedules",
+            ["channel_id", "next_execution_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_notification_schedules_channel_next_execution",
+            table_name="notification_schedules",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_notification_schedules_due",
+            table_name="notification_schedules",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,36 @@
+"""new: misfire policy for recurring schedules
+
+Revision ID: b84d2f0c6e17
+Revises: 7c3e58a1d9b2
+Create Date: 2026-10-18 16:10:37.204581
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b84d2f0c6e17"
+down_revision: Union[str, Sequence[str], None] = "7c3e58a1d9b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "notification_schedules",
+        sa.Column(
+            "misfire_policy",
+            sa.String(length=20),
+            server_default="FIRE_ONCE",
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("notification_schedules", "misfire_policy")
@@ -0,0 +1,78 @@
+"""new: broadcast schedules expanded at fire time
+
+Revision ID: e2a9c41f7d30
+Revises: b84d2f0c6e17
+Create Date: 2026-10-18 17:35:09.862140
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a9c41f7d30"
+down_revision: Union[str, Sequence[str], None] = "b84d2f0c6e17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "notification_schedules", sa.Column("sender_id", sa.Integer(), nullable=True)
+    )
+    op.add_column(
+        "notification_schedules",
+        sa.Column(
+            "audience",
+            sa.String(length=20),
+            nullable=True,
+            comment="Получатели рассылки, раскрываются в момент отправки",
+        ),
+    )
+    op.alter_column(
+        "notification_schedules",
+        "channel_id",
+        existing_type=sa.INTEGER(),
+        nullable=True,
+    )
+    op.create_foreign_key(
+        op.f("fk_notification_schedules_sender_id_users"),
+        "notification_schedules",
+        "users",
+        ["sender_id"],
+        ["id"],
+        onupdate="cascade",
+        ondelete="cascade",
+    )
+    op.create_check_constraint(
+        op.f("ck_notification_schedules_channel_or_audience"),
+        "notification_schedules",
+        "(channel_id IS NOT NULL AND audience IS NULL) OR "
+        "(channel_id IS NULL AND audience IS NOT NULL AND sender_id IS NOT NULL)",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM notification_schedules WHERE channel_id IS NULL")
+    op.drop_constraint(
+        op.f("ck_notification_schedules_channel_or_audience"),
+        "notification_schedules",
+        type_="check",
+    )
+    op.drop_constraint(
+        op.f("fk_notification_schedules_sender_id_users"),
+        "notification_schedules",
+        type_="foreignkey",
+    )
+    op.alter_column(
+        "notification_schedules",
+        "channel_id",
+        existing_type=sa.INTEGER(),
+        nullable=False,
+    )
+    op.drop_column("notification_schedules", "audience")
+    op.drop_column("notification_schedules", "sender_id")
@@ -0,0 +1,112 @@
+"""new: mass send jobs
+
+Revision ID: 5d8e1b7a0c43
+Revises: e2a9c41f7d30
+Create Date: 2026-10-18 19:05:41.227503
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5d8e1b7a0c43"
+down_revision: Union[str, Sequence[str], None] = "e2a9c41f7d30"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "mass_send_jobs",
+        sa.Column("sender_id", sa.Integer(), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("audience", sa.String(length=20), nullable=False),
+        sa.Column(
+            "status", sa.String(length=20), server_default="QUEUED", nullable=False
+        ),
+        sa.Column(
+            "cursor",
+            sa.Integer(),
+            server_default="0",
+            nullable=False,
+            comment="Последний обработанный id канала аудитории",
+        ),
+        sa.Column("queued_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column(
+            "lease_expires_at",
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment="До этого времени задачу обрабатывает захвативший её воркер",
+        ),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["sender_id"],
+            ["users.id"],
+            name=op.f("fk_mass_send_jobs_sender_id_users"),
+            onupdate="cascade",
+            ondelete="cascade",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_mass_send_jobs")),
+    )
+    op.create_index(
+        "ix_mass_send_jobs_active",
+        "mass_send_jobs",
+        ["id"],
+        postgresql_where="status IN ('QUEUED', 'RUNNING')",
+    )
+    op.add_column("notification_logs", sa.Column("job_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        op.f("fk_notification_logs_job_id_mass_send_jobs"),
+        "notification_logs",
+        "mass_send_jobs",
+        ["job_id"],
+        ["id"],
+        onupdate="cascade",
+        ondelete="set null",
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_notification_logs_job_status",
+            "notification_logs",
+            ["job_id", "status"],
+            postgresql_where="job_id IS NOT NULL",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_notification_logs_job_status",
+            table_name="notification_logs",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_constraint(
+        op.f("fk_notification_logs_job_id_mass_send_jobs"),
+        "notification_logs",
+        type_="foreignkey",
+    )
+    op.drop_column("notification_logs", "job_id")
+    op.drop_index(
+        "ix_mass_send_jobs_active",
+        table_name="mass_send_jobs",
+        postgresql_where="status IN ('QUEUED', 'RUNNING')",
+    )
+    op.drop_table("mass_send_jobs")
@@ -0,0 +1,138 @@
+"""new: message bodies
+
+Revision ID: b3c7e9f1a2d5
+Revises: 5d8e1b7a0c43
+Create Date: 2026-10-18 20:10:12.481936
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b3c7e9f1a2d5"
+down_revision: Union[str, Sequence[str], None] = "5d8e1b7a0c43"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("notification_logs", "notification_schedules")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "message_bodies",
+        sa.Column(
+            "hash",
+            sa.LargeBinary(length=32),
+            nullable=False,
+            comment="SHA-256 от текста сообщения",
+        ),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.CheckConstraint(
+            "hash = sha256(convert_to(body, 'UTF8'))",
+            name=op.f("ck_message_bodies_hash_matches_body"),
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_message_bodies")),
+        sa.UniqueConstraint("hash", name=op.f("uq_message_bodies_hash")),
+    )
+    for table in TABLES:
+        op.execute(
+            f"""
+            INSERT INTO message_bodies (hash, body)
+            SELECT DISTINCT sha256(convert_to(message, 'UTF8')), message FROM {table}
+            ON CONFLICT (hash) DO NOTHING
+            """
+        )
+        op.add_column(
+            table,
+            sa.Column("message_hash", sa.LargeBinary(length=32), nullable=True),
+        )
+        op.execute(
+            f"UPDATE {table} SET message_hash = sha256(convert_to(message, 'UTF8'))"
+        )
+        op.alter_column(
+            table,
+            "message_hash",
+            existing_type=sa.LargeBinary(length=32),
+            nullable=False,
+        )
+        op.create_foreign_key(
+            op.f(f"fk_{table}_message_hash_message_bodies"),
+            table,
+            "message_bodies",
+            ["message_hash"],
+            ["hash"],
+            onupdate="restrict",
+            ondelete="restrict",
+        )
+
+    op.drop_index(
+        "unique_pending_notifications",
+        table_name="notification_logs",
+        postgresql_where="status = 'PENDING'",
+    )
+    op.create_index(
+        "unique_pending_notifications",
+        "notification_logs",
+        ["sender_id", "contact_data", "message_hash", "provider_name"],
+        unique=True,
+        postgresql_where="status = 'PENDING'",
+    )
+    op.drop_constraint("unique_schedules", "notification_schedules", type_="unique")
+    op.create_unique_constraint(
+        "unique_schedules",
+        "notification_schedules",
+        ["channel_id", "message_hash", "schedule_type", "crontab", "max_executions"],
+    )
+    for table in TABLES:
+        op.drop_column(table, "message")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.add_column(table, sa.Column("message", sa.Text(), nullable=True))
+        op.execute(
+            f"""
+            UPDATE {table} SET message = message_bodies.body
+            FROM message_bodies WHERE message_bodies.hash = {table}.message_hash
+            """
+        )
+        op.alter_column(table, "message", existing_type=sa.Text(), nullable=False)
+
+    op.drop_constraint("unique_schedules", "notification_schedules", type_="unique")
+    op.create_unique_constraint(
+        "unique_schedules",
+        "notification_schedules",
+        ["channel_id", "message", "schedule_type", "crontab", "max_executions"],
+    )
+    op.drop_index(
+        "unique_pending_notifications",
+        table_name="notification_logs",
+        postgresql_where="status = 'PENDING'",
+    )
+    op.create_index(
+        "unique_pending_notifications",
+        "notification_logs",
+        ["sender_id", "contact_data", "message", "provider_name"],
+        unique=True,
+        postgresql_where="status = 'PENDING'",
+    )
+    for table in TABLES:
+        op.drop_constraint(
+            op.f(f"fk_{table}_message_hash_message_bodies"),
+            table,
+            type_="foreignkey",
+        )
+        op.drop_column(table, "message_hash")
+    op.drop_table("message_bodies")
@@ -0,0 +1,59 @@
+"""new: unique broadcast schedules
+
+Revision ID: c4d8f0a2b6e1
+Revises: b3c7e9f1a2d5
+Create Date: 2026-10-19 10:20:37.915204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4d8f0a2b6e1"
+down_revision: Union[str, Sequence[str], None] = "b3c7e9f1a2d5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        DELETE FROM notification_schedules AS duplicate
+        USING notification_schedules AS kept
+        WHERE duplicate.channel_id IS NULL
+            AND kept.channel_id IS NULL
+            AND duplicate.id < kept.id
+            AND duplicate.sender_id = kept.sender_id
+            AND duplicate.audience = kept.audience
+            AND duplicate.message_hash = kept.message_hash
+            AND duplicate.schedule_type = kept.schedule_type
+            AND duplicate.crontab = kept.crontab
+            AND duplicate.max_executions = kept.max_executions
+        """
+    )
+    op.create_index(
+        "unique_broadcast_schedules",
+        "notification_schedules",
+        [
+            "sender_id",
+            "audience",
+            "message_hash",
+            "schedule_type",
+            "crontab",
+            "max_executions",
+        ],
+        unique=True,
+        postgresql_where="channel_id IS NULL",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "unique_broadcast_schedules",
+        table_name="notification_schedules",
+        postgresql_where="channel_id IS NULL",
+    )
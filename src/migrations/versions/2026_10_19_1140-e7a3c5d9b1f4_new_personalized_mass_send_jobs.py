@@ -0,0 +1,113 @@
+"""new: personalized mass send jobs
+
+Revision ID: e7a3c5d9b1f4
+Revises: c4d8f0a2b6e1
+Create Date: 2026-10-19 11:40:18.604392
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a3c5d9b1f4"
+down_revision: Union[str, Sequence[str], None] = "c4d8f0a2b6e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column("mass_send_jobs", "message", existing_type=sa.Text(), nullable=True)
+    op.add_column(
+        "mass_send_jobs",
+        sa.Column(
+            "template",
+            sa.Text(),
+            nullable=True,
+            comment="Текст шаблона персональной рассылки, отрисовывается воркером",
+        ),
+    )
+    op.add_column(
+        "mass_send_jobs",
+        sa.Column("variables", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+    op.add_column(
+        "mass_send_jobs",
+        sa.Column(
+            "uploaded",
+            sa.Boolean(),
+            server_default="false",
+            nullable=False,
+            comment="Получатели загружены файлом в mass_send_recipients",
+        ),
+    )
+    op.add_column(
+        "mass_send_jobs",
+        sa.Column("skipped_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.alter_column(
+        "mass_send_jobs",
+        "cursor",
+        existing_type=sa.Integer(),
+        comment="Последний обработанный id канала, пользователя или получателя",
+        existing_comment="Последний обработанный id канала аудитории",
+        existing_nullable=False,
+        existing_server_default=sa.text("0"),
+    )
+    op.create_check_constraint(
+        op.f("ck_mass_send_jobs_message_or_template"),
+        "mass_send_jobs",
+        "(message IS NULL) <> (template IS NULL)",
+    )
+    op.create_table(
+        "mass_send_recipients",
+        sa.Column("job_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("variables", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["job_id"],
+            ["mass_send_jobs.id"],
+            name=op.f("fk_mass_send_recipients_job_id_mass_send_jobs"),
+            onupdate="cascade",
+            ondelete="cascade",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_mass_send_recipients")),
+    )
+    op.create_index(
+        "ix_mass_send_recipients_job_id",
+        "mass_send_recipients",
+        ["job_id", "id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_mass_send_recipients_job_id", table_name="mass_send_recipients")
+    op.drop_table("mass_send_recipients")
+    op.execute("DELETE FROM mass_send_jobs WHERE template IS NOT NULL")
+    op.drop_constraint(
+        op.f("ck_mass_send_jobs_message_or_template"),
+        "mass_send_jobs",
+        type_="check",
+    )
+    op.alter_column(
+        "mass_send_jobs",
+        "cursor",
+        existing_type=sa.Integer(),
+        comment="Последний обработанный id канала аудитории",
+        existing_comment="Последний обработанный id канала, пользователя или получателя",
+        existing_nullable=False,
+        existing_server_default=sa.text("0"),
+    )
+    op.drop_column("mass_send_jobs", "skipped_count")
+    op.drop_column("mass_send_jobs", "uploaded")
+    op.drop_column("mass_send_jobs", "variables")
+    op.drop_column("mass_send_jobs", "template")
+    op.alter_column(
+        "mass_send_jobs", "message", existing_type=sa.Text(), nullable=False
+    )
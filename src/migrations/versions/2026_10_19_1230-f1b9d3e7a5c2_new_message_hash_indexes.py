@@ -0,0 +1,39 @@
+"""new: message hash indexes
+
+Revision ID: f1b9d3e7a5c2
+Revises: e7a3c5d9b1f4
+Create Date: 2026-10-19 12:30:52.318407
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f1b9d3e7a5c2"
+down_revision: Union[str, Sequence[str], None] = "e7a3c5d9b1f4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_notification_logs_message_hash",
+        "notification_logs",
+        ["message_hash"],
+    )
+    op.create_index(
+        "ix_notification_schedules_message_hash",
+        "notification_schedules",
+        ["message_hash"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_notification_schedules_message_hash", table_name="notification_schedules"
+    )
+    op.drop_index("ix_notification_logs_message_hash", table_name="notification_logs")
@@ -0,0 +1,36 @@
+"""new: outbox relayed_at
+
+Revision ID: a8c2e4f6b0d9
+Revises: f1b9d3e7a5c2
+Create Date: 2026-10-19 13:10:27.540913
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a8c2e4f6b0d9"
+down_revision: Union[str, Sequence[str], None] = "f1b9d3e7a5c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "notification_outbox",
+        sa.Column(
+            "relayed_at",
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment="Когда запись отдана брокеру; удаляется после публикации",
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("notification_outbox", "relayed_at")
@@ -1,10 +1,21 @@
-from src.models.notifications import NotificationLog, NotificationSchedule
+from src.models.notifications import (
+    MassSendJob,
+    MassSendRecipient,
+    MessageBody,
+    NotificationLog,
+    NotificationOutbox,
+    NotificationSchedule,
+)
 from src.models.users import UserContactChannel, User
 from src.models.templates import Template, Category
 
 
 __all__ = [
+    "MassSendJob",
+    "MassSendRecipient",
+    "MessageBody",
     "NotificationLog",
+    "NotificationOutbox",
     "NotificationSchedule",
     "UserContactChannel",
     "User",
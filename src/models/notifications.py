@@ -2,32 +2,66 @@ import typing
 from datetime import datetime
 
 from sqlalchemy import (
+    Boolean,
     CheckConstraint,
     DateTime,
     ForeignKey,
     Index,
     Integer,
+    LargeBinary,
     String,
     Text,
     UniqueConstraint,
     func,
+    select,
 )
-from sqlalchemy.dialects.postgresql import ENUM
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.dialects.postgresql import ENUM, JSONB
+from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
 
-from src.utils.enums import NotificationStatus, ContactChannelType, ScheduleType
+from src.utils.enums import (
+    BroadcastAudience,
+    NotificationStatus,
+    ContactChannelType,
+    MassSendJobStatus,
+    MisfirePolicy,
+    ScheduleType,
+)
 from src.models.base import Base
 
 if typing.TYPE_CHECKING:
     from src.models.users import UserContactChannel
 
 
+class MessageBody(Base):
+    hash: Mapped[bytes] = mapped_column(
+        LargeBinary(32), unique=True, comment="SHA-256 от текста сообщения"
+    )
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now(), server_default=func.now()
+    )
+
+    __tablename__ = "message_bodies"
+    __table_args__ = (
+        CheckConstraint(
+            "hash = sha256(convert_to(body, 'UTF8'))", name="hash_matches_body"
+        ),
+    )
+
+
 class NotificationLog(Base):
     sender_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", onupdate="cascade", ondelete="cascade")
     )
     contact_data: Mapped[str]
-    message: Mapped[str] = mapped_column(Text, nullable=False)
+    message_hash: Mapped[bytes] = mapped_column(
+        ForeignKey("message_bodies.hash", onupdate="restrict", ondelete="restrict")
+    )
+    message: Mapped[str] = column_property(
+        select(MessageBody.body)
+        .where(MessageBody.hash == message_hash)
+        .scalar_subquery()
+    )
     provider_name: Mapped[ContactChannelType] = mapped_column(
         ENUM(ContactChannelType), nullable=False
     )
@@ -43,6 +77,10 @@ class NotificationLog(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=func.now(), server_default=func.now()
     )
+    job_id: Mapped[int | None] = mapped_column(
+        ForeignKey("mass_send_jobs.id", onupdate="cascade", ondelete="set null"),
+        nullable=True,
+    )
 
     __tablename__ = "notification_logs"
     __table_args__ = (
@@ -50,18 +88,143 @@ class NotificationLog(Base):
             "unique_pending_notifications",
             "sender_id",
             "contact_data",
-            "message",
+            "message_hash",
             "provider_name",
             unique=True,
             postgresql_where="status = 'PENDING'",
         ),
+        Index(
+            "ix_notification_logs_job_status",
+            "job_id",
+            "status",
+            postgresql_where="job_id IS NOT NULL",
+        ),
+        Index("ix_notification_logs_message_hash", "message_hash"),
+    )
+
+
+class MassSendJob(Base):
+    sender_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", onupdate="cascade", ondelete="cascade")
+    )
+    message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    template: Mapped[str | None] = mapped_column(
+        Text,
+        nullable=True,
+        comment="Текст шаблона персональной рассылки, отрисовывается воркером",
+    )
+    variables: Mapped[dict[str, str] | None] = mapped_column(JSONB, nullable=True)
+    uploaded: Mapped[bool] = mapped_column(
+        Boolean,
+        default=False,
+        server_default="false",
+        nullable=False,
+        comment="Получатели загружены файлом в mass_send_recipients",
+    )
+    audience: Mapped[BroadcastAudience] = mapped_column(String(20), nullable=False)
+    status: Mapped[MassSendJobStatus] = mapped_column(
+        String(20),
+        nullable=False,
+        default=MassSendJobStatus.QUEUED,
+        server_default=MassSendJobStatus.QUEUED.value,
+    )
+    cursor: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default="0",
+        nullable=False,
+        comment="Последний обработанный id канала, пользователя или получателя",
+    )
+    queued_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    skipped_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="До этого времени задачу обрабатывает захвативший её воркер",
+    )
+    error: Mapped[str | None] = mapped_column(String(), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now(), server_default=func.now()
+    )
+    started_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    __tablename__ = "mass_send_jobs"
+    __table_args__ = (
+        Index(
+            "ix_mass_send_jobs_active",
+            "id",
+            postgresql_where="status IN ('QUEUED', 'RUNNING')",
+        ),
+        CheckConstraint(
+            "(message IS NULL) <> (template IS NULL)", name="message_or_template"
+        ),
+    )
+
+
+class MassSendRecipient(Base):
+    job_id: Mapped[int] = mapped_column(
+        ForeignKey("mass_send_jobs.id", onupdate="cascade", ondelete="cascade")
+    )
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    variables: Mapped[dict[str, str]] = mapped_column(JSONB, nullable=False)
+
+    __tablename__ = "mass_send_recipients"
+    __table_args__ = (Index("ix_mass_send_recipients_job_id", "job_id", "id"),)
+
+
+class NotificationOutbox(Base):
+    log_id: Mapped[int] = mapped_column(
+        ForeignKey("notification_logs.id", onupdate="cascade", ondelete="cascade"),
+        unique=True,
+    )
+    provider_name: Mapped[ContactChannelType] = mapped_column(
+        ENUM(ContactChannelType), nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now(), server_default=func.now()
+    )
+    relayed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        comment="Когда запись отдана брокеру; удаляется после публикации",
     )
 
+    __tablename__ = "notification_outbox"
+
 
 class NotificationSchedule(Base):
-    message: Mapped[str] = mapped_column(Text, nullable=False)
-    channel_id: Mapped[int] = mapped_column(
-        ForeignKey("user_contact_channels.id", onupdate="restrict", ondelete="restrict")
+    message_hash: Mapped[bytes] = mapped_column(
+        ForeignKey("message_bodies.hash", onupdate="restrict", ondelete="restrict")
+    )
+    message: Mapped[str] = column_property(
+        select(MessageBody.body)
+        .where(MessageBody.hash == message_hash)
+        .scalar_subquery()
+    )
+    channel_id: Mapped[int | None] = mapped_column(
+        ForeignKey(
+            "user_contact_channels.id", onupdate="restrict", ondelete="restrict"
+        ),
+        nullable=True,
+    )
+    sender_id: Mapped[int | None] = mapped_column(
+        ForeignKey("users.id", onupdate="cascade", ondelete="cascade"), nullable=True
+    )
+    audience: Mapped[BroadcastAudience | None] = mapped_column(
+        String(20),
+        nullable=True,
+        comment="Получатели рассылки, раскрываются в момент отправки",
     )
     schedule_type: Mapped[ScheduleType] = mapped_column(
         String(20), nullable=False, default=ScheduleType.ONCE
@@ -74,6 +237,12 @@ class NotificationSchedule(Base):
         nullable=True,
         comment="Cron выражение: минута час день месяц день_недели",
     )
+    misfire_policy: Mapped[MisfirePolicy] = mapped_column(
+        String(20),
+        nullable=False,
+        default=MisfirePolicy.FIRE_ONCE,
+        server_default=MisfirePolicy.FIRE_ONCE.value,
+    )
     max_executions: Mapped[int] = mapped_column(
         Integer, default=0, nullable=False, comment="Максимальное количество выполнений"
     )
@@ -94,7 +263,7 @@ class NotificationSchedule(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=func.now(), onupdate=func.now()
     )
-    channel: Mapped["UserContactChannel"] = relationship(
+    channel: Mapped["UserContactChannel | None"] = relationship(
         "UserContactChannel", back_populates="schedules"
     )
 
@@ -103,12 +272,35 @@ class NotificationSchedule(Base):
     __table_args__ = (
         UniqueConstraint(
             "channel_id",
-            "message",
+            "message_hash",
             "schedule_type",
             "crontab",
             "max_executions",
             name="unique_schedules",
         ),
+        Index(
+            "unique_broadcast_schedules",
+            "sender_id",
+            "audience",
+            "message_hash",
+            "schedule_type",
+            "crontab",
+            "max_executions",
+            unique=True,
+            postgresql_where="channel_id IS NULL",
+        ),
+        Index(
+            "ix_notification_schedules_due",
+            "next_execution_at",
+            postgresql_include=["channel_id"],
+            postgresql_where="next_execution_at IS NOT NULL",
+        ),
+        Index(
+            "ix_notification_schedules_channel_next_execution",
+            "channel_id",
+            "next_execution_at",
+        ),
+        Index("ix_notification_schedules_message_hash", "message_hash"),
         CheckConstraint(
             "(max_executions >= 0) AND (current_executions <= max_executions) AND (current_executions >= 0)",
             name="valid_execution_count",
@@ -121,4 +313,8 @@ class NotificationSchedule(Base):
             "(schedule_type = 'RECURRING' AND crontab IS NOT NULL) OR schedule_type != 'RECURRING'",
             name="recurring_requires_cron",
         ),
+        CheckConstraint(
+            "(channel_id IS NOT NULL AND audience IS NULL) OR (channel_id IS NULL AND audience IS NOT NULL AND sender_id IS NOT NULL)",
+            name="channel_or_audience",
+        ),
     )
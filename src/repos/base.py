@@ -1,8 +1,12 @@
-from typing import Any, Generic, Sequence, TypeVar
+import zlib
+from enum import Enum
+from itertools import chain
+from typing import Any, Generic, Iterable, Sequence, TypeVar
 
 from asyncpg import UniqueViolationError
 from asyncpg.exceptions import DataError
-from sqlalchemy import delete, insert, select, update
+from sqlalchemy import TableClause, column, delete, insert, select, table, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import DBAPIError, IntegrityError, NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -71,6 +75,51 @@ class BaseRepository(Generic[ModelType, SchemaType]):
         add_obj_stmt = insert(self.model).values([item.model_dump() for item in data])
         await self.session.execute(add_obj_stmt)
 
+    async def copy_to_staging(self, rows: Iterable[dict]) -> TableClause | None:
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return None
+
+        columns = sorted(first)
+        tablename = self.model.__tablename__
+        signature = zlib.crc32(",".join(columns).encode())
+        staging_name = f"staging_{tablename}_{signature:08x}"
+        definitions = ", ".join(
+            name if name in self.model.__table__.c else f"NULL::text AS {name}"
+            for name in columns
+        )
+        await self.session.execute(
+            text(
+                f"CREATE TEMP TABLE IF NOT EXISTS {staging_name} "
+                f"ON COMMIT DELETE ROWS AS SELECT {definitions} "
+                f"FROM {tablename} WITH NO DATA"
+            )
+        )
+        await self.session.execute(text(f"TRUNCATE {staging_name}"))
+
+        records = (
+            tuple(
+                value.value if isinstance(value, Enum) else value
+                for value in (row[name] for name in columns)
+            )
+            for row in chain((first,), rows)
+        )
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(  # type: ignore
+            staging_name, records=records, columns=columns
+        )
+        return table(staging_name, *(column(name) for name in columns))
+
+    def insert_from_staging(self, staging: TableClause, *filter):
+        columns = [
+            staged for staged in staging.c if staged.name in self.model.__table__.c
+        ]
+        return pg_insert(self.model).from_select(
+            [staged.name for staged in columns], select(*columns).filter(*filter)
+        )
+
     async def add(self, data: BaseDTO, **params):
         add_obj_stmt = (
             insert(self.model)
@@ -0,0 +1,91 @@
+import hashlib
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from sqlalchemy import CursorResult, TableClause, delete, exists, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from src.models.notifications import MessageBody, NotificationLog, NotificationSchedule
+from src.repos.base import BaseRepository
+from src.schemas.notifications import MessageBodyDTO
+
+
+# Writers hold it shared until commit and the cleanup takes it exclusively, so
+# a body is never deleted while an uncommitted log or schedule is about to
+# reference it.
+MESSAGE_BODIES_LOCK_KEY = 0x4E48_0003
+
+
+def message_hash(body: str) -> bytes:
+    return hashlib.sha256(body.encode("utf-8")).digest()
+
+
+def hash_messages(rows: Iterable[dict], bodies: dict[bytes, str]) -> Iterator[dict]:
+    for row in rows:
+        body = row.pop("message")
+        row["message_hash"] = digest = message_hash(body)
+        if digest in bodies:
+            row["message"] = None
+        else:
+            bodies[digest] = row["message"] = body
+        yield row
+
+
+class MessageBodyRepository(BaseRepository):
+    model = MessageBody
+    schema = MessageBodyDTO
+
+    async def _lock_for_write(self) -> None:
+        await self.session.execute(
+            select(func.pg_advisory_xact_lock_shared(MESSAGE_BODIES_LOCK_KEY))
+        )
+
+    async def store(self, bodies: dict[bytes, str]) -> None:
+        if not bodies:
+            return
+        await self._lock_for_write()
+        add_obj_stmt = pg_insert(self.model).values(
+            [{"hash": digest, "body": body} for digest, body in bodies.items()]
+        )
+        await self.session.execute(
+            add_obj_stmt.on_conflict_do_nothing(index_elements=["hash"])
+        )
+
+    async def replace_with_hashes(
+        self, rows: Iterable[dict]
+    ) -> tuple[list[dict], dict[bytes, str]]:
+        bodies: dict[bytes, str] = {}
+        hashed = list(hash_messages(rows, bodies))
+        for row in hashed:
+            del row["message"]
+        await self.store(bodies)
+        return hashed, bodies
+
+    async def store_staged(self, staging: TableClause) -> None:
+        await self._lock_for_write()
+        add_obj_stmt = pg_insert(self.model).from_select(
+            ["hash", "body"],
+            select(staging.c.message_hash, staging.c.message).filter(
+                staging.c.message.is_not(None)
+            ),
+        )
+        await self.session.execute(
+            add_obj_stmt.on_conflict_do_nothing(index_elements=["hash"])
+        )
+
+    async def delete_orphans(self, created_before: datetime, limit: int) -> int:
+        await self.session.execute(
+            select(func.pg_advisory_xact_lock(MESSAGE_BODIES_LOCK_KEY))
+        )
+        orphans = (
+            select(self.model.hash)
+            .filter(
+                self.model.created_at < created_before,
+                ~exists().where(NotificationLog.message_hash == self.model.hash),
+                ~exists().where(NotificationSchedule.message_hash == self.model.hash),
+            )
+            .limit(limit)
+        )
+        delete_stmt = delete(self.model).filter(self.model.hash.in_(orphans))
+        result: CursorResult = await self.session.execute(delete_stmt)
+        return result.rowcount
@@ -1,11 +1,12 @@
-from typing import Sequence
+from typing import AsyncIterator, Sequence
 from sqlalchemy import select
 from sqlalchemy.exc import DBAPIError
 from asyncpg import DataError
 
 from src.repos.base import BaseRepository
-from src.schemas.channels import ChannelDTO
+from src.schemas.channels import ChannelDTO, ChannelWithUserDTO
 from src.models.users import UserContactChannel
+from src.utils.enums import BroadcastAudience, ContactChannelType
 from src.utils.exceptions import ValueOutOfRangeError
 
 
@@ -32,3 +33,46 @@ class ChannelRepository(BaseRepository):
             raise exc
         channels = result.scalars().all()
         return channels
+
+    async def get_audience_chunk(
+        self, audience: BroadcastAudience, after_id: int, limit: int
+    ) -> list[ChannelWithUserDTO]:
+        query = (
+            select(
+                self.model.id,
+                self.model.user_id,
+                self.model.contact_value,
+                self.model.channel_type,
+            )
+            .filter(self.model.id > after_id)
+            .order_by(self.model.id.asc())
+            .limit(limit)
+        )
+        if audience != BroadcastAudience.ALL:
+            query = query.filter(
+                self.model.channel_type == ContactChannelType(audience.value)
+            )
+        result = await self.session.execute(query)
+        return [ChannelWithUserDTO.model_validate(row) for row in result.all()]
+
+    async def iter_audience_chunks(
+        self, audience: BroadcastAudience, after_id: int, limit: int
+    ) -> AsyncIterator[list[ChannelWithUserDTO]]:
+        while channels := await self.get_audience_chunk(
+            audience, after_id=after_id, limit=limit
+        ):
+            yield channels
+            after_id = channels[-1].id
+
+    async def get_by_users(
+        self, user_ids: Sequence[int], audience: BroadcastAudience
+    ) -> list[ChannelWithUserDTO]:
+        query = select(self.model).filter(self.model.user_id.in_(user_ids))
+        if audience != BroadcastAudience.ALL:
+            query = query.filter(
+                self.model.channel_type == ContactChannelType(audience.value)
+            )
+        result = await self.session.execute(query)
+        return [
+            ChannelWithUserDTO.model_validate(obj) for obj in result.scalars().all()
+        ]
@@ -0,0 +1,142 @@
+from datetime import datetime
+
+from sqlalchemy import delete, func, or_, select, update
+
+from src.models.notifications import MassSendJob, MassSendRecipient, NotificationLog
+from src.repos.base import BaseRepository
+from src.schemas.notifications import MassSendJobDTO, MassSendRecipientDTO
+from src.utils.enums import MassSendJobStatus, NotificationStatus
+
+
+ACTIVE_STATUSES = (MassSendJobStatus.QUEUED, MassSendJobStatus.RUNNING)
+
+
+class MassSendJobRepository(BaseRepository):
+    model = MassSendJob
+    schema = MassSendJobDTO
+
+    async def claim(
+        self, now: datetime, lease_until: datetime
+    ) -> MassSendJobDTO | None:
+        claimable = (
+            select(self.model.id)
+            .filter(
+                self.model.status.in_(ACTIVE_STATUSES),
+                or_(
+                    self.model.lease_expires_at.is_(None),
+                    self.model.lease_expires_at < now,
+                ),
+            )
+            .order_by(self.model.id.asc())
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        claim_stmt = (
+            update(self.model)
+            .filter(self.model.id == claimable)
+            .values(
+                status=MassSendJobStatus.RUNNING,
+                attempts=self.model.attempts + 1,
+                started_at=func.coalesce(self.model.started_at, now),
+                lease_expires_at=lease_until,
+            )
+            .returning(self.model)
+        )
+        result = await self.session.execute(claim_stmt)
+        obj = result.scalars().one_or_none()
+        return None if obj is None else self.schema.model_validate(obj)
+
+    async def advance(
+        self,
+        job_id: int,
+        after_id: int,
+        cursor: int,
+        queued: int,
+        lease_until: datetime,
+        skipped: int = 0,
+    ) -> bool:
+        advance_stmt = (
+            update(self.model)
+            .filter(self.model.id == job_id, self.model.cursor == after_id)
+            .values(
+                cursor=cursor,
+                queued_count=self.model.queued_count + queued,
+                skipped_count=self.model.skipped_count + skipped,
+                lease_expires_at=lease_until,
+            )
+        )
+        result = await self.session.execute(advance_stmt)
+        return result.rowcount == 1  # type: ignore
+
+    async def add_skipped(self, job_id: int, skipped: int) -> None:
+        skipped_stmt = (
+            update(self.model)
+            .filter(self.model.id == job_id)
+            .values(skipped_count=self.model.skipped_count + skipped)
+        )
+        await self.session.execute(skipped_stmt)
+
+    async def finish(
+        self,
+        job_id: int,
+        status: MassSendJobStatus,
+        now: datetime,
+        error: str | None = None,
+    ) -> None:
+        finish_stmt = (
+            update(self.model)
+            .filter(self.model.id == job_id)
+            .values(status=status, finished_at=now, lease_expires_at=None, error=error)
+        )
+        await self.session.execute(finish_stmt)
+        await self.session.execute(
+            delete(MassSendRecipient).filter(MassSendRecipient.job_id == job_id)
+        )
+
+    async def release(self, job_id: int, retry_at: datetime, error: str) -> None:
+        release_stmt = (
+            update(self.model)
+            .filter(self.model.id == job_id)
+            .values(lease_expires_at=retry_at, error=error)
+        )
+        await self.session.execute(release_stmt)
+
+    async def count_logs_by_status(
+        self, job_id: int
+    ) -> tuple[dict[NotificationStatus, int], datetime | None]:
+        query = (
+            select(
+                NotificationLog.status,
+                func.count(),
+                func.max(NotificationLog.delivered_at),
+            )
+            .filter(NotificationLog.job_id == job_id)
+            .group_by(NotificationLog.status)
+        )
+        result = await self.session.execute(query)
+        counts, last_delivered_at = {}, None
+        for status, count, delivered_at in result.all():
+            counts[status] = count
+            if delivered_at and (
+                last_delivered_at is None or delivered_at > last_delivered_at
+            ):
+                last_delivered_at = delivered_at
+        return counts, last_delivered_at
+
+
+class MassSendRecipientRepository(BaseRepository):
+    model = MassSendRecipient
+    schema = MassSendRecipientDTO
+
+    async def get_chunk(
+        self, job_id: int, after_id: int, limit: int
+    ) -> list[MassSendRecipientDTO]:
+        query = (
+            select(self.model)
+            .filter(self.model.job_id == job_id, self.model.id > after_id)
+            .order_by(self.model.id.asc())
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return [self.schema.model_validate(obj) for obj in result.scalars().all()]
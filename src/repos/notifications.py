@@ -1,15 +1,28 @@
 from datetime import datetime
-from typing import Sequence
+from typing import Iterable, Sequence
 
-from sqlalchemy import desc, func, select, text, update, insert
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    String,
+    column,
+    desc,
+    func,
+    select,
+    text,
+    update,
+    values,
+)
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import DBAPIError
 from asyncpg import DataError
 
 from src.schemas.base import BaseDTO
 from src.repos.base import BaseRepository
-from src.schemas.notifications import AddLogDTO, LogDTO
+from src.repos.bodies import MessageBodyRepository, hash_messages
+from src.schemas.notifications import LogDTO, LogResultDTO, PendingLogDTO
 from src.models.notifications import NotificationLog
+from src.settings import settings
 from src.utils.enums import NotificationStatus
 from src.utils.exceptions import ValueOutOfRangeError
 
@@ -25,32 +38,34 @@ class NotificationLogRepository(BaseRepository):
         result = await self.session.execute(query)
         return [self.schema.model_validate(obj) for obj in result.scalars().all()]
 
-    async def add_or_edit(self, data: AddLogDTO, **params) -> int:
-        query = select(self.model).filter_by(
-            **data.model_dump(exclude={"status", "details"}),
-            status=NotificationStatus.PENDING.value,
+    async def get_pending_by_ids(self, ids: Sequence[int]) -> list[PendingLogDTO]:
+        query = select(self.model).filter(
+            self.model.id.in_(ids),
+            self.model.status == NotificationStatus.PENDING,
         )
-
         result = await self.session.execute(query)
-        obj = result.scalar_one_or_none()
-        notification_id = obj.id if obj else None
-
-        if notification_id is None:
-            add_obj_stmt = (
-                insert(self.model)
-                .values(**data.model_dump(), **params)
-                .returning(self.model.id)
-            )
-            result = await self.session.execute(add_obj_stmt)
-            notification_id = result.scalars().one()
-        else:
-            upd = (
-                update(self.model)
-                .where(self.model.id == notification_id)
-                .values(status=data.status, details=data.details, **params)
+        return [PendingLogDTO.model_validate(obj) for obj in result.scalars().all()]
+
+    async def update_results_bulk(self, data: Sequence[LogResultDTO]) -> None:
+        results = values(
+            column("id", Integer),
+            column("status", self.model.__table__.c.status.type),
+            column("details", String),
+            column("delivered_at", DateTime(timezone=True)),
+            name="results",
+        ).data(
+            [(item.id, item.status, item.details, item.delivered_at) for item in data]
+        )
+        update_stmt = (
+            update(self.model)
+            .where(self.model.id == results.c.id)
+            .values(
+                status=results.c.status,
+                details=results.c.details,
+                delivered_at=results.c.delivered_at,
             )
-            await self.session.execute(upd)
-        return notification_id
+        )
+        await self.session.execute(update_stmt)
 
     async def get_history_with_pagination(
         self,
@@ -95,20 +110,45 @@ class NotificationLogRepository(BaseRepository):
         logs: list[LogDTO] = [self.schema.model_validate(row[0]) for row in rows]
         return total_count, logs
 
-    async def add_bulk(self, data: Sequence[BaseDTO]) -> Sequence[int]:
-        add_obj_stmt = pg_insert(self.model).values(
-            [item.model_dump() for item in data]
-        )
+    async def _insert_skipping_pending(
+        self, add_obj_stmt, bodies: dict[bytes, str]
+    ) -> list[LogDTO]:
         add_obj_stmt = add_obj_stmt.on_conflict_do_nothing(
             index_elements=[
                 "sender_id",
                 "contact_data",
-                "message",
+                "message_hash",
                 "provider_name",
             ],
             index_where=text("status = 'PENDING'"),
         )
-        add_obj_stmt = add_obj_stmt.returning(self.model.id)
+        add_obj_stmt = add_obj_stmt.returning(*self.model.__table__.c)
         result = await self.session.execute(add_obj_stmt)
-        objs = result.scalars().all()
-        return objs
+        return [
+            self.schema.model_validate(
+                {**row._mapping, "message": bodies[row.message_hash]}
+            )
+            for row in result.all()
+        ]
+
+    async def add_bulk(self, data: Sequence[BaseDTO]) -> list[LogDTO]:
+        if len(data) >= settings.COPY_BULK_THRESHOLD:
+            return await self.copy_bulk(data)
+        rows, bodies = await MessageBodyRepository(self.session).replace_with_hashes(
+            item.model_dump() for item in data
+        )
+        return await self._insert_skipping_pending(
+            pg_insert(self.model).values(rows), bodies
+        )
+
+    async def copy_bulk(self, data: Iterable[BaseDTO]) -> list[LogDTO]:
+        bodies: dict[bytes, str] = {}
+        staging = await self.copy_to_staging(
+            hash_messages((item.model_dump() for item in data), bodies)
+        )
+        if staging is None:
+            return []
+        await MessageBodyRepository(self.session).store_staged(staging)
+        return await self._insert_skipping_pending(
+            self.insert_from_staging(staging), bodies
+        )
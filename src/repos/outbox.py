@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import delete, or_, select, update
+
+from src.repos.base import BaseRepository
+from src.schemas.notifications import AddOutboxDTO, LogDTO, OutboxDTO
+from src.models.notifications import NotificationOutbox
+
+
+class OutboxRepository(BaseRepository):
+    model = NotificationOutbox
+    schema = OutboxDTO
+
+    async def add_for_logs(self, logs: Sequence[LogDTO]) -> None:
+        if not logs:
+            return
+        await self.add_bulk(
+            [
+                AddOutboxDTO(log_id=log.id, provider_name=log.provider_name)
+                for log in logs
+            ]
+        )
+
+    async def claim_batch(
+        self, limit: int, now: datetime, expired_before: datetime
+    ) -> list[OutboxDTO]:
+        # Rows marked relayed before expired_before belong to a relay that died
+        # between marking and deleting them, so they are published again.
+        claimable = (
+            select(self.model.id)
+            .filter(
+                or_(
+                    self.model.relayed_at.is_(None),
+                    self.model.relayed_at < expired_before,
+                )
+            )
+            .order_by(self.model.id.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        claim_stmt = (
+            update(self.model)
+            .filter(self.model.id.in_(claimable.scalar_subquery()))
+            .values(relayed_at=now)
+            .returning(self.model)
+        )
+        result = await self.session.execute(claim_stmt)
+        return [self.schema.model_validate(obj) for obj in result.scalars().all()]
+
+    async def release(self, ids: Sequence[int]) -> None:
+        release_stmt = (
+            update(self.model).filter(self.model.id.in_(ids)).values(relayed_at=None)
+        )
+        await self.session.execute(release_stmt)
+
+    async def delete_by_ids(self, ids: Sequence[int]) -> None:
+        delete_stmt = delete(self.model).filter(self.model.id.in_(ids))
+        await self.session.execute(delete_stmt)
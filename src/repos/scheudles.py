@@ -1,61 +1,296 @@
 from datetime import datetime, timezone
-from typing import Sequence
+from typing import Iterable, Sequence
 
-from sqlalchemy import CursorResult, delete, desc, func, select
+from sqlalchemy import (
+    CursorResult,
+    DateTime,
+    Integer,
+    Row,
+    and_,
+    column,
+    delete,
+    desc,
+    func,
+    or_,
+    select,
+    text,
+    update,
+    values,
+)
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import joinedload
 from asyncpg import DataError
 
-from src.schemas.base import BaseDTO
 from src.repos.base import BaseRepository
-from src.schemas.notifications import ScheduleDTO, ScheduleWithChannelsDTO
+from src.repos.bodies import MessageBodyRepository, hash_messages
+from src.schemas.notifications import (
+    AddScheduleDTO,
+    AdvanceScheduleDTO,
+    ScheduleDTO,
+    ScheduleWithChannelsDTO,
+)
 from src.models.notifications import NotificationSchedule
 from src.models.users import UserContactChannel
+from src.settings import settings
 from src.utils.exceptions import ObjectNotFoundError, ValueOutOfRangeError
+from src.utils.schedule_index import IndexUpserts, schedule_index
+
+
+SCHEDULES_NOTIFY_CHANNEL = "notification_schedules"
+BROADCAST_UNIQUE_COLUMNS = [
+    "sender_id",
+    "audience",
+    "message_hash",
+    "schedule_type",
+    "crontab",
+    "max_executions",
+]
 
 
 class ScheduleRepository(BaseRepository):
     schema = ScheduleDTO
     model = NotificationSchedule
 
-    async def add_bulk(self, data: Sequence[BaseDTO]):
-        add_obj_stmt = pg_insert(self.model).values(
-            [item.model_dump() for item in data]
-        )
+    def __init__(self, session):
+        super().__init__(session)
+        self._index_upserts: IndexUpserts = {}
+        self._index_removals: set[int] = set()
+
+    def _track_index_changes(
+        self,
+        upserts: IndexUpserts | None = None,
+        removals: Sequence[int] = (),
+    ) -> None:
+        if not schedule_index.enabled:
+            return
+        for schedule_id, entry in (upserts or {}).items():
+            self._index_removals.discard(schedule_id)
+            self._index_upserts[schedule_id] = entry
+        for schedule_id in removals:
+            self._index_upserts.pop(schedule_id, None)
+            self._index_removals.add(schedule_id)
+
+    async def sync_index(self) -> None:
+        if not self._index_upserts and not self._index_removals:
+            return
+        upserts, removals = self._index_upserts, self._index_removals
+        self.discard_index_changes()
+        await schedule_index.safe_apply(upserts, removals)
+
+    def discard_index_changes(self) -> None:
+        self._index_upserts, self._index_removals = {}, set()
+
+    async def _upsert(self, add_obj_stmt, broadcast: bool = False) -> list[Row]:
+        if broadcast:
+            conflict_target = {
+                "index_elements": BROADCAST_UNIQUE_COLUMNS,
+                "index_where": text("channel_id IS NULL"),
+            }
+        else:
+            conflict_target = {"constraint": "unique_schedules"}
+
         excluded = add_obj_stmt.excluded
         add_obj_stmt = add_obj_stmt.on_conflict_do_update(
-            constraint="unique_schedules",
+            **conflict_target,
             set_={
                 "updated_at": func.now(),
+                "misfire_policy": excluded.misfire_policy,
                 "next_execution_at": func.GREATEST(
                     excluded.next_execution_at,
                     NotificationSchedule.next_execution_at,
                 ),
             },
         )
-        add_obj_stmt = add_obj_stmt.returning(self.model.id)
+        add_obj_stmt = add_obj_stmt.returning(
+            self.model.id, self.model.channel_id, self.model.next_execution_at
+        )
         result = await self.session.execute(add_obj_stmt)
-        return result.scalars().all()
+        rows = result.all()
+        self._track_index_changes(
+            upserts={row.id: (row.channel_id, row.next_execution_at) for row in rows}
+        )
+        return rows
+
+    async def add_bulk(self, data: Sequence[AddScheduleDTO]):
+        if len(data) >= settings.COPY_BULK_THRESHOLD:
+            return await self.copy_bulk(data)
+        hashed, _ = await MessageBodyRepository(self.session).replace_with_hashes(
+            item.model_dump() for item in data
+        )
+        rows = []
+        for broadcast in (False, True):
+            batch = [row for row in hashed if (row["channel_id"] is None) == broadcast]
+            if batch:
+                rows += await self._upsert(
+                    pg_insert(self.model).values(batch), broadcast
+                )
+        ids = [row.id for row in rows]
+
+        next_times = [item.next_execution_at for item in data if item.next_execution_at]
+        if next_times:
+            await self.notify_next_execution(min(next_times))
+        return ids
+
+    async def copy_bulk(self, data: Iterable[AddScheduleDTO]) -> list[int]:
+        staging = await self.copy_to_staging(
+            hash_messages((item.model_dump() for item in data), {})
+        )
+        if staging is None:
+            return []
+        await MessageBodyRepository(self.session).store_staged(staging)
+        rows = [
+            *await self._upsert(
+                self.insert_from_staging(staging, staging.c.channel_id.is_not(None))
+            ),
+            *await self._upsert(
+                self.insert_from_staging(staging, staging.c.channel_id.is_(None)),
+                broadcast=True,
+            ),
+        ]
+
+        next_times = [row.next_execution_at for row in rows if row.next_execution_at]
+        if next_times:
+            await self.notify_next_execution(min(next_times))
+        return [row.id for row in rows]
+
+    async def notify_next_execution(self, next_execution_at: datetime) -> None:
+        if next_execution_at.tzinfo is None:
+            next_execution_at = next_execution_at.replace(tzinfo=timezone.utc)
+        notify_stmt = select(
+            func.pg_notify(SCHEDULES_NOTIFY_CHANNEL, next_execution_at.isoformat())
+        )
+        await self.session.execute(notify_stmt)
+
+    async def get_upcoming_execution_times(self, *filter, limit: int) -> list[datetime]:
+        query = (
+            select(self.model.next_execution_at)
+            .filter(self.model.next_execution_at.is_not(None), *filter)
+            .order_by(self.model.next_execution_at.asc())
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def count_overdue(self, *filter, before: datetime) -> int:
+        query = (
+            select(func.count())
+            .select_from(self.model)
+            .filter(self.model.next_execution_at < before, *filter)
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one()
+
+    async def get_execution_times_chunk(
+        self, after_id: int, limit: int
+    ) -> list[tuple[int, int | None, datetime]]:
+        query = (
+            select(self.model.id, self.model.channel_id, self.model.next_execution_at)
+            .filter(
+                self.model.id > after_id,
+                self.model.next_execution_at.is_not(None),
+            )
+            .order_by(self.model.id.asc())
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return [(row.id, row.channel_id, row.next_execution_at) for row in result.all()]
+
+    async def resync_index(self, ids: Sequence[int]) -> None:
+        query = select(
+            self.model.id, self.model.channel_id, self.model.next_execution_at
+        ).filter(self.model.id.in_(ids))
+        result = await self.session.execute(query)
+        existing: IndexUpserts = {
+            row.id: (row.channel_id, row.next_execution_at) for row in result.all()
+        }
+        self._track_index_changes(
+            upserts=existing,
+            removals=[
+                schedule_id for schedule_id in ids if schedule_id not in existing
+            ],
+        )
 
     async def get_current_schedules_to_perform(
-        self, *filter, **filter_by
+        self,
+        *filter,
+        now: datetime | None = None,
+        after_id: int = 0,
+        limit: int | None = None,
+        skip_locked: bool = False,
+        **filter_by,
     ) -> list[ScheduleWithChannelsDTO]:
         query = (
             select(self.model)
             .filter(
-                NotificationSchedule.next_execution_at <= datetime.now(timezone.utc),
+                NotificationSchedule.next_execution_at
+                <= (now or datetime.now(timezone.utc)),
+                NotificationSchedule.id > after_id,
                 *filter,
             )
             .filter_by(**filter_by)
             .options(joinedload(NotificationSchedule.channel))
+            .order_by(NotificationSchedule.id.asc())
+            .limit(limit)
         )
+        if skip_locked:
+            query = query.with_for_update(of=NotificationSchedule, skip_locked=True)
         result = await self.session.execute(query)
         return [
             ScheduleWithChannelsDTO.model_validate(obj)
             for obj in result.scalars().all()
         ]
 
+    async def advance_bulk(self, data: Sequence[AdvanceScheduleDTO]) -> None:
+        advanced = values(
+            column("id", Integer),
+            column("current_executions", Integer),
+            column("last_executed_at", DateTime(timezone=True)),
+            column("next_execution_at", DateTime(timezone=True)),
+            name="advanced",
+        ).data(
+            [
+                (
+                    item.id,
+                    item.current_executions,
+                    item.last_executed_at,
+                    item.next_execution_at,
+                )
+                for item in data
+            ]
+        )
+        update_stmt = (
+            update(self.model)
+            .where(self.model.id == advanced.c.id)
+            .values(
+                current_executions=advanced.c.current_executions,
+                last_executed_at=advanced.c.last_executed_at,
+                next_execution_at=advanced.c.next_execution_at,
+                updated_at=func.now(),
+            )
+            .returning(self.model.id, self.model.channel_id)
+        )
+        result = await self.session.execute(update_stmt)
+        channels = dict(result.all())
+        self._track_index_changes(
+            upserts={
+                item.id: (channels[item.id], item.next_execution_at)
+                for item in data
+                if item.id in channels
+            }
+        )
+
+    async def delete_by_ids(self, ids: Sequence[int]) -> None:
+        delete_stmt = delete(self.model).filter(self.model.id.in_(ids))
+        await self.session.execute(delete_stmt)
+        self._track_index_changes(removals=ids)
+
+    def _owned_by(self, user_id: int):
+        return or_(
+            UserContactChannel.user_id == user_id,
+            and_(self.model.channel_id.is_(None), self.model.sender_id == user_id),
+        )
+
     async def get_all_nearest_with_pagination(
         self,
         limit: int,
@@ -70,7 +305,7 @@ class ScheduleRepository(BaseRepository):
             .outerjoin(
                 UserContactChannel, self.model.channel_id == UserContactChannel.id
             )  # type: ignore
-            .filter_by(user_id=user_id)
+            .filter(self._owned_by(user_id))
         )
         query = (
             select(self.model, query_total_count.scalar_subquery().label("total_count"))
@@ -78,7 +313,7 @@ class ScheduleRepository(BaseRepository):
             .outerjoin(
                 UserContactChannel, self.model.channel_id == UserContactChannel.id
             )  # type: ignore
-            .filter_by(user_id=user_id)
+            .filter(self._owned_by(user_id))
             .order_by(desc(self.model.next_execution_at))
         )
 
@@ -119,7 +354,12 @@ class ScheduleRepository(BaseRepository):
         )
         delete_obj_stmt = (
             delete(self.model)
-            .filter(self.model.channel_id.in_(select(query_channels_ids_by_user)))  # type: ignore
+            .filter(
+                or_(
+                    self.model.channel_id.in_(select(query_channels_ids_by_user)),  # type: ignore
+                    self.model.sender_id == user_id,
+                )
+            )
             .filter_by(id=schedule_id)
         )
 
@@ -132,3 +372,4 @@ class ScheduleRepository(BaseRepository):
 
         if result.rowcount == 0:
             raise ObjectNotFoundError
+        self._track_index_changes(removals=[schedule_id])
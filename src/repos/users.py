@@ -19,3 +19,13 @@ class UserRepository(BaseRepository):
         except NoResultFound:
             raise ObjectNotFoundError
         return UserWithPasswordDTO.model_validate(obj)
+
+    async def get_chunk(self, after_id: int, limit: int) -> list[UserDTO]:
+        query = (
+            select(self.model)
+            .filter(self.model.id > after_id)
+            .order_by(self.model.id.asc())
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return [self.schema.model_validate(obj) for obj in result.scalars().all()]
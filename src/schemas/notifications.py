@@ -1,12 +1,25 @@
 from datetime import datetime
 
-from croniter import croniter
 from pydantic import Field, FutureDatetime, model_validator
 
 from src.schemas.channels import ChannelWithUserDTO
 
 from src.schemas.base import BaseDTO
-from src.utils.enums import ContactChannelType, NotificationStatus, ScheduleType
+from src.utils.cron import is_valid_crontab
+from src.utils.enums import (
+    BroadcastAudience,
+    ContactChannelType,
+    MassSendJobStatus,
+    MisfirePolicy,
+    NotificationStatus,
+    ScheduleType,
+)
+
+
+class MessageBodyDTO(BaseDTO):
+    id: int
+    hash: bytes
+    body: str
 
 
 class RequestAddLogDTO(BaseDTO):
@@ -17,6 +30,22 @@ class RequestAddLogDTO(BaseDTO):
     provider_name: ContactChannelType
 
 
+class PendingLogDTO(RequestAddLogDTO):
+    id: int
+
+
+class DispatchLogDTO(BaseDTO):
+    id: int
+    provider_name: ContactChannelType
+
+
+class LogResultDTO(BaseDTO):
+    id: int
+    status: NotificationStatus
+    details: str | None = None
+    delivered_at: datetime
+
+
 class AddLogDTO(RequestAddLogDTO):
     details: str | None = None
 
@@ -26,11 +55,74 @@ class LogDTO(AddLogDTO):
     delivered_at: datetime | None
 
 
+class AddMassSendLogDTO(RequestAddLogDTO):
+    job_id: int
+
+
+class AddMassSendJobDTO(BaseDTO):
+    sender_id: int
+    message: str | None = None
+    template: str | None = None
+    variables: dict[str, str] | None = None
+    uploaded: bool = False
+    audience: BroadcastAudience
+
+
+class MassSendJobDTO(AddMassSendJobDTO):
+    id: int
+    status: MassSendJobStatus
+    cursor: int
+    queued_count: int
+    skipped_count: int
+    attempts: int
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+
+class MassSendJobProgressDTO(BaseDTO):
+    id: int
+    status: MassSendJobStatus
+    audience: BroadcastAudience
+    total: int
+    queued: int
+    sent: int
+    failed: int
+    skipped: int
+    throughput: float = Field(description="Обработано уведомлений в секунду")
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+
+class AddMassSendRecipientDTO(BaseDTO):
+    job_id: int
+    user_id: int
+    variables: dict[str, str]
+
+
+class MassSendRecipientDTO(AddMassSendRecipientDTO):
+    id: int
+
+
+class AddOutboxDTO(BaseDTO):
+    log_id: int
+    provider_name: ContactChannelType
+
+
+class OutboxDTO(AddOutboxDTO):
+    id: int
+    relayed_at: datetime | None = None
+
+
 class _ScheduleDTO(BaseDTO):
     schedule_type: ScheduleType = ScheduleType.ONCE
     scheduled_at: FutureDatetime | None = None
     crontab: str | None = None
     max_executions: int = Field(default=0, ge=0)
+    misfire_policy: MisfirePolicy = MisfirePolicy.FIRE_ONCE
 
     @model_validator(mode="after")
     def validate_schedule_fields(self) -> "_ScheduleDTO":
@@ -41,6 +133,10 @@ class _ScheduleDTO(BaseDTO):
                 )
             if self.crontab:
                 raise ValueError("crontab makes no sense for 'ONCE' notifications")
+            if self.misfire_policy != MisfirePolicy.FIRE_ONCE:
+                raise ValueError(
+                    "'misfire_policy' makes no sense for 'ONCE' notifications"
+                )
 
         elif self.schedule_type == ScheduleType.RECURRING:
             if self.max_executions < 0:
@@ -50,26 +146,35 @@ class _ScheduleDTO(BaseDTO):
             if not self.crontab:
                 raise ValueError("crontab is required for 'RECURRING' notifications")
 
-            if self.crontab:
-                try:
-                    croniter(self.crontab)
-                except ValueError:
-                    raise ValueError("Invalid crontab expression")
+            if self.crontab and not is_valid_crontab(self.crontab):
+                raise ValueError("Invalid crontab expression")
         return self
 
 
-class NotificationMassSendDTO(_ScheduleDTO):
+class _NotificationDTO(_ScheduleDTO):
     template_id: int
     variables: dict[str, str]
 
 
-class NotificationSendDTO(NotificationMassSendDTO):
+class NotificationMassSendDTO(_NotificationDTO):
+    audience: BroadcastAudience = BroadcastAudience.ALL
+
+
+class NotificationSendDTO(_NotificationDTO):
     channels_ids: list[int]
 
 
+class PersonalizedMassSendDTO(BaseDTO):
+    template_id: int
+    variables: dict[str, str] = Field(default_factory=dict)
+    audience: BroadcastAudience = BroadcastAudience.ALL
+
+
 class AddScheduleDTO(_ScheduleDTO):
     message: str
-    channel_id: int
+    channel_id: int | None = None
+    sender_id: int | None = None
+    audience: BroadcastAudience | None = None
     scheduled_at: datetime | None = None
     next_execution_at: datetime | None = None
 
@@ -88,5 +193,9 @@ class UpdateScheduleDTO(BaseDTO):
     current_executions: int
 
 
+class AdvanceScheduleDTO(UpdateScheduleDTO):
+    id: int
+
+
 class ScheduleWithChannelsDTO(ScheduleDTO):
-    channel: ChannelWithUserDTO
+    channel: ChannelWithUserDTO | None = None
@@ -1,23 +1,28 @@
 import logging
 from datetime import datetime, timezone
 from collections import defaultdict
+from typing import AsyncIterable
 
-from croniter import croniter
-from jinja2 import TemplateSyntaxError, meta
+from jinja2 import TemplateSyntaxError
 from pydantic import FutureDatetime
+from redis.exceptions import RedisError
 
 from src.schemas.channels import ChannelDTO
 from src.schemas.templates import TemplateDTO
 from src.services.base import BaseService
 from src.settings import settings
 from src.utils.enums import (
+    BroadcastAudience,
     NotificationStatus,
     ScheduleType,
     ContactChannelType,
     ContentType,
 )
-from src.tasks.extras import CELERY_TASKS
+from src.utils.cron import next_fire_time
 from src.utils.notification_helper import NotificationHelper
+from src.utils.scheduler_metrics import scheduler_metrics
+from src.utils.recipients import Recipient, chunked
+from src.utils.template_cache import CompiledTemplate, template_cache
 
 from src.schemas.notifications import (
     LogDTO,
@@ -26,15 +31,21 @@ from src.schemas.notifications import (
     NotificationSendDTO,
     AddScheduleDTO,
     ScheduleDTO,
+    AddMassSendJobDTO,
+    AddMassSendRecipientDTO,
+    MassSendJobDTO,
+    MassSendJobProgressDTO,
 )
 
 from src.utils.exceptions import (
     ChannelNotFoundError,
     ForbiddenHTMLTemplateError,
+    MassSendJobNotFoundError,
     NotificationExistsError,
     ScheduleNotFoundError,
     MissingTemplateVariablesError,
     ObjectNotFoundError,
+    SchedulerMetricsUnavailableError,
     TemplateNotFoundError,
     TemplateSyntaxCheckError,
 )
@@ -44,38 +55,38 @@ logger = logging.getLogger("src.services.notifications")
 
 
 class NotificationService(BaseService):
-    async def _validate_and_get_rendered_template(
-        self, template_id: int, template_variables: dict
-    ) -> str:
+    async def _get_template(self, template_id: int) -> TemplateDTO:
         try:
-            template: TemplateDTO = await self.db.templates.get_one(id=template_id)
+            return await self.db.templates.get_one(id=template_id)
         except ObjectNotFoundError as exc:
             raise TemplateNotFoundError from exc
 
-        parsed_data = settings.JINGA2_ENV.parse(template.content)
-        required_variables = meta.find_undeclared_variables(parsed_data)
-        provided_variables = set(template_variables.keys())
-        missing_variables = required_variables - provided_variables
+    def _compile_template(self, template: TemplateDTO) -> CompiledTemplate:
+        try:
+            return template_cache.get(
+                template_id=template.id,
+                updated_at=template.updated_at,
+                content=template.content,
+            )
+        except TemplateSyntaxError as exc:
+            raise TemplateSyntaxCheckError from exc
+
+    async def _validate_and_get_rendered_template(
+        self, template_id: int, template_variables: dict
+    ) -> str:
+        compiled = self._compile_template(await self._get_template(template_id))
+        missing_variables = compiled.variables - template_variables.keys()
 
         if missing_variables:
             undeclared_variables = ", ".join(sorted(missing_variables))
             raise MissingTemplateVariablesError(
                 detail=f"Отсутствуют переменная(ые): {undeclared_variables}"
             )
-        try:
-            return settings.JINGA2_ENV.from_string(template.content).render(
-                **template_variables
-            )
-        except TemplateSyntaxError as exc:
-            raise TemplateSyntaxCheckError from exc
+        return compiled.template.render(**template_variables)
 
     async def _validate_and_get_channels(
-        self, data: NotificationSendDTO | NotificationMassSendDTO, user_meta: dict
+        self, data: NotificationSendDTO, user_meta: dict
     ) -> list[ChannelDTO]:
-        if type(data) is NotificationMassSendDTO:
-            channels: list[ChannelDTO] = await self.db.channels.get_all()
-            return channels
-
         if not isinstance(data, NotificationSendDTO):
             raise ValueError("channels_ids attribute is required")
 
@@ -100,19 +111,17 @@ class NotificationService(BaseService):
 
         now = datetime.now(timezone.utc)
         if data.crontab:
-            cron = croniter(data.crontab, now)
-            return cron.get_next(datetime)
+            return next_fire_time(data.crontab, now)
 
         return None
 
     def _prepare_tasks(
         self, data, schedule, pendings, template_type, channels, msg, user_id
     ) -> None:
+        next_execution_at = self._calculate_next_execution_time(data)
         for channel in channels:
-            if (
-                (type(data) is not NotificationMassSendDTO)
-                and (channel.channel_type != ContactChannelType.EMAIL)
-                and (template_type == ContentType.HTML)
+            if (channel.channel_type != ContactChannelType.EMAIL) and (
+                template_type == ContentType.HTML
             ):
                 raise ForbiddenHTMLTemplateError(
                     detail=f"HTML-шаблон не поддерживается каналом: {channel.channel_type.value}"
@@ -139,7 +148,8 @@ class NotificationService(BaseService):
                 crontab=data.crontab,
                 scheduled_at=data.scheduled_at,
                 max_executions=data.max_executions,
-                next_execution_at=self._calculate_next_execution_time(data),
+                misfire_policy=data.misfire_policy,
+                next_execution_at=next_execution_at,
                 schedule_type=data.schedule_type,
             )
             schedule.append(scheduled_notification)
@@ -149,12 +159,92 @@ class NotificationService(BaseService):
                 scheduled_notification,
             )
 
+    async def _schedule_broadcast(
+        self, data: NotificationMassSendDTO, msg: str, user_id: int
+    ) -> dict[str, list[int]]:
+        broadcast = AddScheduleDTO(
+            message=msg,
+            sender_id=user_id,
+            audience=data.audience,
+            crontab=data.crontab,
+            scheduled_at=data.scheduled_at,
+            max_executions=data.max_executions,
+            misfire_policy=data.misfire_policy,
+            next_execution_at=self._calculate_next_execution_time(data),
+            schedule_type=data.schedule_type,
+        )
+        schedules_ids = await self.db.schedules.add_bulk([broadcast])
+        await self.db.commit()
+        logger.info(
+            "Scheduled broadcast for %s audience: %s", data.audience.value, broadcast
+        )
+        return {"scheduled_ids": schedules_ids}
+
+    async def _enqueue_mass_send(
+        self, data: NotificationMassSendDTO, msg: str, user_id: int
+    ) -> dict[str, int]:
+        job: MassSendJobDTO = await self.db.mass_send_jobs.add(
+            AddMassSendJobDTO(sender_id=user_id, message=msg, audience=data.audience)
+        )
+        await self.db.commit()
+        logger.info(
+            "Queued mass send job %d for %s audience", job.id, job.audience.value
+        )
+        return {"job_id": job.id}
+
+    async def get_mass_send_job(self, job_id: int) -> MassSendJobProgressDTO:
+        try:
+            job: MassSendJobDTO = await self.db.mass_send_jobs.get_one(id=job_id)
+        except ObjectNotFoundError as exc:
+            raise MassSendJobNotFoundError from exc
+
+        counts, last_delivered_at = await self.db.mass_send_jobs.count_logs_by_status(
+            job_id
+        )
+        sent = counts.get(NotificationStatus.SUCCESS, 0)
+        failed = counts.get(NotificationStatus.FAILURE, 0)
+        queued = counts.get(NotificationStatus.PENDING, 0)
+
+        throughput = 0.0
+        if job.started_at is not None:
+            until = datetime.now(timezone.utc)
+            if not queued and last_delivered_at is not None:
+                until = last_delivered_at
+            elapsed = (until - job.started_at).total_seconds()
+            if elapsed > 0:
+                throughput = round((sent + failed) / elapsed, 2)
+
+        return MassSendJobProgressDTO(
+            id=job.id,
+            status=job.status,
+            audience=job.audience,
+            total=job.queued_count,
+            queued=queued,
+            sent=sent,
+            failed=failed,
+            skipped=job.skipped_count,
+            throughput=throughput,
+            error=job.error,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+        )
+
     async def send_notifications(
         self, data: NotificationSendDTO | NotificationMassSendDTO, user_meta: dict
-    ) -> dict[str, list[int]]:
+    ) -> dict:
         msg = await self._validate_and_get_rendered_template(
             template_id=data.template_id, template_variables=data.variables
         )
+        if type(data) is NotificationMassSendDTO:
+            if data.schedule_type == ScheduleType.RECURRING or data.scheduled_at:
+                return await self._schedule_broadcast(
+                    data=data, msg=msg, user_id=user_meta["user_id"]
+                )
+            return await self._enqueue_mass_send(
+                data=data, msg=msg, user_id=user_meta["user_id"]
+            )
+
         template_type: ContentType = NotificationHelper.detect_content_type(msg)
         channels: list[ChannelDTO] = await self._validate_and_get_channels(
             data=data, user_meta=user_meta
@@ -175,14 +265,13 @@ class NotificationService(BaseService):
         )
 
         if pendings:
-            logs_ids = await self.db.notification_logs.add_bulk(pendings)
-            if not len(logs_ids):
+            logs: list[LogDTO] = await self.db.notification_logs.add_bulk(pendings)
+            if not len(logs):
                 raise NotificationExistsError
 
+            await self.db.outbox.add_for_logs(logs)
             await self.db.commit()
-            for penging in pendings:
-                CELERY_TASKS[penging.provider_name].delay(penging.model_dump())
-            results["pending_ids"].extend(logs_ids)
+            results["pending_ids"].extend([log.id for log in logs])
 
         if schedule:
             schedules_ids = await self.db.schedules.add_bulk(schedule)
@@ -191,6 +280,71 @@ class NotificationService(BaseService):
 
         return results
 
+    async def send_personalized(
+        self,
+        template_id: int,
+        audience: BroadcastAudience,
+        variables: dict[str, str],
+        user_meta: dict,
+        recipients: AsyncIterable[Recipient | None] | None = None,
+    ) -> dict[str, int]:
+        template = await self._get_template(template_id)
+        self._compile_template(template)
+        if (
+            audience != BroadcastAudience.EMAIL
+            and NotificationHelper.detect_content_type(template.content)
+            == ContentType.HTML
+        ):
+            raise ForbiddenHTMLTemplateError(
+                detail=f"HTML-шаблон не поддерживается получателями: {audience.value}"
+            )
+
+        job: MassSendJobDTO = await self.db.mass_send_jobs.add(
+            AddMassSendJobDTO(
+                sender_id=user_meta["user_id"],
+                template=template.content,
+                variables=variables,
+                uploaded=recipients is not None,
+                audience=audience,
+            )
+        )
+        result = {"job_id": job.id}
+        if recipients is not None:
+            result["skipped"] = await self._store_recipients(job.id, recipients)
+        await self.db.commit()
+        logger.info(
+            "Queued personalized mass send job %d for %s audience: %s",
+            job.id,
+            audience.value,
+            result,
+        )
+        return result
+
+    async def _store_recipients(
+        self, job_id: int, recipients: AsyncIterable[Recipient | None]
+    ) -> int:
+        skipped = 0
+        async for chunk in chunked(recipients, settings.PERSONALIZED_CHUNK_SIZE):
+            rows = [
+                AddMassSendRecipientDTO(
+                    job_id=job_id, user_id=recipient[0], variables=recipient[1]
+                )
+                for recipient in chunk
+                if recipient is not None
+            ]
+            skipped += len(chunk) - len(rows)
+            if rows:
+                await self.db.mass_send_recipients.add_bulk(rows)
+        if skipped:
+            await self.db.mass_send_jobs.add_skipped(job_id, skipped)
+        return skipped
+
+    async def get_scheduler_metrics(self) -> dict[str, float]:
+        try:
+            return await scheduler_metrics.read()
+        except RedisError as exc:
+            raise SchedulerMetricsUnavailableError from exc
+
     async def get_report(self, date_begin: datetime | None, date_end: datetime | None):
         report_schema = {}
         if date_begin and date_end:
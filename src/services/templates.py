@@ -9,6 +9,7 @@ from src.schemas.templates import (
     TemplateUpdateDTO,
 )
 from src.schemas.categories import AddCategoryDTO, CategoryDTO
+from src.utils.template_cache import template_cache
 from src.utils.exceptions import (
     ObjectExistsError,
     ObjectNotFoundError,
@@ -108,6 +109,7 @@ class TemplateService(BaseService):
         except ObjectNotFoundError as exc:
             raise TemplateNotFoundError from exc
         await self.db.commit()
+        template_cache.invalidate(template_id)
 
     async def delete_template(self, template_id: int, user_meta: dict) -> None:
         try:
@@ -115,3 +117,4 @@ class TemplateService(BaseService):
         except ObjectNotFoundError as exc:
             raise TemplateNotFoundError from exc
         await self.db.commit()
+        template_cache.invalidate(template_id)
@@ -57,6 +57,77 @@ class Settings:
     NTFY_API_URL = "https://ntfy.sh/"
     TELEGRAM_BOT_API_URL = "https://api.telegram.org/bot{}"
 
+    HTTP_POOL_SIZE = 100
+    HTTP_POOL_SIZE_PER_HOST = 30
+    HTTP_KEEPALIVE_TIMEOUT = 75
+    HTTP_DNS_CACHE_TTL = 300
+    HTTP_REQUEST_TIMEOUT = 30
+
+    SMTP_POOL_SIZE = 8
+    SMTP_POOL_IDLE_CHECK = 30
+    SMTP_TIMEOUT = 30
+
+    NOTIFICATIONS_BATCH_SIZE = 100
+    NOTIFICATIONS_BATCH_CONCURRENCY = 20
+
+    RESULT_SINK_MAX_ITEMS = 500
+    RESULT_SINK_FLUSH_INTERVAL_MS = 200
+
+    OUTBOX_RELAY_BATCH_SIZE = 1000
+    OUTBOX_RELAY_POLL_INTERVAL = 0.5
+    # entries marked relayed but not deleted are published again after this
+    OUTBOX_RELAY_TIMEOUT = 300
+
+    SCHEDULER_BATCH_SIZE = 2000
+    SCHEDULER_HEAP_SIZE = 1000
+    SCHEDULER_RESYNC_INTERVAL = 300
+    SCHEDULER_RETRY_DELAY = 1
+    SCHEDULER_SHARDS = 1
+    SCHEDULER_REBALANCE_INTERVAL = 30
+    BROADCAST_CHUNK_SIZE = 5000
+    PERSONALIZED_CHUNK_SIZE = 1000
+    # add_bulk switches to COPY into a staging table from this many rows
+    COPY_BULK_THRESHOLD = 1000
+
+    FANOUT_POLL_INTERVAL = 1
+    FANOUT_LEASE_TIMEOUT = 60
+    FANOUT_MAX_ATTEMPTS = 5
+
+    SCHEDULE_INDEX_ENABLED = False
+    # one sorted set per scheduler shard, "<key>:<shard>"; rebuild the index
+    # after changing SCHEDULER_SHARDS
+    SCHEDULE_INDEX_KEY = "notihub:schedules:index"
+
+    MESSAGE_BODIES_CLEANUP_INTERVAL = 3600
+    MESSAGE_BODIES_CLEANUP_BATCH_SIZE = 1000
+    # unreferenced bodies younger than this are kept for reuse by new sends
+    MESSAGE_BODIES_RETENTION = 3600
+
+    CRON_CACHE_SIZE = 1024
+    TEMPLATE_CACHE_SIZE = 512
+
+    # seconds a run may be late before its misfire policy applies
+    MISFIRE_GRACE_TIME = 60
+    MISFIRE_FIRE_ALL_CAP = 10
+    # notifications per second created while catching up on misfired runs
+    SCHEDULER_RECOVERY_RATE = 200
+    # seconds between the COUNT of overdue schedules behind recovery_backlog
+    SCHEDULER_BACKLOG_SAMPLE_INTERVAL = 60
+    SCHEDULER_METRICS_KEY = "notihub:scheduler:metrics"
+
+    # (tokens per second, burst) for all sends and for a single destination
+    RATE_LIMITS = {
+        "TELEGRAM": {"global": (30, 30), "destination": (1, 1)},
+        "PUSH": {"global": (0.2, 60), "destination": None},
+        "EMAIL": {"global": (20, 20), "destination": None},
+    }
+    THROTTLE_DEFAULT_RETRY_AFTER = 5
+
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+    CIRCUIT_BREAKER_FAILURE_WINDOW = 60
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT = 30
+    CIRCUIT_BREAKER_HALF_OPEN_PROBES = 3
+
     @staticmethod
     def _get_env_var(env_var: str, to_cast: type) -> Any:
         value = os.getenv(env_var)
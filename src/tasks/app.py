@@ -3,9 +3,10 @@ import logging.config
 from pathlib import Path
 
 from celery import Celery
-from celery.signals import setup_logging
+from celery.signals import setup_logging, worker_process_init, worker_process_shutdown
 
 from src.settings import settings
+from src.tasks.runtime import worker_runtime
 
 
 @setup_logging.connect
@@ -16,6 +17,16 @@ def config_loggers(*args, **kwargs):
     logging.config.dictConfig(config)
 
 
+@worker_process_init.connect
+def start_worker_runtime(*args, **kwargs):
+    worker_runtime.start()
+
+
+@worker_process_shutdown.connect
+def stop_worker_runtime(*args, **kwargs):
+    worker_runtime.stop()
+
+
 celery_app = Celery(
     "tasks",
     broker=settings.redis_url,
@@ -25,11 +36,8 @@ celery_app = Celery(
     ],
 )
 
-celery_app.conf.worker_hijack_root_logger = False
+CONTROL_QUEUE = "control"
 
-celery_app.conf.beat_schedule = {
-    "check_notification_schedule": {
-        "task": "check_notification_schedule",
-        "schedule": 60.0,
-    }
-}
+celery_app.conf.worker_hijack_root_logger = False
+celery_app.conf.task_default_queue = CONTROL_QUEUE
+celery_app.conf.task_routes = ("src.tasks.extras.route_task",)
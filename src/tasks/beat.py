@@ -1,49 +1,312 @@
 import asyncio
 import logging
-from datetime import datetime, timezone
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Collection, Iterable, Sequence
 
-from croniter import croniter
+from sqlalchemy import ColumnElement
 
-from src.tasks.extras import CELERY_TASKS
+from src.settings import settings
 from src.tasks.app import celery_app
+from src.tasks.runtime import worker_runtime
+from src.utils.cron import last_fire_times, next_fire_time, next_fire_times
 from src.utils.db_manager import DB_Manager
 from src.db import sessionmaker_null_pool
-from src.utils.enums import ScheduleType
+from src.models.notifications import NotificationSchedule
+from src.utils.enums import MisfirePolicy, ScheduleType
+from src.utils.schedule_index import schedule_index
+from src.utils.scheduler_metrics import scheduler_metrics
 from src.schemas.notifications import (
+    AddMassSendJobDTO,
+    AdvanceScheduleDTO,
+    LogDTO,
     RequestAddLogDTO,
-    UpdateScheduleDTO,
     ScheduleWithChannelsDTO,
 )
 
 
 logger = logging.getLogger("src.tasks.beat")
 
+MISFIRE_COUNTERS = (
+    "misfired_total",
+    "misfire_fired_total",
+    "misfire_skipped_total",
+    "misfire_truncated_total",
+)
+
+
+class RecoveryBacklog:
+    def __init__(self, sample_interval: float):
+        self.sample_interval = sample_interval
+        self.value = 0
+        self._sampled_at: float | None = None
+
+    def sample_due(self) -> bool:
+        return (
+            self._sampled_at is None
+            or time.monotonic() - self._sampled_at >= self.sample_interval
+        )
+
+    def sampled(self, backlog: int) -> None:
+        self.value = backlog
+        self._sampled_at = time.monotonic()
+
+    def recovered(self, count: int) -> None:
+        self.value = max(self.value - count, 0)
+
+
+recovery_backlog = RecoveryBacklog(settings.SCHEDULER_BACKLOG_SAMPLE_INTERVAL)
+
 
 @celery_app.task(name="check_notification_schedule")
 def check_notification_schedule():
-    asyncio.run(_process_scheduled_notifications())
+    """Manual recovery trigger, nothing schedules it.
+
+    Runs one pass over the due schedules of every shard, e.g. while no
+    scheduler process is up: celery call check_notification_schedule
+    """
+    worker_runtime.run(_process_scheduled_notifications())
+
 
+async def _process_scheduled_notifications(
+    batch_size: int = settings.SCHEDULER_BATCH_SIZE,
+    filter: Sequence[ColumnElement[bool]] = (),
+    shards: Collection[int] | None = None,
+):
+    now = datetime.now(timezone.utc)
+    after_id = 0
 
-async def _process_scheduled_notifications():
     async with DB_Manager(session_factory=sessionmaker_null_pool) as db:
-        schedules = await db.schedules.get_current_schedules_to_perform()
-        for schedule in schedules:
-            logger.info("Got schedule to handle: %s", schedule)
-            CELERY_TASKS[schedule.channel.channel_type].delay(
+        await _measure_recovery_backlog(db, now, filter)
+        if schedule_index.enabled:
+            await _process_indexed_schedules(db, now, batch_size, filter, shards)
+            return
+
+        while True:
+            schedules = await db.schedules.get_current_schedules_to_perform(
+                *filter,
+                now=now,
+                after_id=after_id,
+                limit=batch_size,
+                skip_locked=True,
+            )
+            if not schedules:
+                return
+
+            recovered = await _execute_schedules(db, schedules, now)
+            await db.commit()
+            await _pace_recovery(recovered)
+
+            if len(schedules) < batch_size:
+                return
+            after_id = schedules[-1].id
+
+
+async def _process_indexed_schedules(
+    db: DB_Manager,
+    now: datetime,
+    batch_size: int,
+    filter: Sequence[ColumnElement[bool]] = (),
+    shards: Collection[int] | None = None,
+):
+    skipped: set[int] = set()
+    while True:
+        due_ids = await schedule_index.due_ids(
+            now, limit=batch_size + len(skipped), shards=shards
+        )
+        ids = [schedule_id for schedule_id in due_ids if schedule_id not in skipped]
+        if not ids:
+            return
+
+        schedules = await db.schedules.get_current_schedules_to_perform(
+            NotificationSchedule.id.in_(ids), *filter, now=now, skip_locked=True
+        )
+        recovered = 0
+        if schedules:
+            recovered = await _execute_schedules(db, schedules, now)
+
+        claimed = {schedule.id for schedule in schedules}
+        unclaimed = [schedule_id for schedule_id in ids if schedule_id not in claimed]
+        if unclaimed:
+            await db.schedules.resync_index(unclaimed)
+            skipped.update(unclaimed)
+        await db.commit()
+        await _pace_recovery(recovered)
+
+
+async def _measure_recovery_backlog(
+    db: DB_Manager, now: datetime, filter: Sequence[ColumnElement[bool]] = ()
+):
+    if not recovery_backlog.sample_due():
+        return
+    backlog = await db.schedules.count_overdue(
+        *filter, before=now - timedelta(seconds=settings.MISFIRE_GRACE_TIME)
+    )
+    recovery_backlog.sampled(backlog)
+    if backlog:
+        logger.warning("Found %d misfired schedules, recovering", backlog)
+    await scheduler_metrics.record({}, gauges={"recovery_backlog": backlog})
+
+
+async def _pace_recovery(recovered: int):
+    if recovered:
+        await asyncio.sleep(recovered / settings.SCHEDULER_RECOVERY_RATE)
+
+
+async def _execute_schedules(
+    db: DB_Manager, schedules: list[ScheduleWithChannelsDTO], now: datetime
+) -> int:
+    fire_times = _next_fire_times(schedules, now)
+    misfired = _misfired_schedules(schedules, now)
+    replay_windows = _replay_windows(misfired.values(), now)
+    counters = dict.fromkeys(MISFIRE_COUNTERS, 0)
+
+    pendings, to_advance, to_delete, jobs = [], [], [], []
+    for schedule in schedules:
+        logger.debug("Got schedule to handle: %s", schedule)
+        next_fire_at = fire_times.get(schedule.id)
+
+        if schedule.id in misfired:
+            counters["misfired_total"] += 1
+            if schedule.misfire_policy == MisfirePolicy.SKIP:
+                counters["misfire_skipped_total"] += 1
+                to_advance.append(
+                    AdvanceScheduleDTO(
+                        id=schedule.id,
+                        current_executions=schedule.current_executions,
+                        last_executed_at=schedule.last_executed_at,
+                        next_execution_at=next_fire_at,
+                    )
+                )
+                continue
+
+            if schedule.misfire_policy == MisfirePolicy.FIRE_ALL:
+                next_fire_at = next_fire_time(
+                    schedule.crontab,  # type: ignore
+                    _replay_from(schedule, replay_windows, counters),
+                )
+            counters["misfire_fired_total"] += 1
+
+        if schedule.channel is None:
+            jobs.append(
+                AddMassSendJobDTO(
+                    sender_id=schedule.sender_id,  # type: ignore
+                    message=schedule.message,
+                    audience=schedule.audience,  # type: ignore
+                )
+            )
+        else:
+            pendings.append(
                 RequestAddLogDTO(
                     sender_id=schedule.channel.user_id,
                     message=schedule.message,
                     contact_data=schedule.channel.contact_value,
                     provider_name=schedule.channel.channel_type,
-                ).model_dump()
+                )
             )
-            await _update_schedule_after_execution(db, schedule)
-        await db.commit()
+        advanced = _advance_schedule(schedule, now, next_fire_at)
+        if advanced is None:
+            to_delete.append(schedule.id)
+        else:
+            to_advance.append(advanced)
 
+    if to_delete:
+        await db.schedules.delete_by_ids(to_delete)
+    if to_advance:
+        await db.schedules.advance_bulk(to_advance)
 
-async def _update_schedule_after_execution(
-    db: DB_Manager, schedule: ScheduleWithChannelsDTO
-):
+    logs: list[LogDTO] = []
+    if pendings:
+        logs = await db.notification_logs.add_bulk(pendings)
+        await db.outbox.add_for_logs(logs)
+    if jobs:
+        await db.mass_send_jobs.add_bulk(jobs)
+    logger.info(
+        "Executed %d schedules: %d advanced, %d deleted, %d broadcasts queued",
+        len(schedules),
+        len(to_advance),
+        len(to_delete),
+        len(jobs),
+    )
+
+    if misfired:
+        logger.info(
+            "Recovered %d misfired schedules: %d fired, %d skipped",
+            counters["misfired_total"],
+            counters["misfire_fired_total"],
+            counters["misfire_skipped_total"],
+        )
+        recovery_backlog.recovered(counters["misfired_total"])
+        await scheduler_metrics.record(
+            counters,
+            gauges={
+                "recovery_backlog": recovery_backlog.value,
+                "recovery_updated_at": now.timestamp(),
+            },
+        )
+    return counters["misfire_fired_total"]
+
+
+def _misfired_schedules(
+    schedules: list[ScheduleWithChannelsDTO], now: datetime
+) -> dict[int, ScheduleWithChannelsDTO]:
+    misfire_before = now - timedelta(seconds=settings.MISFIRE_GRACE_TIME)
+    return {
+        schedule.id: schedule
+        for schedule in schedules
+        if schedule.schedule_type == ScheduleType.RECURRING
+        and schedule.crontab
+        and schedule.next_execution_at
+        and schedule.next_execution_at < misfire_before
+    }
+
+
+def _replay_windows(
+    schedules: Iterable[ScheduleWithChannelsDTO], now: datetime
+) -> dict[str, datetime]:
+    crontabs = {
+        schedule.crontab
+        for schedule in schedules
+        if schedule.misfire_policy == MisfirePolicy.FIRE_ALL and schedule.crontab
+    }
+    return {
+        crontab: last_fire_times(crontab, now, settings.MISFIRE_FIRE_ALL_CAP)[0]
+        for crontab in crontabs
+    }
+
+
+def _replay_from(
+    schedule: ScheduleWithChannelsDTO,
+    replay_windows: dict[str, datetime],
+    counters: dict[str, int],
+) -> datetime:
+    window_start = replay_windows[schedule.crontab]  # type: ignore
+    if schedule.next_execution_at < window_start:  # type: ignore
+        counters["misfire_truncated_total"] += 1
+        return window_start
+    return schedule.next_execution_at  # type: ignore
+
+
+def _next_fire_times(
+    schedules: list[ScheduleWithChannelsDTO], now: datetime
+) -> dict[int, datetime]:
+    by_crontab: dict[str, list[int]] = defaultdict(list)
+    for schedule in schedules:
+        if schedule.schedule_type == ScheduleType.RECURRING and schedule.crontab:
+            by_crontab[schedule.crontab].append(schedule.id)
+
+    fire_times = {}
+    for crontab, ids in by_crontab.items():
+        fire_times.update(zip(ids, next_fire_times(crontab, [now] * len(ids))))
+    return fire_times
+
+
+def _advance_schedule(
+    schedule: ScheduleWithChannelsDTO,
+    now: datetime,
+    next_fire_at: datetime | None = None,
+) -> AdvanceScheduleDTO | None:
     next_execution_time = schedule.scheduled_at
     new_executions_count = schedule.current_executions + 1
 
@@ -54,28 +317,22 @@ async def _update_schedule_after_execution(
             and schedule.max_executions != 0
         )
     ):
-        await db.schedules.delete(ensure_existence=False, id=schedule.id)
-        logger.info(
-            "Reached 'max_executions': (%d) count, schedule was deleted: %s",
+        logger.debug(
+            "Reached 'max_executions': (%d) count, schedule will be deleted: %s",
             schedule.max_executions,
             schedule,
         )
-        return
+        return None
+
+    if schedule.max_executions == 0:
+        new_executions_count = schedule.current_executions
 
     if schedule.schedule_type == ScheduleType.RECURRING and schedule.crontab:
-        now = datetime.now(timezone.utc)
-        cron = croniter(schedule.crontab, now)
-        next_execution_time = cron.get_next(datetime)
-        logger.info(
-            "New 'next execution' time for RECURRING schedule: %s", next_execution_time
-        )
+        next_execution_time = next_fire_at or next_fire_time(schedule.crontab, now)
 
-    await db.schedules.edit(
-        ensure_existence=False,
+    return AdvanceScheduleDTO(
         id=schedule.id,
-        data=UpdateScheduleDTO(
-            current_executions=new_executions_count,
-            last_executed_at=datetime.now(timezone.utc),
-            next_execution_at=next_execution_time,
-        ),
+        current_executions=new_executions_count,
+        last_executed_at=now,
+        next_execution_at=next_execution_time,
     )
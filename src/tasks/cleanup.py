@@ -0,0 +1,53 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from src.db import sessionmaker
+from src.settings import settings
+from src.tasks.app import config_loggers
+from src.utils.db_manager import DB_Manager
+
+
+logger = logging.getLogger("src.tasks.cleanup")
+
+
+async def delete_orphaned_bodies(session_factory=sessionmaker) -> int:
+    # Bodies are left behind when schedules are deleted or edited and when
+    # a pending duplicate log is skipped; the FK only prevents deleting used ones.
+    created_before = datetime.now(timezone.utc) - timedelta(
+        seconds=settings.MESSAGE_BODIES_RETENTION
+    )
+    total = 0
+    while True:
+        async with DB_Manager(session_factory=session_factory) as db:
+            deleted = await db.message_bodies.delete_orphans(
+                created_before=created_before,
+                limit=settings.MESSAGE_BODIES_CLEANUP_BATCH_SIZE,
+            )
+            await db.commit()
+        total += deleted
+        if deleted < settings.MESSAGE_BODIES_CLEANUP_BATCH_SIZE:
+            return total
+
+
+async def run_cleanup() -> None:
+    logger.info("Message bodies cleanup has been started")
+    while True:
+        try:
+            deleted = await delete_orphaned_bodies()
+            logger.info("Deleted %d unreferenced message bodies", deleted)
+        except Exception as exc:
+            logger.error("Failed to delete unreferenced message bodies: %s", exc)
+
+        await asyncio.sleep(settings.MESSAGE_BODIES_CLEANUP_INTERVAL)
+
+
+if __name__ == "__main__":
+    os.makedirs(Path(__file__).resolve().parent.parent.parent / "logs", exist_ok=True)
+    config_loggers()
+    try:
+        asyncio.run(run_cleanup())
+    except KeyboardInterrupt:
+        pass
@@ -1,7 +1,9 @@
+from src.tasks.app import CONTROL_QUEUE
 from src.tasks.tasks import (
     send_email_notification,
     send_telegram_notification,
     send_push_notification,
+    send_notifications_batch,
 )
 from src.utils.enums import ContactChannelType
 
@@ -12,3 +14,25 @@ CELERY_TASKS = {
     ContactChannelType.PUSH: send_push_notification,
     # ContactChannelType.SMS: send_sms_notification,
 }
+
+CELERY_BATCH_TASK = send_notifications_batch
+
+
+def queue_for(provider: ContactChannelType) -> str:
+    return f"notifications.{provider.value.lower()}"
+
+
+CELERY_QUEUES = {provider: queue_for(provider) for provider in CELERY_TASKS}
+
+TASK_QUEUES = {
+    task.name: CELERY_QUEUES[provider] for provider, task in CELERY_TASKS.items()
+}
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    if name in TASK_QUEUES:
+        return {"queue": TASK_QUEUES[name]}
+    if name == CELERY_BATCH_TASK.name:
+        provider_name = args[0] if args else kwargs["provider_name"]
+        return {"queue": CELERY_QUEUES[ContactChannelType(provider_name)]}
+    return {"queue": CONTROL_QUEUE}
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator
+
+from src.db import sessionmaker
+from src.settings import settings
+from src.tasks.app import config_loggers
+from src.utils.db_manager import DB_Manager
+from src.utils.enums import MassSendJobStatus
+from src.utils.recipients import Recipient, render_messages
+from src.utils.template_cache import compile_template
+from src.schemas.notifications import AddMassSendLogDTO, LogDTO, MassSendJobDTO
+
+
+logger = logging.getLogger("src.tasks.fanout")
+
+
+def _lease_until(now: datetime) -> datetime:
+    return now + timedelta(seconds=settings.FANOUT_LEASE_TIMEOUT)
+
+
+Batch = tuple[int, list[AddMassSendLogDTO], int]
+
+
+async def _audience_batches(
+    db: DB_Manager, job: MassSendJobDTO
+) -> AsyncIterator[Batch]:
+    async for channels in db.channels.iter_audience_chunks(
+        job.audience, after_id=job.cursor, limit=settings.BROADCAST_CHUNK_SIZE
+    ):
+        pendings = [
+            AddMassSendLogDTO(
+                job_id=job.id,
+                sender_id=job.sender_id,
+                message=job.message,  # type: ignore
+                contact_data=channel.contact_value,
+                provider_name=channel.channel_type,
+            )
+            for channel in channels
+        ]
+        yield channels[-1].id, pendings, 0
+
+
+async def _recipient_chunks(
+    db: DB_Manager, job: MassSendJobDTO
+) -> AsyncIterator[tuple[int, list[Recipient]]]:
+    after_id = job.cursor
+    if job.uploaded:
+        while rows := await db.mass_send_recipients.get_chunk(
+            job.id, after_id=after_id, limit=settings.PERSONALIZED_CHUNK_SIZE
+        ):
+            after_id = rows[-1].id
+            yield after_id, [(row.user_id, row.variables) for row in rows]
+        return
+
+    while users := await db.users.get_chunk(
+        after_id=after_id, limit=settings.PERSONALIZED_CHUNK_SIZE
+    ):
+        after_id = users[-1].id
+        yield (
+            after_id,
+            [
+                (
+                    user.id,
+                    {
+                        "username": user.username,
+                        "first_name": user.first_name or "",
+                        "last_name": user.last_name or "",
+                    },
+                )
+                for user in users
+            ],
+        )
+
+
+async def _personalized_batches(
+    db: DB_Manager, job: MassSendJobDTO
+) -> AsyncIterator[Batch]:
+    compiled = compile_template(
+        settings.JINGA2_ENV,
+        job.template,  # type: ignore
+        job.created_at,
+    )
+    async for cursor, recipients in _recipient_chunks(db, job):
+        messages, skipped = render_messages(compiled, job.variables or {}, recipients)
+        channels = []
+        if messages:
+            channels = await db.channels.get_by_users(list(messages), job.audience)
+        pendings = [
+            AddMassSendLogDTO(
+                job_id=job.id,
+                sender_id=job.sender_id,
+                message=messages[channel.user_id],
+                contact_data=channel.contact_value,
+                provider_name=channel.channel_type,
+            )
+            for channel in channels
+        ]
+        yield cursor, pendings, skipped
+
+
+async def fan_out_job(db: DB_Manager, job: MassSendJobDTO) -> bool:
+    if job.template is None:
+        batches = _audience_batches(db, job)
+    else:
+        batches = _personalized_batches(db, job)
+
+    after_id = job.cursor
+    async for cursor, pendings, skipped in batches:
+        logs: list[LogDTO] = []
+        if pendings:
+            logs = await db.notification_logs.add_bulk(pendings)
+            await db.outbox.add_for_logs(logs)
+        advanced = await db.mass_send_jobs.advance(
+            job.id,
+            after_id=after_id,
+            cursor=cursor,
+            queued=len(logs),
+            skipped=skipped,
+            lease_until=_lease_until(datetime.now(timezone.utc)),
+        )
+        if not advanced:
+            await db.rollback()
+            logger.warning("Mass send job %d was taken over by another worker", job.id)
+            return False
+        await db.commit()
+        after_id = cursor
+
+    await db.mass_send_jobs.finish(
+        job.id, MassSendJobStatus.COMPLETED, now=datetime.now(timezone.utc)
+    )
+    await db.commit()
+    return True
+
+
+async def process_next_job(session_factory=sessionmaker) -> bool:
+    async with DB_Manager(session_factory=session_factory) as db:
+        now = datetime.now(timezone.utc)
+        job = await db.mass_send_jobs.claim(now=now, lease_until=_lease_until(now))
+        if job is None:
+            return False
+        await db.commit()
+
+        if job.attempts > settings.FANOUT_MAX_ATTEMPTS:
+            await db.mass_send_jobs.finish(
+                job.id, MassSendJobStatus.FAILED, now=now, error=job.error
+            )
+            await db.commit()
+            logger.error("Mass send job %d failed: %s", job.id, job.error)
+            return True
+
+        logger.info(
+            "Fanning out mass send job %d from channel %d (attempt %d)",
+            job.id,
+            job.cursor,
+            job.attempts,
+        )
+        try:
+            completed = await fan_out_job(db, job)
+        except Exception as exc:
+            await db.rollback()
+            logger.error("Mass send job %d was interrupted: %s", job.id, exc)
+            retry_at = datetime.now(timezone.utc) + timedelta(
+                seconds=settings.FANOUT_POLL_INTERVAL * 2**job.attempts
+            )
+            await db.mass_send_jobs.release(job.id, retry_at=retry_at, error=str(exc))
+            await db.commit()
+            return True
+
+    if completed:
+        logger.info("Mass send job %d has been fanned out", job.id)
+    return True
+
+
+async def run_fanout() -> None:
+    logger.info("Mass send fan-out worker has been started")
+    while True:
+        try:
+            processed = await process_next_job()
+        except Exception as exc:
+            logger.error("Failed to process mass send job: %s", exc)
+            processed = False
+
+        if not processed:
+            await asyncio.sleep(settings.FANOUT_POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    os.makedirs(Path(__file__).resolve().parent.parent.parent / "logs", exist_ok=True)
+    config_loggers()
+    try:
+        asyncio.run(run_fanout())
+    except KeyboardInterrupt:
+        pass
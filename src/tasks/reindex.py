@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+from typing import AsyncIterator
+
+from src.db import sessionmaker_null_pool
+from src.utils.db_manager import DB_Manager
+from src.utils.schedule_index import IndexUpserts, schedule_index
+
+
+logger = logging.getLogger("src.tasks.reindex")
+
+CHUNK_SIZE = 10000
+SCORE_TOLERANCE = 0.001
+
+
+async def iter_execution_times(
+    db: DB_Manager, chunk_size: int = CHUNK_SIZE
+) -> AsyncIterator[list[tuple[int, int | None, datetime]]]:
+    after_id = 0
+    while chunk := await db.schedules.get_execution_times_chunk(
+        after_id=after_id, limit=chunk_size
+    ):
+        yield chunk
+        after_id = chunk[-1][0]
+
+
+async def rebuild_index() -> int:
+    async with DB_Manager(session_factory=sessionmaker_null_pool) as db:
+        total = await schedule_index.rebuild(iter_execution_times(db))
+    logger.info("Schedule index has been rebuilt with %d schedules", total)
+    return total
+
+
+async def check_index(fix: bool = False) -> dict[str, int]:
+    report = {"checked": 0, "missing": 0, "mismatched": 0, "stale": 0}
+    known_shards: dict[int, int] = {}
+    max_id = 0
+
+    async with DB_Manager(session_factory=sessionmaker_null_pool) as db:
+        async for chunk in iter_execution_times(db):
+            known_shards.update(
+                (schedule_id, schedule_index.shard_of(schedule_id, channel_id))
+                for schedule_id, channel_id, _ in chunk
+            )
+            max_id = chunk[-1][0]
+            scores = await schedule_index.scores(
+                (schedule_id, channel_id) for schedule_id, channel_id, _ in chunk
+            )
+
+            fixes: IndexUpserts = {}
+            for (schedule_id, channel_id, next_execution_at), score in zip(
+                chunk, scores
+            ):
+                if score is None:
+                    report["missing"] += 1
+                    fixes[schedule_id] = (channel_id, next_execution_at)
+                elif abs(score - next_execution_at.timestamp()) > SCORE_TOLERANCE:
+                    report["mismatched"] += 1
+                    fixes[schedule_id] = (channel_id, next_execution_at)
+            report["checked"] += len(chunk)
+
+            if fix and fixes:
+                await schedule_index.apply(fixes)
+
+    async for shard, stale in schedule_index.stale_ids(known_shards, max_id):
+        report["stale"] += len(stale)
+        if fix:
+            await schedule_index.remove(shard, stale)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Redis schedule index maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="rebuild the index from Postgres")
+    check = commands.add_parser("check", help="compare the index with Postgres")
+    check.add_argument("--fix", action="store_true", help="repair found differences")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        total = asyncio.run(rebuild_index())
+        print(f"Indexed {total} schedules")
+        return
+
+    report = asyncio.run(check_index(fix=args.fix))
+    print(
+        "Checked {checked} schedules: {missing} missing, {mismatched} mismatched, "
+        "{stale} stale".format(**report)
+    )
+
+
+if __name__ == "__main__":
+    main()
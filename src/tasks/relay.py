@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from src.db import sessionmaker
+from src.settings import settings
+from src.tasks.app import celery_app, config_loggers
+from src.tasks.extras import CELERY_BATCH_TASK
+from src.utils.db_manager import DB_Manager
+from src.utils.enums import ContactChannelType
+from src.schemas.notifications import DispatchLogDTO, OutboxDTO
+
+
+logger = logging.getLogger("src.tasks.relay")
+
+
+def publish_outbox_entries(entries: list[OutboxDTO], published: list[int]) -> None:
+    by_provider: dict[ContactChannelType, list[OutboxDTO]] = defaultdict(list)
+    for entry in entries:
+        by_provider[entry.provider_name].append(entry)
+
+    batch_size = settings.NOTIFICATIONS_BATCH_SIZE
+    with celery_app.producer_or_acquire() as producer:
+        for provider, provider_entries in by_provider.items():
+            for i in range(0, len(provider_entries), batch_size):
+                chunk = provider_entries[i : i + batch_size]
+                dispatches = [
+                    DispatchLogDTO(id=entry.log_id, provider_name=provider)
+                    for entry in chunk
+                ]
+                CELERY_BATCH_TASK.apply_async(
+                    args=(provider.value, [item.model_dump() for item in dispatches]),
+                    producer=producer,
+                )
+                published.extend(entry.id for entry in chunk)
+
+
+async def relay_outbox_batch(db: DB_Manager) -> int:
+    # Entries are marked relayed and committed before publishing, so a crash
+    # after publishing does not hand them to the next relay right away. They
+    # are published again only after OUTBOX_RELAY_TIMEOUT, by when the first
+    # copy has usually been sent and load_pending_logs skips the duplicate.
+    now = datetime.now(timezone.utc)
+    entries = await db.outbox.claim_batch(
+        limit=settings.OUTBOX_RELAY_BATCH_SIZE,
+        now=now,
+        expired_before=now - timedelta(seconds=settings.OUTBOX_RELAY_TIMEOUT),
+    )
+    await db.commit()
+    if not entries:
+        return 0
+
+    published: list[int] = []
+    try:
+        await asyncio.to_thread(publish_outbox_entries, entries, published)
+    except Exception:
+        # A broker error must not hold the rest of the batch until the timeout.
+        published_ids = set(published)
+        await db.outbox.release(
+            [entry.id for entry in entries if entry.id not in published_ids]
+        )
+        if published:
+            await db.outbox.delete_by_ids(published)
+        await db.commit()
+        raise
+
+    await db.outbox.delete_by_ids(published)
+    await db.commit()
+    logger.info("Relayed %d notifications from outbox", len(entries))
+    return len(entries)
+
+
+async def run_relay() -> None:
+    logger.info("Outbox relay has been started")
+    while True:
+        try:
+            async with DB_Manager(session_factory=sessionmaker) as db:
+                relayed = await relay_outbox_batch(db)
+        except Exception as exc:
+            logger.error("Failed to relay outbox batch: %s", exc)
+            relayed = 0
+
+        if relayed < settings.OUTBOX_RELAY_BATCH_SIZE:
+            await asyncio.sleep(settings.OUTBOX_RELAY_POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    os.makedirs(Path(__file__).resolve().parent.parent.parent / "logs", exist_ok=True)
+    config_loggers()
+    try:
+        asyncio.run(run_relay())
+    except KeyboardInterrupt:
+        pass
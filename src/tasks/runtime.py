@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, TypeVar
+
+import aiohttp
+from redis.asyncio import Redis
+
+from src.settings import settings
+from src.tasks.smtp_pool import SMTPConnectionPool
+from src.utils.circuit_breaker import CircuitBreaker
+from src.utils.enums import ContactChannelType
+from src.utils.rate_limiter import TokenBucketRateLimiter
+from src.utils.redis_manager import RedisManager
+
+
+logger = logging.getLogger("src.tasks.runtime")
+
+T = TypeVar("T")
+
+
+class WorkerRuntime:
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._http_sessions: dict[ContactChannelType, aiohttp.ClientSession] = {}
+        self._smtp_pools: dict[tuple[str, int], SMTPConnectionPool] = {}
+        self._redis_manager = RedisManager(
+            host=settings.REDIS_HOST, port=settings.REDIS_PORT
+        )
+        self._redis: Redis | None = None
+        self._rate_limiter: TokenBucketRateLimiter | None = None
+        self._circuit_breaker: CircuitBreaker | None = None
+        self._shutdown_hooks: list[Callable[[], Awaitable[None]]] = []
+
+    @property
+    def is_running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=self._run_loop,
+                args=(loop,),
+                name="notihub-worker-runtime",
+                daemon=True,
+            )
+            thread.start()
+            self._loop, self._thread = loop, thread
+        logger.info("Worker runtime event loop has been started")
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)  # type: ignore
+        return future.result()
+
+    def add_shutdown_hook(self, hook: Callable[[], Awaitable[None]]) -> None:
+        self._shutdown_hooks.append(hook)
+
+    async def get_http_session(
+        self, provider: ContactChannelType
+    ) -> aiohttp.ClientSession:
+        session = self._http_sessions.get(provider)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.HTTP_POOL_SIZE,
+                limit_per_host=settings.HTTP_POOL_SIZE_PER_HOST,
+                keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.HTTP_REQUEST_TIMEOUT),
+            )
+            self._http_sessions[provider] = session
+            logger.info("Opened new HTTP connection pool for provider: %s", provider)
+        return session
+
+    def get_smtp_pool(
+        self, hostname: str = settings.SMTP_HOST, port: int = settings.SMTP_PORT
+    ) -> SMTPConnectionPool:
+        pool = self._smtp_pools.get((hostname, port))
+        if pool is None:
+            pool = SMTPConnectionPool(
+                hostname=hostname,
+                port=port,
+                username=settings.SMTP_USER,
+                password=settings.SMTP_PASSWORD,
+                use_tls=True,
+                max_size=settings.SMTP_POOL_SIZE,
+                idle_check_after=settings.SMTP_POOL_IDLE_CHECK,
+                timeout=settings.SMTP_TIMEOUT,
+            )
+            self._smtp_pools[(hostname, port)] = pool
+        return pool
+
+    async def get_redis(self) -> Redis:
+        if self._redis is None:
+            self._redis = await self._redis_manager.connect()
+        return self._redis
+
+    async def get_rate_limiter(self) -> TokenBucketRateLimiter:
+        if self._rate_limiter is None:
+            self._rate_limiter = TokenBucketRateLimiter(
+                redis=await self.get_redis(), limits=settings.RATE_LIMITS
+            )
+        return self._rate_limiter
+
+    async def get_circuit_breaker(self) -> CircuitBreaker:
+        if self._circuit_breaker is None:
+            self._circuit_breaker = CircuitBreaker(
+                redis=await self.get_redis(),
+                failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                failure_window=settings.CIRCUIT_BREAKER_FAILURE_WINDOW,
+                recovery_timeout=settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+                half_open_probes=settings.CIRCUIT_BREAKER_HALF_OPEN_PROBES,
+            )
+        return self._circuit_breaker
+
+    async def _close(self) -> None:
+        for hook in reversed(self._shutdown_hooks):
+            try:
+                await hook()
+            except Exception as exc:
+                logger.error("Worker runtime shutdown hook failed: %s", exc)
+
+        for session in self._http_sessions.values():
+            await session.close()
+        self._http_sessions.clear()
+
+        for pool in self._smtp_pools.values():
+            await pool.close()
+        self._smtp_pools.clear()
+
+        if self._redis is not None:
+            await self._redis_manager.close()
+            self._redis = None
+            self._rate_limiter, self._circuit_breaker = None, None
+
+    def stop(self, timeout: float = 30.0) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None or thread is None:
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout)
+        except Exception as exc:
+            logger.error("Failed to gracefully close worker runtime: %s", exc)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            loop.close()
+        logger.info("Worker runtime event loop has been stopped")
+
+
+worker_runtime = WorkerRuntime()
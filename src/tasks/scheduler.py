@@ -0,0 +1,156 @@
+import asyncio
+import heapq
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import ColumnElement
+
+from src.db import engine_null_pool, sessionmaker
+from src.repos.scheudles import SCHEDULES_NOTIFY_CHANNEL
+from src.settings import settings
+from src.tasks.app import config_loggers
+from src.tasks.beat import _process_scheduled_notifications
+from src.tasks.shards import ShardLeases, shard_filter
+from src.utils.db_manager import DB_Manager
+from src.utils.schedule_index import schedule_index
+
+
+logger = logging.getLogger("src.tasks.scheduler")
+
+
+class Scheduler:
+    def __init__(
+        self,
+        heap_size: int,
+        resync_interval: float,
+        shards: int = 1,
+        rebalance_interval: float = 30,
+    ):
+        self.heap_size = heap_size
+        self.resync_interval = resync_interval
+        self.shards = shards
+        self.rebalance_interval = rebalance_interval
+        self._heap: list[datetime] = []
+        self._filter: list[ColumnElement[bool]] = []
+        self._owned: set[int] = set()
+        self._rebalanced_at = 0.0
+        self._wakeup = asyncio.Event()
+        self._listener_lost = False
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        if not self._owned:
+            return
+        next_execution_at = datetime.fromisoformat(payload)
+        heapq.heappush(self._heap, next_execution_at)
+        if len(self._heap) > self.heap_size * 2:
+            self._heap = heapq.nsmallest(self.heap_size, self._heap)
+        self._wakeup.set()
+
+    def _on_listener_lost(self, connection) -> None:
+        self._listener_lost = True
+        self._wakeup.set()
+
+    async def refresh(self) -> None:
+        if not self._owned:
+            self._heap = []
+        elif schedule_index.enabled:
+            self._heap = await schedule_index.upcoming(
+                limit=self.heap_size, shards=self._owned
+            )
+        else:
+            async with DB_Manager(session_factory=sessionmaker) as db:
+                self._heap = await db.schedules.get_upcoming_execution_times(
+                    *self._filter, limit=self.heap_size
+                )
+        if self._heap:
+            logger.info("Next schedule is due at %s", self._heap[0])
+
+    async def rebalance(self, leases: ShardLeases) -> None:
+        owned = set(await leases.rebalance())
+        self._rebalanced_at = asyncio.get_running_loop().time()
+        # With unchanged ownership the heap is kept current by NOTIFY alone.
+        if owned == self._owned:
+            return
+        self._owned = owned
+        self._filter = shard_filter(self._owned, self.shards)
+        await self.refresh()
+
+    def _seconds_until_rebalance(self) -> float:
+        elapsed = asyncio.get_running_loop().time() - self._rebalanced_at
+        return self.rebalance_interval - elapsed
+
+    def _seconds_until_due(self, now: datetime) -> float:
+        if not self._heap:
+            return self.resync_interval
+        return min(self.resync_interval, (self._heap[0] - now).total_seconds())
+
+    async def _sleep_until_due(self, timeout: float) -> bool:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except TimeoutError:
+            return False
+        return True
+
+    async def run(self) -> None:
+        async with engine_null_pool.connect() as conn:
+            raw_connection = await conn.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            await driver_connection.add_listener(  # type: ignore
+                SCHEDULES_NOTIFY_CHANNEL, self._on_notify
+            )
+            driver_connection.add_termination_listener(  # type: ignore
+                self._on_listener_lost
+            )
+            self._listener_lost = False
+            leases = ShardLeases(driver_connection, self.shards)
+            await leases.join()
+            await self.rebalance(leases)
+
+            while not self._listener_lost:
+                if self._seconds_until_rebalance() <= 0:
+                    await self.rebalance(leases)
+
+                timeout = self._seconds_until_due(datetime.now(timezone.utc))
+                if self._owned and timeout <= 0:
+                    await _process_scheduled_notifications(
+                        filter=self._filter, shards=self._owned
+                    )
+                    await self.refresh()
+                    if self._seconds_until_due(datetime.now(timezone.utc)) <= 0:
+                        await asyncio.sleep(settings.SCHEDULER_RETRY_DELAY)
+                    continue
+
+                rebalance_in = self._seconds_until_rebalance()
+                woken = await self._sleep_until_due(min(timeout, rebalance_in))
+                if not woken and rebalance_in > timeout >= self.resync_interval:
+                    await self.refresh()
+
+        raise ConnectionError("LISTEN connection to Postgres was lost")
+
+
+async def run_scheduler() -> None:
+    scheduler = Scheduler(
+        heap_size=settings.SCHEDULER_HEAP_SIZE,
+        resync_interval=settings.SCHEDULER_RESYNC_INTERVAL,
+        shards=settings.SCHEDULER_SHARDS,
+        rebalance_interval=settings.SCHEDULER_REBALANCE_INTERVAL,
+    )
+    logger.info("Scheduler has been started")
+    while True:
+        try:
+            await scheduler.run()
+        except Exception as exc:
+            logger.error("Scheduler failed, restarting: %s", exc)
+            await asyncio.sleep(settings.SCHEDULER_RETRY_DELAY)
+
+
+if __name__ == "__main__":
+    os.makedirs(Path(__file__).resolve().parent.parent.parent / "logs", exist_ok=True)
+    config_loggers()
+    try:
+        asyncio.run(run_scheduler())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,71 @@
+import logging
+import math
+import random
+from typing import Collection
+
+from sqlalchemy import ColumnElement, func
+
+from src.models.notifications import NotificationSchedule
+
+
+logger = logging.getLogger("src.tasks.shards")
+
+MEMBERS_LOCK_KEY = 0x4E48_0001
+SHARDS_LOCK_KEY = 0x4E48_0002
+
+COUNT_MEMBERS = """
+    SELECT count(*) FROM pg_locks
+    WHERE locktype = 'advisory' AND classid = $1 AND objsubid = 2 AND granted
+"""
+
+
+def shard_filter(shards: Collection[int], total: int) -> list[ColumnElement[bool]]:
+    if total <= 1:
+        return []
+    shard_key = func.coalesce(NotificationSchedule.channel_id, NotificationSchedule.id)
+    return [(shard_key % total).in_(sorted(shards))]
+
+
+class ShardLeases:
+    def __init__(self, connection, total: int):
+        self.connection = connection
+        self.total = total
+        self.owned: set[int] = set()
+
+    async def join(self) -> None:
+        await self.connection.execute(
+            "SELECT pg_advisory_lock($1, pg_backend_pid())", MEMBERS_LOCK_KEY
+        )
+
+    async def rebalance(self) -> set[int]:
+        owned_before = set(self.owned)
+        members = await self.connection.fetchval(COUNT_MEMBERS, MEMBERS_LOCK_KEY)
+        fair_share = math.ceil(self.total / max(members, 1))
+
+        for shard in sorted(self.owned)[fair_share:]:
+            await self.connection.execute(
+                "SELECT pg_advisory_unlock($1, $2)", SHARDS_LOCK_KEY, shard
+            )
+            self.owned.discard(shard)
+
+        offset = random.randrange(self.total)
+        for i in range(self.total):
+            if len(self.owned) >= fair_share:
+                break
+            shard = (offset + i) % self.total
+            if shard in self.owned:
+                continue
+            if await self.connection.fetchval(
+                "SELECT pg_try_advisory_lock($1, $2)", SHARDS_LOCK_KEY, shard
+            ):
+                self.owned.add(shard)
+
+        if self.owned != owned_before:
+            logger.info(
+                "Owning %d of %d schedule shards with %d schedulers: %s",
+                len(self.owned),
+                self.total,
+                members,
+                sorted(self.owned),
+            )
+        return self.owned
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Sequence
+
+import aiosmtplib
+
+
+logger = logging.getLogger("src.tasks.smtp_pool")
+
+
+class SMTPConnectionPool:
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: str | None = None,
+        password: str | None = None,
+        use_tls: bool = True,
+        max_size: int = 8,
+        idle_check_after: float = 30.0,
+        timeout: float = 30.0,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_size = max_size
+        self.idle_check_after = idle_check_after
+        self.timeout = timeout
+
+        self._idle: deque[tuple[aiosmtplib.SMTP, float]] = deque()
+        self._semaphore = asyncio.Semaphore(max_size)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            use_tls=self.use_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        logger.info("Opened new SMTP connection to %s:%d", self.hostname, self.port)
+        return client
+
+    @staticmethod
+    async def _discard(client: aiosmtplib.SMTP) -> None:
+        try:
+            if client.is_connected:
+                await client.quit()
+        except aiosmtplib.SMTPException:
+            client.close()
+
+    async def _acquire(self) -> aiosmtplib.SMTP:
+        while self._idle:
+            client, released_at = self._idle.pop()
+            if not client.is_connected:
+                continue
+            if time.monotonic() - released_at >= self.idle_check_after:
+                try:
+                    await client.noop()
+                except (aiosmtplib.SMTPException, OSError):
+                    logger.info("Dropped stale idle SMTP connection")
+                    await self._discard(client)
+                    continue
+            return client
+        return await self._connect()
+
+    def _release(self, client: aiosmtplib.SMTP) -> None:
+        if client.is_connected:
+            self._idle.append((client, time.monotonic()))
+
+    async def sendmail(self, sender: str, recipients: Sequence[str], message: str):
+        async with self._semaphore:
+            client = await self._acquire()
+            try:
+                try:
+                    response = await client.sendmail(sender, recipients, message)
+                except aiosmtplib.SMTPServerDisconnected:
+                    logger.info("SMTP server closed pooled connection, reconnecting")
+                    await self._discard(client)
+                    client = await self._connect()
+                    response = await client.sendmail(sender, recipients, message)
+
+            except (
+                aiosmtplib.SMTPResponseException,
+                aiosmtplib.SMTPRecipientsRefused,
+            ):
+                try:
+                    await client.rset()
+                except (aiosmtplib.SMTPException, OSError):
+                    await self._discard(client)
+                else:
+                    self._release(client)
+                raise
+            except BaseException:
+                await self._discard(client)
+                raise
+
+            self._release(client)
+            return response
+
+    async def close(self) -> None:
+        while self._idle:
+            client, _ = self._idle.pop()
+            await self._discard(client)
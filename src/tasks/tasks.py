@@ -1,30 +1,123 @@
 import asyncio
-import aiohttp
 import logging
+from contextlib import asynccontextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+import aiohttp
 import aiosmtplib
+from redis.exceptions import RedisError
 
 from src.tasks.app import celery_app
+from src.tasks.runtime import worker_runtime
 from src.settings import settings
-from src.utils.enums import ContentType, NotificationStatus
-from src.schemas.notifications import RequestAddLogDTO
+from src.utils.enums import ContactChannelType, ContentType, NotificationStatus
+from src.db import sessionmaker
+from src.schemas.notifications import DispatchLogDTO, PendingLogDTO
+from src.utils.db_manager import DB_Manager
 from src.utils.notification_helper import NotificationHelper as NH
-from src.utils.exceptions import ForbiddenHTMLTemplateError
+from src.utils.result_sink import result_sink
+from src.utils.exceptions import (
+    ForbiddenHTMLTemplateError,
+    ProviderThrottledError,
+    ProviderUnavailableError,
+)
 
 
 logger = logging.getLogger("src.tasks.tasks")
 
+worker_runtime.add_shutdown_hook(result_sink.close)
+
+
+async def load_pending_logs(logs_data: list[dict]) -> list[PendingLogDTO]:
+    ids = [DispatchLogDTO(**log_data).id for log_data in logs_data]
+    async with DB_Manager(session_factory=sessionmaker) as db:
+        log_schemas = await db.notification_logs.get_pending_by_ids(ids)
+
+    if len(log_schemas) != len(ids):
+        logger.warning(
+            "Skipped %d notifications which are missing or already processed",
+            len(ids) - len(log_schemas),
+        )
+    return log_schemas
+
+
+async def wait_for_send_slot(provider: ContactChannelType, destination: str) -> None:
+    try:
+        limiter = await worker_runtime.get_rate_limiter()
+    except RedisError as exc:
+        logger.warning("Rate limiter is unavailable, sending anyway: %s", exc)
+        return
 
-@celery_app.task(name="send_to_telegram")
-def send_telegram_notification(log_data: dict):
-    log_schema = RequestAddLogDTO(**log_data)
-    asyncio.run(send_telegram_message(log_schema))
+    waited = await limiter.acquire(provider, destination)
+    if waited:
+        logger.info("Waited %.2fs for %s rate limit", waited, provider.value)
+
+
+async def throttle_provider(provider: ContactChannelType, retry_after: float):
+    logger.warning("%s asked to retry after %ss", provider.value, retry_after)
+    try:
+        limiter = await worker_runtime.get_rate_limiter()
+    except RedisError as exc:
+        logger.warning("Failed to pause %s sends: %s", provider.value, exc)
+    else:
+        await limiter.pause(provider, retry_after)
+    raise ProviderThrottledError(retry_after)
+
+
+PROVIDER_DOWN_ERRORS = (
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientResponseError,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPServerDisconnected,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+async def circuit_open_for(provider: ContactChannelType) -> float:
+    try:
+        breaker = await worker_runtime.get_circuit_breaker()
+    except RedisError as exc:
+        logger.warning("Circuit breaker is unavailable: %s", exc)
+        return 0.0
+    return await breaker.open_for(provider)
+
+
+@asynccontextmanager
+async def provider_circuit(provider: ContactChannelType):
+    try:
+        breaker = await worker_runtime.get_circuit_breaker()
+    except RedisError as exc:
+        logger.warning("Circuit breaker is unavailable, sending anyway: %s", exc)
+        yield
+        return
+
+    retry_after = await breaker.allow(provider)
+    if retry_after:
+        raise ProviderUnavailableError(retry_after)
+
+    try:
+        yield
+    except PROVIDER_DOWN_ERRORS:
+        await breaker.record_failure(provider)
+        raise
+    await breaker.record_success(provider)
+
+
+@celery_app.task(bind=True, name="send_to_telegram")
+def send_telegram_notification(self, log_data: dict):
+    log_schemas = worker_runtime.run(load_pending_logs([log_data]))
+    if not log_schemas:
+        return
+    try:
+        worker_runtime.run(send_telegram_message(log_schemas[0]))
+    except ProviderThrottledError as exc:
+        self.apply_async(args=(log_data,), countdown=exc.retry_after)
 
 
 async def send_telegram_message(
-    log_schema: RequestAddLogDTO,
+    log_schema: PendingLogDTO,
     status: NotificationStatus = NotificationStatus.FAILURE,
     details: str | None = None,
 ):
@@ -38,7 +131,11 @@ async def send_telegram_message(
         if NH.detect_content_type(log_schema.message) == ContentType.HTML:
             raise ForbiddenHTMLTemplateError
 
-        async with aiohttp.ClientSession() as session:
+        async with provider_circuit(ContactChannelType.TELEGRAM):
+            await wait_for_send_slot(
+                ContactChannelType.TELEGRAM, log_schema.contact_data
+            )
+            session = await worker_runtime.get_http_session(ContactChannelType.TELEGRAM)
             async with session.post(url=bot_message_method_url, json=body) as response:
                 if response.status == 200:
                     status = NotificationStatus.SUCCESS
@@ -46,9 +143,19 @@ async def send_telegram_message(
                         "Successfully sent telegram message to: %s",
                         log_schema.contact_data,
                     )
-                    return
+                    return status
+                if response.status >= 500:
+                    response.raise_for_status()
 
                 data = await response.json()
+                if response.status == 429:
+                    await throttle_provider(
+                        ContactChannelType.TELEGRAM,
+                        data.get("parameters", {}).get(
+                            "retry_after", settings.THROTTLE_DEFAULT_RETRY_AFTER
+                        ),
+                    )
+
                 details = data.get("description")
                 logger.warning(
                     "Failure during sending telegram message to: %s, response: %s",
@@ -59,16 +166,21 @@ async def send_telegram_message(
     except ForbiddenHTMLTemplateError:
         details = "HTML templates are not supported for Telegram notifications"
         logger.error(details)
+    except ProviderThrottledError:
+        status = NotificationStatus.PENDING
+        raise
     except Exception as exc:
         details = f"Unexpected Error: {str(exc)}"
         logger.error("Unexpected error during telegram notification sending: %s", exc)
         raise exc
 
     finally:
-        await NH(log_schema).log_result(status=status, details=details)
+        if status != NotificationStatus.PENDING:
+            await NH(log_schema).log_result(status=status, details=details)
+    return status
 
 
-async def _send_email_message(log_schema: RequestAddLogDTO):
+async def _send_email_message(log_schema: PendingLogDTO):
     message = MIMEMultipart("alternative")
     message["Subject"] = settings.APP_NAME
     message["From"] = settings.SMTP_USER
@@ -81,19 +193,26 @@ async def _send_email_message(log_schema: RequestAddLogDTO):
 
     msg_ = message.as_string()
 
-    response = await aiosmtplib.send(
-        msg_,
-        sender=settings.SMTP_USER,
-        recipients=[log_schema.contact_data],
-        username=settings.SMTP_USER,
-        password=settings.SMTP_PASSWORD,
-        use_tls=True,
-        hostname=settings.SMTP_HOST,
-        port=settings.SMTP_PORT,
-    )
+    async with provider_circuit(ContactChannelType.EMAIL):
+        await wait_for_send_slot(ContactChannelType.EMAIL, log_schema.contact_data)
+        response = await worker_runtime.get_smtp_pool().sendmail(
+            sender=settings.SMTP_USER,
+            recipients=[log_schema.contact_data],
+            message=msg_,
+        )
     return response
 
 
+SMTP_RETRYABLE_ERRORS = (
+    aiosmtplib.SMTPAuthenticationError,
+    aiosmtplib.SMTPRecipientsRefused,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPServerDisconnected,
+    TimeoutError,
+    ConnectionAbortedError,
+)
+
+
 @celery_app.task(
     bind=True,
     max_retries=3,
@@ -101,13 +220,19 @@ async def _send_email_message(log_schema: RequestAddLogDTO):
     default_retry_delay=10,
 )
 def send_email_notification(self, log_data: dict):
-    log_schema = RequestAddLogDTO(**log_data)
-    asyncio.run(send_email(self, log_schema))
+    log_schemas = worker_runtime.run(load_pending_logs([log_data]))
+    if not log_schemas:
+        return
+    try:
+        worker_runtime.run(send_email(log_schemas[0]))
+    except ProviderThrottledError as exc:
+        self.apply_async(args=(log_data,), countdown=exc.retry_after)
+    except SMTP_RETRYABLE_ERRORS as exc:
+        raise self.retry(exc=exc, countdown=self.request.retries * 2)
 
 
 async def send_email(
-    self,
-    log_schema: RequestAddLogDTO,
+    log_schema: PendingLogDTO,
     status: NotificationStatus = NotificationStatus.FAILURE,
     details: str | None = None,
 ):
@@ -119,32 +244,35 @@ async def send_email(
     except aiosmtplib.SMTPAuthenticationError as exc:
         details = f"Auth Error: {exc}"
         logger.error("Failed authentication to SMTP server: %s", exc)
-        raise self.retry(exc=exc, countdown=self.request.retries * 2)
+        raise
 
     except aiosmtplib.SMTPRecipientsRefused as exc:
         details = f"Recipients Refused: {exc}"
         logger.error("Failed to send email to recipients: %s", exc)
-        raise self.retry(exc=exc, countdown=self.request.retries * 2)
+        raise
 
     except aiosmtplib.SMTPConnectError as exc:
         details = f"SMTP Connect Error: {exc}"
         logger.error("Failed to connect to the SMTP server: %s", exc)
-        raise self.retry(exc=exc, countdown=self.request.retries * 2)
+        raise
 
     except aiosmtplib.SMTPServerDisconnected as exc:
         details = f"Server Disconnected: {exc}"
         logger.error("Server disconnected: %s", exc)
-        raise self.retry(exc=exc, countdown=self.request.retries * 2)
+        raise
 
     except TimeoutError as exc:
         details = f"Timeout Error: {exc}"
         logger.error("Time for connection is out: %s", exc)
-        raise self.retry(exc=exc, countdown=self.request.retries * 2)
+        raise
 
     except ConnectionAbortedError as exc:
         details = f"Connection Aborted: {exc}"
         logger.error("Connection to SMTP was aborted: %s", exc)
-        raise self.retry(exc=exc, countdown=self.request.retries * 2)
+        raise
+
+    except ProviderThrottledError:
+        raise
 
     except Exception as exc:
         details = f"Unexpected Error: {exc}"
@@ -152,16 +280,22 @@ async def send_email(
         raise
 
     await NH(log_schema).log_result(status=status, details=details)
+    return status
 
 
-@celery_app.task(name="send_push")
-def send_push_notification(log_data: dict):
-    log_schema = RequestAddLogDTO(**log_data)
-    asyncio.run(send_push(log_schema))
+@celery_app.task(bind=True, name="send_push")
+def send_push_notification(self, log_data: dict):
+    log_schemas = worker_runtime.run(load_pending_logs([log_data]))
+    if not log_schemas:
+        return
+    try:
+        worker_runtime.run(send_push(log_schemas[0]))
+    except ProviderThrottledError as exc:
+        self.apply_async(args=(log_data,), countdown=exc.retry_after)
 
 
 async def send_push(
-    log_schema: RequestAddLogDTO,
+    log_schema: PendingLogDTO,
     status: NotificationStatus = NotificationStatus.FAILURE,
     details: str | None = None,
 ):
@@ -172,7 +306,9 @@ async def send_push(
         if NH.detect_content_type(log_schema.message) == ContentType.HTML:
             raise ForbiddenHTMLTemplateError
 
-        async with aiohttp.ClientSession() as session:
+        async with provider_circuit(ContactChannelType.PUSH):
+            await wait_for_send_slot(ContactChannelType.PUSH, log_schema.contact_data)
+            session = await worker_runtime.get_http_session(ContactChannelType.PUSH)
             async with session.post(
                 url=ntfy_url_with_topic,
                 data=log_schema.message.encode("utf-8"),
@@ -185,8 +321,21 @@ async def send_push(
                         log_schema.contact_data,
                     )
                     await response.json()
-                    return
+                    return status
+                if response.status >= 500:
+                    response.raise_for_status()
+
+                if response.status == 429:
+                    await throttle_provider(
+                        ContactChannelType.PUSH,
+                        float(
+                            response.headers.get(
+                                "Retry-After", settings.THROTTLE_DEFAULT_RETRY_AFTER
+                            )
+                        ),
+                    )
 
+                details = f"HTTP {response.status}"
                 logger.warning(
                     "Failure during sending telegram message to: %s",
                     ntfy_url_with_topic,
@@ -195,23 +344,136 @@ async def send_push(
     except ForbiddenHTMLTemplateError:
         details = "HTML templates are not supported for Push notifications"
         logger.error(details)
+    except ProviderThrottledError:
+        status = NotificationStatus.PENDING
+        raise
     except Exception as exc:
         details = f"Unexpected Error: {str(exc)}"
         logger.error("Unexpected error during email sending: %s", exc)
         raise exc
 
     finally:
-        await NH(log_schema).log_result(status=status, details=details)
+        if status != NotificationStatus.PENDING:
+            await NH(log_schema).log_result(status=status, details=details)
+    return status
+
+
+SENDERS = {
+    ContactChannelType.EMAIL: send_email,
+    ContactChannelType.TELEGRAM: send_telegram_message,
+    ContactChannelType.PUSH: send_push,
+}
+
+
+@celery_app.task(
+    bind=True,
+    max_retries=3,
+    name="send_batch",
+    default_retry_delay=10,
+)
+def send_notifications_batch(self, provider_name: str, logs_data: list[dict]):
+    provider = ContactChannelType(provider_name)
+    open_for = worker_runtime.run(circuit_open_for(provider))
+    if open_for:
+        logger.warning(
+            "Circuit for %s is open, deferring %d notifications for %ss",
+            provider.value,
+            len(logs_data),
+            open_for,
+        )
+        self.apply_async(args=(provider_name, logs_data), countdown=open_for)
+        return []
+
+    can_retry = self.request.retries < self.max_retries
+    results, to_retry, throttled, retry_after = worker_runtime.run(
+        send_batch(provider, logs_data, can_retry=can_retry)
+    )
+
+    if throttled:
+        logger.warning(
+            "Redelivering %d %s notifications in %ss",
+            len(throttled),
+            provider.value,
+            retry_after,
+        )
+        self.apply_async(
+            args=(
+                provider_name,
+                [DispatchLogDTO.model_validate(log).model_dump() for log in throttled],
+            ),
+            countdown=retry_after,
+        )
+
+    if to_retry:
+        logger.warning(
+            "Retrying %d of %d %s notifications from batch",
+            len(to_retry),
+            len(logs_data),
+            provider.value,
+        )
+        raise self.retry(
+            args=(
+                provider_name,
+                [DispatchLogDTO.model_validate(log).model_dump() for log in to_retry],
+            ),
+            countdown=self.request.retries * 2,
+        )
+    return results
+
+
+async def send_batch(
+    provider: ContactChannelType,
+    logs_data: list[dict],
+    can_retry: bool = False,
+) -> tuple[list[dict], list[PendingLogDTO], list[PendingLogDTO], float]:
+    log_schemas = await load_pending_logs(logs_data)
+    semaphore = asyncio.Semaphore(settings.NOTIFICATIONS_BATCH_CONCURRENCY)
+    sender = SENDERS[provider]
+
+    async def _send(log_schema: PendingLogDTO):
+        async with semaphore:
+            return await sender(log_schema)
+
+    outcomes = await asyncio.gather(
+        *[_send(log_schema) for log_schema in log_schemas], return_exceptions=True
+    )
+
+    results, to_retry, throttled, retry_after = [], [], [], 0.0
+    for log_schema, outcome in zip(log_schemas, outcomes):
+        if isinstance(outcome, ProviderThrottledError):
+            throttled.append(log_schema)
+            retry_after = max(retry_after, outcome.retry_after)
+            outcome = NotificationStatus.PENDING
+        elif isinstance(outcome, SMTP_RETRYABLE_ERRORS) and can_retry:
+            to_retry.append(log_schema)
+            outcome = NotificationStatus.PENDING
+        elif isinstance(outcome, SMTP_RETRYABLE_ERRORS):
+            await NH(log_schema).log_result(details=f"Retries exceeded: {outcome}")
+            outcome = NotificationStatus.FAILURE
+        elif isinstance(outcome, BaseException):
+            if log_schema.status == NotificationStatus.PENDING:
+                await NH(log_schema).log_result(details=f"Unexpected Error: {outcome}")
+            outcome = NotificationStatus.FAILURE
+        results.append({"id": log_schema.id, "status": outcome.value})
+
+    logger.info(
+        "Processed batch of %d %s notifications, %d to retry, %d throttled",
+        len(log_schemas),
+        provider.value,
+        len(to_retry),
+        len(throttled),
+    )
+    return results, to_retry, throttled, retry_after
 
 
 # @celery_app.task(name="send_sms")
 # def send_sms_notification(log_data: dict):
-#     log_schema = RequestAddLogDTO(**log_data)
+#     log_schema = PendingLogDTO(**log_data)
 #     asyncio.run(send_sms(log_schema))
 
 
 # async def send_sms(
-#     log_schema: RequestAddLogDTO,
+#     log_schema: PendingLogDTO,
 #     status: NotificationStatus = NotificationStatus.FAILURE,
 #     details: str | None = None,
 # ):
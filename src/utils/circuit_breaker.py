@@ -0,0 +1,136 @@
+import logging
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.utils.enums import ContactChannelType
+
+
+logger = logging.getLogger("src.utils.circuit_breaker")
+
+
+ALLOW_SCRIPT = """
+local open = redis.call('PTTL', KEYS[1])
+if open > 0 then
+    return open
+end
+
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    local probes = redis.call('INCR', KEYS[3])
+    if probes == 1 then
+        redis.call('PEXPIRE', KEYS[3], ARGV[2])
+    end
+    if probes > tonumber(ARGV[1]) then
+        return math.max(1, redis.call('PTTL', KEYS[3]))
+    end
+end
+return 0
+"""
+
+FAILURE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+
+local failures = 0
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    failures = redis.call('INCR', KEYS[4])
+    if failures == 1 then
+        redis.call('PEXPIRE', KEYS[4], ARGV[2])
+    end
+end
+
+if redis.call('EXISTS', KEYS[2]) == 1 or failures >= tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[1], 1, 'PX', ARGV[3])
+    redis.call('SET', KEYS[2], 1)
+    redis.call('DEL', KEYS[3], KEYS[4])
+    return 1
+end
+return 0
+"""
+
+SUCCESS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+local closed = redis.call('DEL', KEYS[2])
+redis.call('DEL', KEYS[3], KEYS[4])
+return closed
+"""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        redis: Redis,
+        failure_threshold: int,
+        failure_window: float,
+        recovery_timeout: float,
+        half_open_probes: int,
+        prefix: str = "notihub:breaker",
+    ):
+        self.redis = redis
+        self.failure_threshold = failure_threshold
+        self.failure_window_ms = int(failure_window * 1000)
+        self.recovery_timeout_ms = int(recovery_timeout * 1000)
+        self.half_open_probes = half_open_probes
+        self.prefix = prefix
+        self._allow_script = redis.register_script(ALLOW_SCRIPT)
+        self._failure_script = redis.register_script(FAILURE_SCRIPT)
+        self._success_script = redis.register_script(SUCCESS_SCRIPT)
+
+    def _keys(self, provider: ContactChannelType) -> list[str]:
+        return [
+            f"{self.prefix}:{provider.value}:{name}"
+            for name in ("open", "tripped", "probes", "failures")
+        ]
+
+    async def open_for(self, provider: ContactChannelType) -> float:
+        try:
+            open_ms = await self.redis.pttl(self._keys(provider)[0])
+        except RedisError as exc:
+            logger.warning("Circuit breaker is unavailable: %s", exc)
+            return 0.0
+        return max(0, open_ms) / 1000
+
+    async def allow(self, provider: ContactChannelType) -> float:
+        try:
+            wait_ms = await self._allow_script(
+                keys=self._keys(provider)[:3],
+                args=[self.half_open_probes, self.recovery_timeout_ms],
+            )
+        except RedisError as exc:
+            logger.warning("Circuit breaker is unavailable, sending anyway: %s", exc)
+            return 0.0
+        return int(wait_ms) / 1000
+
+    async def record_failure(self, provider: ContactChannelType) -> None:
+        try:
+            opened = await self._failure_script(
+                keys=self._keys(provider),
+                args=[
+                    self.failure_threshold,
+                    self.failure_window_ms,
+                    self.recovery_timeout_ms,
+                ],
+            )
+        except RedisError as exc:
+            logger.warning("Failed to record %s failure: %s", provider.value, exc)
+            return
+
+        if opened:
+            logger.error(
+                "Circuit for %s is open for %ss",
+                provider.value,
+                self.recovery_timeout_ms / 1000,
+            )
+
+    async def record_success(self, provider: ContactChannelType) -> None:
+        try:
+            closed = await self._success_script(keys=self._keys(provider))
+        except RedisError as exc:
+            logger.warning("Failed to record %s success: %s", provider.value, exc)
+            return
+
+        if closed:
+            logger.info("Circuit for %s is closed again", provider.value)
@@ -0,0 +1,55 @@
+from datetime import datetime
+from functools import lru_cache
+from threading import Lock
+from typing import Sequence
+
+from croniter import croniter
+
+from src.settings import settings
+
+
+_lock = Lock()
+
+
+@lru_cache(maxsize=settings.CRON_CACHE_SIZE)
+def compile_crontab(expression: str) -> croniter:
+    return croniter(expression)
+
+
+def is_valid_crontab(expression: str) -> bool:
+    try:
+        compile_crontab(expression)
+    except ValueError:
+        return False
+    return True
+
+
+def next_fire_time(expression: str, start: datetime) -> datetime:
+    return next_fire_times(expression, [start])[0]
+
+
+def next_fire_times(expression: str, starts: Sequence[datetime]) -> list[datetime]:
+    cron = compile_crontab(expression)
+    result = list(starts)
+    fire_at: datetime | None = None
+
+    with _lock:
+        for i in sorted(range(len(starts)), key=starts.__getitem__):
+            if fire_at is None or fire_at <= starts[i]:
+                fire_at = cron.get_next(
+                    datetime, start_time=starts[i], update_current=False
+                )
+            result[i] = fire_at
+    return result
+
+
+def last_fire_times(expression: str, end: datetime, limit: int) -> list[datetime]:
+    cron = compile_crontab(expression)
+    fire_times: list[datetime] = []
+    fire_at = end
+
+    with _lock:
+        for _ in range(limit):
+            fire_at = cron.get_prev(datetime, start_time=fire_at, update_current=False)
+            fire_times.append(fire_at)
+    return fire_times[::-1]
@@ -1,10 +1,13 @@
 from sqlalchemy import text
 
 from src.repos.templates import TemplateRepository
+from src.repos.bodies import MessageBodyRepository
 from src.repos.categories import CategoryRepository
 from src.repos.users import UserRepository
 from src.repos.channels import ChannelRepository
+from src.repos.jobs import MassSendJobRepository, MassSendRecipientRepository
 from src.repos.notifications import NotificationLogRepository
+from src.repos.outbox import OutboxRepository
 from src.repos.scheudles import ScheduleRepository
 
 
@@ -19,7 +22,11 @@ class DB_Manager:
         self.users = UserRepository(self.session)
         self.channels = ChannelRepository(self.session)
         self.notification_logs = NotificationLogRepository(self.session)
+        self.outbox = OutboxRepository(self.session)
+        self.mass_send_jobs = MassSendJobRepository(self.session)
+        self.mass_send_recipients = MassSendRecipientRepository(self.session)
         self.schedules = ScheduleRepository(self.session)
+        self.message_bodies = MessageBodyRepository(self.session)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -31,6 +38,8 @@ class DB_Manager:
 
     async def commit(self):
         await self.session.commit()
+        await self.schedules.sync_index()
 
     async def rollback(self):
         await self.session.rollback()
+        self.schedules.discard_index_changes()
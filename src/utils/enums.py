@@ -24,6 +24,26 @@ class ScheduleType(str, Enum):
     RECURRING = "RECURRING"
 
 
+class MisfirePolicy(str, Enum):
+    FIRE_ONCE = "FIRE_ONCE"
+    FIRE_ALL = "FIRE_ALL"
+    SKIP = "SKIP"
+
+
+class BroadcastAudience(str, Enum):
+    ALL = "ALL"
+    EMAIL = "EMAIL"
+    TELEGRAM = "TELEGRAM"
+    PUSH = "PUSH"
+
+
+class MassSendJobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
 class ContentType(str, Enum):
     PLAIN = "plain"
     HTML = "html"
@@ -44,6 +44,10 @@ class ScheduleAlreadyExistsError(NotiHubBaseError):
     pass
 
 
+class MassSendJobNotFoundError(ObjectNotFoundError):
+    pass
+
+
 class ObjectExistsError(NotiHubBaseError):
     pass
 
@@ -100,6 +104,26 @@ class ForbiddenHTMLTemplateError(NotiHubBaseError):
     pass
 
 
+class UnsupportedRecipientsFormatError(NotiHubBaseError):
+    detail = "Поддерживаются только списки получателей в формате NDJSON и CSV"
+
+
+class SchedulerMetricsUnavailableError(NotiHubBaseError):
+    detail = "Метрики планировщика временно недоступны"
+
+
+class ProviderThrottledError(NotiHubBaseError):
+    detail = "Провайдер ограничил частоту отправки"
+
+    def __init__(self, retry_after: float, detail: str | None = None):
+        self.retry_after = retry_after
+        super().__init__(detail)
+
+
+class ProviderUnavailableError(ProviderThrottledError):
+    detail = "Провайдер временно недоступен"
+
+
 #########################################
 
 
@@ -230,6 +254,10 @@ class ScheduleNotFoundHTTPError(ObjectNotFoundHTTPError):
     detail = "Расписание не найдено"
 
 
+class MassSendJobNotFoundHTTPError(ObjectNotFoundHTTPError):
+    detail = "Задача рассылки не найдена"
+
+
 class ScheduleAlreadyExistsHTTPError(ObjectExistsHTTPError):
     status_code = status.HTTP_409_CONFLICT
     detail = "Расписание уже существует"
@@ -243,3 +271,13 @@ class InvalidDatetimeRangeHTTPError(NotiHubBaseHTTPError):
 class ForbiddenHTMLTemplateHTTPError(NotiHubBaseHTTPError):
     status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
     detail = "Шаблон HTML запрещен"
+
+
+class UnsupportedRecipientsFormatHTTPError(NotiHubBaseHTTPError):
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    detail = "Поддерживаются только списки получателей в формате NDJSON и CSV"
+
+
+class SchedulerMetricsUnavailableHTTPError(NotiHubBaseHTTPError):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    detail = "Метрики планировщика временно недоступны"
@@ -1,10 +1,10 @@
 import re
 import logging
+from datetime import datetime, timezone
 
-from src.utils.db_manager import DB_Manager
 from src.utils.enums import ContentType, NotificationStatus
-from src.schemas.notifications import AddLogDTO, RequestAddLogDTO
-from src.db import sessionmaker_null_pool
+from src.utils.result_sink import result_sink
+from src.schemas.notifications import LogResultDTO, PendingLogDTO
 
 
 logger = logging.getLogger("src.utils.notigfication_helper")
@@ -13,27 +13,24 @@ logger = logging.getLogger("src.utils.notigfication_helper")
 class NotificationHelper:
     def __init__(
         self,
-        log_schema: RequestAddLogDTO,
+        log_schema: PendingLogDTO,
     ):
         self.log_schema = log_schema
 
-    async def _insert_result_into_database(self, data: AddLogDTO):
-        async with DB_Manager(session_factory=sessionmaker_null_pool) as db:
-            await db.notification_logs.add_or_edit(data)
-            await db.commit()
-
     async def log_result(
         self,
         status: NotificationStatus = NotificationStatus.FAILURE,
         details: str | None = None,
     ):
         self.log_schema.status = status
-        new_log_schema = AddLogDTO(
-            **self.log_schema.model_dump(),
+        result = LogResultDTO(
+            id=self.log_schema.id,
+            status=status,
             details=details,
+            delivered_at=datetime.now(timezone.utc),
         )
-        logger.info("New log, after sending notification: %s", new_log_schema)
-        await self._insert_result_into_database(new_log_schema)
+        logger.info("New log, after sending notification: %s", result)
+        await result_sink.put(result)
 
     @staticmethod
     def detect_content_type(text: str) -> ContentType:
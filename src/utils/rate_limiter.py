@@ -0,0 +1,115 @@
+import asyncio
+import logging
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.utils.enums import ContactChannelType
+
+
+logger = logging.getLogger("src.utils.rate_limiter")
+
+
+TOKEN_BUCKET_SCRIPT = """
+local paused = redis.call('PTTL', KEYS[1])
+if paused > 0 then
+    return paused
+end
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local wait = 0
+local tokens = {}
+
+for i = 2, #KEYS do
+    local key = KEYS[i]
+    local rate = tonumber(ARGV[i * 2 - 3])
+    local capacity = tonumber(ARGV[i * 2 - 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    available = math.min(capacity, available + math.max(0, now - ts) * rate / 1000)
+    if available < 1 then
+        wait = math.max(wait, math.ceil((1 - available) * 1000 / rate))
+    end
+    tokens[i] = available
+end
+
+for i = 2, #KEYS do
+    local key = KEYS[i]
+    local rate = tonumber(ARGV[i * 2 - 3])
+    local capacity = tonumber(ARGV[i * 2 - 2])
+    if wait == 0 then
+        tokens[i] = tokens[i] - 1
+    end
+    redis.call('HSET', key, 'tokens', tokens[i], 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity * 1000 / rate) + 1000)
+end
+
+return wait
+"""
+
+PAUSE_SCRIPT = """
+if redis.call('PTTL', KEYS[1]) < tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[1], 1, 'PX', ARGV[1])
+end
+"""
+
+
+class TokenBucketRateLimiter:
+    def __init__(
+        self,
+        redis: Redis,
+        limits: dict[str, dict[str, tuple[float, int] | None]],
+        prefix: str = "notihub:ratelimit",
+    ):
+        self.redis = redis
+        self.limits = limits
+        self.prefix = prefix
+        self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self._pause_script = redis.register_script(PAUSE_SCRIPT)
+
+    def _buckets(
+        self, provider: ContactChannelType, destination: str
+    ) -> tuple[list[str], list[float]]:
+        keys, args = [self._pause_key(provider)], []
+        limits = self.limits.get(provider.value, {})
+
+        global_limit = limits.get("global")
+        if global_limit is not None:
+            keys.append(f"{self.prefix}:{provider.value}")
+            args.extend(global_limit)
+
+        destination_limit = limits.get("destination")
+        if destination_limit is not None:
+            keys.append(f"{self.prefix}:{provider.value}:{destination}")
+            args.extend(destination_limit)
+        return keys, args
+
+    def _pause_key(self, provider: ContactChannelType) -> str:
+        return f"{self.prefix}:pause:{provider.value}"
+
+    async def pause(self, provider: ContactChannelType, seconds: float) -> None:
+        milliseconds = max(1, int(seconds * 1000))
+        try:
+            await self._pause_script(
+                keys=[self._pause_key(provider)], args=[milliseconds]
+            )
+        except RedisError as exc:
+            logger.warning("Failed to pause %s sends: %s", provider.value, exc)
+
+    async def acquire(self, provider: ContactChannelType, destination: str) -> float:
+        keys, args = self._buckets(provider, destination)
+
+        waited = 0.0
+        while True:
+            try:
+                wait_ms = int(await self._script(keys=keys, args=args))
+            except RedisError as exc:
+                logger.warning("Rate limiter is unavailable, sending anyway: %s", exc)
+                return waited
+
+            if wait_ms <= 0:
+                return waited
+            waited += wait_ms / 1000
+            await asyncio.sleep(wait_ms / 1000)
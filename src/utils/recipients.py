@@ -0,0 +1,110 @@
+import csv
+import json
+from typing import AsyncIterable, AsyncIterator, Iterable, TypeVar
+
+from jinja2 import TemplateError
+
+from src.utils.exceptions import UnsupportedRecipientsFormatError
+from src.utils.template_cache import CompiledTemplate
+
+
+RECIPIENT_KEY = "user_id"
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl")
+CSV_CONTENT_TYPES = ("text/csv",)
+
+T = TypeVar("T")
+Recipient = tuple[int, dict[str, str]]
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    tail = b""
+    async for chunk in chunks:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line.rstrip(b"\r").decode("utf-8")
+    if tail.strip():
+        yield tail.rstrip(b"\r").decode("utf-8")
+
+
+async def iter_ndjson_rows(lines: AsyncIterable[str]) -> AsyncIterator[dict | None]:
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        yield row if isinstance(row, dict) else None
+
+
+async def iter_csv_rows(lines: AsyncIterable[str]) -> AsyncIterator[dict | None]:
+    header: list[str] | None = None
+    record: list[str] = []
+    quotes = 0
+
+    async for line in lines:
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+
+        values = next(csv.reader(["\n".join(record)]), [])
+        record, quotes = [], 0
+        if not values:
+            continue
+        if header is None:
+            header = values
+            continue
+        yield dict(zip(header, values)) if len(values) == len(header) else None
+
+
+async def iter_recipients(
+    chunks: AsyncIterable[bytes], content_type: str
+) -> AsyncIterator[Recipient | None]:
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in NDJSON_CONTENT_TYPES:
+        rows = iter_ndjson_rows(iter_lines(chunks))
+    elif media_type in CSV_CONTENT_TYPES:
+        rows = iter_csv_rows(iter_lines(chunks))
+    else:
+        raise UnsupportedRecipientsFormatError
+
+    async for row in rows:
+        try:
+            user_id = int(row.pop(RECIPIENT_KEY))  # type: ignore
+        except (AttributeError, KeyError, TypeError, ValueError):
+            yield None
+            continue
+        yield user_id, {key: str(value) for key, value in row.items()}  # type: ignore
+
+
+async def chunked(items: AsyncIterable[T], size: int) -> AsyncIterator[list[T]]:
+    chunk: list[T] = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_messages(
+    compiled: CompiledTemplate,
+    variables: dict[str, str],
+    recipients: Iterable[Recipient],
+) -> tuple[dict[int, str], int]:
+    messages: dict[int, str] = {}
+    skipped = 0
+    for user_id, user_variables in recipients:
+        context = {**variables, **user_variables}
+        if compiled.variables - context.keys():
+            skipped += 1
+            continue
+        try:
+            messages[user_id] = compiled.template.render(**context)
+        except TemplateError:
+            skipped += 1
+    return messages, skipped
@@ -1,5 +1,7 @@
+import asyncio
 import pickle
 from typing import Any
+from weakref import WeakKeyDictionary
 
 from redis.asyncio import Redis
 
@@ -10,9 +12,24 @@ class RedisManager:
     def __init__(self, host: str, port: int):
         self.host = host
         self.port = port
+        self._clients: WeakKeyDictionary[asyncio.AbstractEventLoop, Redis] = (
+            WeakKeyDictionary()
+        )
+
+    def _new_client(self) -> Redis:
+        # Replies stay bytes on every path: the cache stores pickled values.
+        return Redis(host=self.host, port=self.port)
+
+    def client(self) -> Redis:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._new_client()
+            self._clients[loop] = client
+        return client
 
     async def connect(self) -> Redis:
-        self._redis = Redis(host=self.host, port=self.port)
+        self._redis = self._new_client()
         await self._redis.ping()
         return self._redis
 
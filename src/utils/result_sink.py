@@ -0,0 +1,84 @@
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.db import sessionmaker
+from src.settings import settings
+from src.schemas.notifications import LogResultDTO
+from src.utils.db_manager import DB_Manager
+
+
+logger = logging.getLogger("src.utils.result_sink")
+
+
+class DeliveryResultSink:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        max_items: int,
+        flush_interval_ms: int,
+    ):
+        self.session_factory = session_factory
+        self.max_items = max_items
+        self.flush_interval = flush_interval_ms / 1000
+
+        self._buffer: dict[int, LogResultDTO] = {}
+        self._flush_lock: asyncio.Lock | None = None
+        self._timer: asyncio.Task | None = None
+
+    async def put(self, result: LogResultDTO) -> None:
+        self._buffer[result.id] = result
+        if len(self._buffer) >= self.max_items:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        await asyncio.shield(self.flush())
+
+    async def flush(self) -> None:
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, {}
+
+            try:
+                async with DB_Manager(session_factory=self.session_factory) as db:
+                    await db.notification_logs.update_results_bulk(list(batch.values()))
+                    await db.commit()
+            except Exception as exc:
+                logger.error(
+                    "Failed to flush %d delivery results, will retry: %s",
+                    len(batch),
+                    exc,
+                )
+                self._buffer = batch | self._buffer
+                if self._timer is None:
+                    self._timer = asyncio.create_task(self._flush_later())
+                return
+
+            logger.info("Flushed %d delivery results", len(batch))
+
+    async def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+        if self._buffer:
+            logger.error(
+                "Worker is shutting down with %d unsaved delivery results",
+                len(self._buffer),
+            )
+
+
+result_sink = DeliveryResultSink(
+    session_factory=sessionmaker,
+    max_items=settings.RESULT_SINK_MAX_ITEMS,
+    flush_interval_ms=settings.RESULT_SINK_FLUSH_INTERVAL_MS,
+)
@@ -0,0 +1,167 @@
+import heapq
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from itertools import chain
+from typing import AsyncIterator, Collection, Iterable
+
+from redis.exceptions import RedisError
+
+from src.settings import settings
+from src.utils.redis_manager import RedisManager, redis_manager
+
+
+logger = logging.getLogger("src.utils.schedule_index")
+
+# schedule id -> (channel_id, next_execution_at)
+IndexUpserts = dict[int, tuple[int | None, datetime | None]]
+
+
+class ScheduleIndex:
+    def __init__(
+        self, redis: RedisManager, key: str, shards: int = 1, enabled: bool = True
+    ):
+        self.redis = redis
+        self.key = key
+        self.shards = shards
+        self.enabled = enabled
+
+    def shard_of(self, schedule_id: int, channel_id: int | None) -> int:
+        # the same split as shard_filter: coalesce(channel_id, id) % shards
+        return (schedule_id if channel_id is None else channel_id) % self.shards
+
+    def shard_key(self, shard: int) -> str:
+        return f"{self.key}:{shard}"
+
+    def _shard_keys(self, shards: Collection[int] | None = None) -> list[str]:
+        if shards is None:
+            shards = range(self.shards)
+        return [self.shard_key(shard) for shard in sorted(shards)]
+
+    async def apply(self, upserts: IndexUpserts, removals: Iterable[int] = ()) -> None:
+        to_add: dict[str, dict[str, float]] = defaultdict(dict)
+        to_remove = [str(schedule_id) for schedule_id in removals]
+        for schedule_id, (channel_id, next_execution_at) in upserts.items():
+            if next_execution_at is None:
+                to_remove.append(str(schedule_id))
+                continue
+            key = self.shard_key(self.shard_of(schedule_id, channel_id))
+            to_add[key][str(schedule_id)] = next_execution_at.timestamp()
+
+        if not to_add and not to_remove:
+            return
+        async with self.redis.client().pipeline(transaction=False) as pipe:
+            for key, members in to_add.items():
+                pipe.zadd(key, members)
+            if to_remove:
+                for key in self._shard_keys():
+                    pipe.zrem(key, *to_remove)
+            await pipe.execute()
+
+    async def _smallest(
+        self, limit: int, shards: Collection[int] | None, max_score: float | str
+    ) -> list[tuple[bytes, float]]:
+        async with self.redis.client().pipeline(transaction=False) as pipe:
+            for key in self._shard_keys(shards):
+                pipe.zrangebyscore(
+                    key, "-inf", max_score, start=0, num=limit, withscores=True
+                )
+            results = await pipe.execute()
+        return heapq.nsmallest(
+            limit, chain.from_iterable(results), key=lambda member: member[1]
+        )
+
+    async def due_ids(
+        self, now: datetime, limit: int, shards: Collection[int] | None = None
+    ) -> list[int]:
+        members = await self._smallest(limit, shards, now.timestamp())
+        return [int(member) for member, _ in members]
+
+    async def upcoming(
+        self, limit: int, shards: Collection[int] | None = None
+    ) -> list[datetime]:
+        members = await self._smallest(limit, shards, "+inf")
+        return [datetime.fromtimestamp(score, tz=timezone.utc) for _, score in members]
+
+    async def scores(
+        self, entries: Iterable[tuple[int, int | None]]
+    ) -> list[float | None]:
+        async with self.redis.client().pipeline(transaction=False) as pipe:
+            for schedule_id, channel_id in entries:
+                key = self.shard_key(self.shard_of(schedule_id, channel_id))
+                pipe.zscore(key, str(schedule_id))
+            return await pipe.execute()
+
+    async def scan_ids(
+        self, count: int = 10000
+    ) -> AsyncIterator[tuple[int, list[int]]]:
+        for shard in range(self.shards):
+            cursor = 0
+            while True:
+                cursor, members = await self.redis.client().zscan(
+                    self.shard_key(shard), cursor=cursor, count=count
+                )
+                yield shard, [int(member) for member, _ in members]
+                if cursor == 0:
+                    break
+
+    async def rebuild(
+        self, chunks: AsyncIterator[list[tuple[int, int | None, datetime]]]
+    ) -> int:
+        # Rebuilding in place keeps the writes that safe_apply makes meanwhile:
+        # chunks are added to the live keys and only members that are gone from
+        # Postgres or sit in another shard's key are removed afterwards.
+        known_shards: dict[int, int] = {}
+        max_id = 0
+        async for chunk in chunks:
+            if chunk:
+                await self.apply(
+                    {
+                        schedule_id: (channel_id, ts)
+                        for schedule_id, channel_id, ts in chunk
+                    }
+                )
+                known_shards.update(
+                    (schedule_id, self.shard_of(schedule_id, channel_id))
+                    for schedule_id, channel_id, _ in chunk
+                )
+                max_id = chunk[-1][0]
+
+        async for shard, stale in self.stale_ids(known_shards, max_id):
+            await self.remove(shard, stale)
+        return len(known_shards)
+
+    async def stale_ids(
+        self, known_shards: dict[int, int], max_id: int
+    ) -> AsyncIterator[tuple[int, list[int]]]:
+        # Ids above max_id may have been added after Postgres was read.
+        async for shard, ids in self.scan_ids():
+            stale = [
+                schedule_id
+                for schedule_id in ids
+                if known_shards.get(schedule_id, shard) != shard
+                or (schedule_id not in known_shards and schedule_id <= max_id)
+            ]
+            if stale:
+                yield shard, stale
+
+    async def remove(self, shard: int, ids: Iterable[int]) -> None:
+        await self.redis.client().zrem(
+            self.shard_key(shard), *[str(schedule_id) for schedule_id in ids]
+        )
+
+    async def safe_apply(
+        self, upserts: IndexUpserts, removals: Iterable[int] = ()
+    ) -> None:
+        try:
+            await self.apply(upserts, removals)
+        except RedisError as exc:
+            logger.warning("Failed to sync schedule index, run the checker: %s", exc)
+
+
+schedule_index = ScheduleIndex(
+    redis=redis_manager,
+    key=settings.SCHEDULE_INDEX_KEY,
+    shards=settings.SCHEDULER_SHARDS,
+    enabled=settings.SCHEDULE_INDEX_ENABLED,
+)
@@ -0,0 +1,38 @@
+import logging
+
+from redis.exceptions import RedisError
+
+from src.settings import settings
+from src.utils.redis_manager import RedisManager, redis_manager
+
+
+logger = logging.getLogger("src.utils.scheduler_metrics")
+
+
+class SchedulerMetrics:
+    def __init__(self, redis: RedisManager, key: str):
+        self.redis = redis
+        self.key = key
+
+    async def record(
+        self, counters: dict[str, int], gauges: dict[str, float] | None = None
+    ) -> None:
+        try:
+            async with self.redis.client().pipeline(transaction=False) as pipe:
+                for name, value in counters.items():
+                    if value:
+                        pipe.hincrby(self.key, name, value)
+                if gauges:
+                    pipe.hset(self.key, mapping=gauges)
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Failed to record scheduler metrics: %s", exc)
+
+    async def read(self) -> dict[str, float]:
+        values = await self.redis.client().hgetall(self.key)
+        return {name.decode(): float(value) for name, value in values.items()}
+
+
+scheduler_metrics = SchedulerMetrics(
+    redis=redis_manager, key=settings.SCHEDULER_METRICS_KEY
+)
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+import jinja2
+from jinja2 import meta
+
+from src.settings import settings
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledTemplate:
+    updated_at: datetime
+    template: jinja2.Template
+    variables: frozenset[str]
+
+
+def compile_template(
+    env: jinja2.Environment, content: str, updated_at: datetime
+) -> CompiledTemplate:
+    parsed = env.parse(content)
+    return CompiledTemplate(
+        updated_at=updated_at,
+        template=env.from_string(parsed),
+        variables=frozenset(meta.find_undeclared_variables(parsed)),
+    )
+
+
+class TemplateCache:
+    def __init__(self, env: jinja2.Environment, maxsize: int):
+        self.env = env
+        self.maxsize = maxsize
+        self._templates: OrderedDict[int, CompiledTemplate] = OrderedDict()
+
+    def get(
+        self, template_id: int, updated_at: datetime, content: str
+    ) -> CompiledTemplate:
+        compiled = self._templates.get(template_id)
+        if compiled is not None and compiled.updated_at == updated_at:
+            self._templates.move_to_end(template_id)
+            return compiled
+
+        compiled = compile_template(self.env, content, updated_at)
+        self._templates[template_id] = compiled
+        self._templates.move_to_end(template_id)
+        if len(self._templates) > self.maxsize:
+            self._templates.popitem(last=False)
+        return compiled
+
+    def invalidate(self, template_id: int) -> None:
+        self._templates.pop(template_id, None)
+
+    def clear(self) -> None:
+        self._templates.clear()
+
+
+template_cache = TemplateCache(
+    env=settings.JINGA2_ENV, maxsize=settings.TEMPLATE_CACHE_SIZE
+)
@@ -1,31 +1,25 @@
-from unittest import mock
+from datetime import datetime, timedelta, timezone
 
 import pytest
 from httpx import AsyncClient
+from redis.exceptions import ConnectionError as RedisConnectionError
 
+from src.db import sessionmaker_null_pool
+from src.models import NotificationLog, NotificationOutbox
+from src.repos.bodies import message_hash
+from src.repos.channels import ChannelRepository
 from src.schemas.channels import AddChannelDTO
+from src.schemas.notifications import RequestAddLogDTO
 from src.schemas.templates import AddTemplateDTO
 from src.services.users import UserService
 from src.schemas.categories import AddCategoryDTO
-from src.utils.enums import ContactChannelType, ScheduleType
+from src.tasks import cleanup, fanout, relay
+from src.utils.db_manager import DB_Manager
+from src.utils.enums import ContactChannelType, MassSendJobStatus, ScheduleType
+from src.utils.scheduler_metrics import scheduler_metrics
 from src.settings import settings
 
 
-class MockedTask:
-    def delay(self, *args, **kwargs):
-        pass
-
-
-mock.patch(
-    "src.services.notifications.CELERY_TASKS",
-    {
-        ContactChannelType.EMAIL: MockedTask(),
-        ContactChannelType.TELEGRAM: MockedTask(),
-        ContactChannelType.PUSH: MockedTask(),
-    },
-).start()
-
-
 @pytest.fixture(scope="module")
 async def prepare_db(db_module, admin: AsyncClient):
     await db_module.templates.delete(ensure_existence=False)
@@ -108,3 +102,368 @@ async def test_notifications(
     result = await admin.post("/notifications/sendOne", json=noti_data)
     # print(result.json())
     assert result.status_code == expected_sc
+
+
+async def test_send_many_runs_as_resumable_job(
+    db, admin: AsyncClient, prepare_db, monkeypatch
+):
+    for i in range(5):
+        await db.channels.add(
+            AddChannelDTO(
+                channel_type=ContactChannelType.EMAIL,
+                contact_value=f"send_many{i}@example.com",
+                user_id=prepare_db["user_id"],
+            )
+        )
+    await db.commit()
+    monkeypatch.setattr(type(settings), "BROADCAST_CHUNK_SIZE", 2)
+
+    noti_data = {
+        "schedule_type": "ONCE",
+        "template_id": prepare_db["template_id"],
+        "variables": {"var1": "chunks", "var2": "send_many"},
+        "audience": "EMAIL",
+    }
+    result = await admin.post("/notifications/sendMany", json=noti_data)
+    assert result.status_code == 202
+    job_id = result.json()["data"]["job_id"]
+
+    result = await admin.get(f"/notifications/jobs/{job_id}")
+    assert result.status_code == 200
+    assert result.json()["data"]["status"] == MassSendJobStatus.QUEUED
+    assert result.json()["data"]["total"] == 0
+
+    skipped: list[str] = []
+
+    async def crash_after_first_chunk(db, job):
+        channels = await db.channels.get_audience_chunk(
+            job.audience, after_id=job.cursor, limit=settings.BROADCAST_CHUNK_SIZE
+        )
+        skipped.extend(channel.contact_value for channel in channels)
+        await db.mass_send_jobs.advance(
+            job.id,
+            after_id=job.cursor,
+            cursor=channels[-1].id,
+            queued=0,
+            lease_until=datetime.now(timezone.utc),
+        )
+        await db.commit()
+        raise ConnectionError("worker crashed")
+
+    monkeypatch.setattr(type(settings), "FANOUT_POLL_INTERVAL", 0)
+    with monkeypatch.context() as patched:
+        patched.setattr(fanout, "fan_out_job", crash_after_first_chunk)
+        assert await fanout.process_next_job(sessionmaker_null_pool)
+    [job] = await db.mass_send_jobs.get_all_filtered(id=job_id)
+    assert job.status == MassSendJobStatus.RUNNING
+    assert job.cursor > 0 and job.error == "worker crashed"
+
+    while await fanout.process_next_job(sessionmaker_null_pool):
+        pass
+
+    result = await admin.get(f"/notifications/jobs/{job_id}")
+    assert result.status_code == 200
+    progress = result.json()["data"]
+    assert progress["status"] == MassSendJobStatus.COMPLETED
+
+    logs = await db.notification_logs.get_all_filtered(
+        NotificationLog.message == "Шаблон send_many Тест chunks"
+    )
+    assert progress["total"] == len(logs) >= 3
+    assert progress["queued"] + progress["sent"] + progress["failed"] == len(logs)
+    assert len(skipped) == 2
+    assert not set(skipped) & {log.contact_data for log in logs}
+
+    result = await admin.get("/notifications/jobs/2147483647")
+    assert result.status_code == 404
+
+
+async def test_send_many_job_is_fanned_out_into_logs(
+    db, admin: AsyncClient, prepare_db
+):
+    noti_data = {
+        "schedule_type": "ONCE",
+        "template_id": prepare_db["template_id"],
+        "variables": {"var1": "fan out", "var2": "job"},
+        "audience": "EMAIL",
+    }
+    result = await admin.post("/notifications/sendMany", json=noti_data)
+    assert result.status_code == 202
+    job_id = result.json()["data"]["job_id"]
+
+    now = datetime.now(timezone.utc)
+    job = await db.mass_send_jobs.claim(now=now, lease_until=now + timedelta(minutes=1))
+    assert job is not None and job.id == job_id
+    await db.commit()
+    assert await fanout.fan_out_job(db, job)
+
+    [job] = await db.mass_send_jobs.get_all_filtered(id=job_id)
+    assert job.status == MassSendJobStatus.COMPLETED
+    logs = await db.notification_logs.get_all_filtered(job_id=job_id)
+    channels = await db.channels.get_all_filtered(channel_type=ContactChannelType.EMAIL)
+    assert job.queued_count == len(logs) > 0
+    assert {log.contact_data for log in logs} == {
+        channel.contact_value for channel in channels
+    }
+    assert all(log.message == "Шаблон job Тест fan out" for log in logs)
+    outbox = await db.outbox.get_all_filtered(
+        NotificationOutbox.log_id.in_([log.id for log in logs])
+    )
+    assert len(outbox) == len(logs)
+
+
+async def test_scheduled_send_many_is_stored_as_schedule(
+    admin: AsyncClient, prepare_db
+):
+    noti_data = {
+        "schedule_type": "ONCE",
+        "scheduled_at": (datetime.now(timezone.utc) + timedelta(days=1)).isoformat(),
+        "template_id": prepare_db["template_id"],
+        "variables": {"var1": "later", "var2": "send_many"},
+        "audience": "EMAIL",
+    }
+    result = await admin.post("/notifications/sendMany", json=noti_data)
+    assert result.status_code == 200
+    assert len(result.json()["data"]["scheduled_ids"]) == 1
+
+
+async def test_send_many_streams_audience_in_chunks(
+    db, admin: AsyncClient, prepare_db, monkeypatch
+):
+    for i in range(5):
+        await db.channels.add(
+            AddChannelDTO(
+                channel_type=ContactChannelType.EMAIL,
+                contact_value=f"stream{i}@example.com",
+                user_id=prepare_db["user_id"],
+            )
+        )
+    await db.commit()
+    monkeypatch.setattr(type(settings), "BROADCAST_CHUNK_SIZE", 2)
+
+    fetched: list[tuple[int, int, int]] = []
+    get_audience_chunk = ChannelRepository.get_audience_chunk
+
+    async def record_chunk(self, audience, after_id, limit):
+        channels = await get_audience_chunk(self, audience, after_id, limit)
+        async with DB_Manager(session_factory=sessionmaker_null_pool) as other:
+            [job] = await other.mass_send_jobs.get_all_filtered(
+                status=MassSendJobStatus.RUNNING
+            )
+        fetched.append((after_id, job.cursor, len(channels)))
+        return channels
+
+    monkeypatch.setattr(ChannelRepository, "get_audience_chunk", record_chunk)
+
+    noti_data = {
+        "schedule_type": "ONCE",
+        "template_id": prepare_db["template_id"],
+        "variables": {"var1": "chunks", "var2": "stream"},
+        "audience": "EMAIL",
+    }
+    result = await admin.post("/notifications/sendMany", json=noti_data)
+    assert result.status_code == 202
+    job_id = result.json()["data"]["job_id"]
+
+    while await fanout.process_next_job(sessionmaker_null_pool):
+        pass
+
+    channels = await db.channels.get_all_filtered(channel_type=ContactChannelType.EMAIL)
+    assert [size for _, _, size in fetched][-1] == 0
+    assert max(size for _, _, size in fetched) == 2
+    assert sum(size for _, _, size in fetched) == len(channels)
+    # every chunk was committed with the job cursor before the next one was read
+    assert all(after_id == cursor for after_id, cursor, _ in fetched)
+
+    [job] = await db.mass_send_jobs.get_all_filtered(id=job_id)
+    logs = await db.notification_logs.get_all_filtered(job_id=job_id)
+    assert job.status == MassSendJobStatus.COMPLETED
+    assert job.queued_count == len(logs) >= 5
+
+
+async def test_personalized_upload_runs_as_job(db, admin: AsyncClient, prepare_db):
+    user_id = prepare_db["user_id"]
+    await db.channels.add(
+        AddChannelDTO(
+            channel_type=ContactChannelType.EMAIL,
+            contact_value="personalized@example.com",
+            user_id=user_id,
+        )
+    )
+    await db.commit()
+    body = (
+        f'{{"user_id": {user_id}, "var1": "upload", "var2": "personalized"}}\n'
+        f'{{"user_id": {user_id}, "var1": "no var2"}}\n'
+        "not json\n"
+    )
+    result = await admin.post(
+        "/notifications/sendPersonalized/upload",
+        params={"template_id": prepare_db["template_id"], "audience": "EMAIL"},
+        content=body.encode(),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert result.status_code == 202
+    assert result.json()["data"]["skipped"] == 1
+    job_id = result.json()["data"]["job_id"]
+    assert len(await db.mass_send_recipients.get_all_filtered(job_id=job_id)) == 2
+
+    while await fanout.process_next_job(sessionmaker_null_pool):
+        pass
+
+    result = await admin.get(f"/notifications/jobs/{job_id}")
+    progress = result.json()["data"]
+    assert progress["status"] == MassSendJobStatus.COMPLETED
+    assert progress["skipped"] == 2
+
+    logs = await db.notification_logs.get_all_filtered(job_id=job_id)
+    channels = await db.channels.get_all_filtered(
+        user_id=user_id, channel_type=ContactChannelType.EMAIL
+    )
+    assert progress["total"] == len(logs) == len(channels) > 0
+    assert all(log.message == "Шаблон personalized Тест upload" for log in logs)
+    assert not await db.mass_send_recipients.get_all_filtered(job_id=job_id)
+
+
+async def test_personalized_html_template_needs_email_audience(
+    db, admin: AsyncClient, prepare_db
+):
+    category = await db.categories.get_one(title="Категория Тест")
+    template = await db.templates.add(
+        AddTemplateDTO(
+            title="HTML шаблон",
+            content="<p>Здравствуйте, {{ username }}!</p>",
+            category_id=category.id,
+            user_id=prepare_db["user_id"],
+        )
+    )
+    await db.channels.add(
+        AddChannelDTO(
+            channel_type=ContactChannelType.EMAIL,
+            contact_value="html@example.com",
+            user_id=prepare_db["user_id"],
+        )
+    )
+    await db.commit()
+
+    result = await admin.post(
+        "/notifications/sendPersonalized",
+        json={"template_id": template.id, "audience": "ALL"},
+    )
+    assert result.status_code == 422
+
+    result = await admin.post(
+        "/notifications/sendPersonalized",
+        json={"template_id": template.id, "audience": "EMAIL"},
+    )
+    assert result.status_code == 202
+    job_id = result.json()["data"]["job_id"]
+
+    while await fanout.process_next_job(sessionmaker_null_pool):
+        pass
+
+    logs = await db.notification_logs.get_all_filtered(job_id=job_id)
+    assert logs and all(log.provider_name == ContactChannelType.EMAIL for log in logs)
+    assert all(log.message.startswith("<p>Здравствуйте, ") for log in logs)
+
+
+async def test_unreferenced_message_bodies_are_deleted(db, prepare_db, monkeypatch):
+    await db.message_bodies.store({message_hash("orphaned body"): "orphaned body"})
+    await db.notification_logs.add_bulk(
+        [
+            RequestAddLogDTO(
+                sender_id=prepare_db["user_id"],
+                message="referenced body",
+                contact_data="bodies@example.com",
+                provider_name=ContactChannelType.EMAIL,
+            )
+        ]
+    )
+    await db.commit()
+    monkeypatch.setattr(type(settings), "MESSAGE_BODIES_RETENTION", -60)
+    monkeypatch.setattr(type(settings), "MESSAGE_BODIES_CLEANUP_BATCH_SIZE", 1)
+
+    assert await cleanup.delete_orphaned_bodies(sessionmaker_null_pool) >= 1
+
+    assert not await db.message_bodies.get_one_or_none(
+        hash=message_hash("orphaned body")
+    )
+    assert await db.message_bodies.get_one_or_none(hash=message_hash("referenced body"))
+
+
+async def add_outbox_entry(db, user_id: int, contact_data: str) -> int:
+    logs = await db.notification_logs.add_bulk(
+        [
+            RequestAddLogDTO(
+                sender_id=user_id,
+                message="relayed once",
+                contact_data=contact_data,
+                provider_name=ContactChannelType.EMAIL,
+            )
+        ]
+    )
+    await db.outbox.add_for_logs(logs)
+    await db.commit()
+    return logs[0].id
+
+
+def record_publishing(sent: list[int]):
+    def publish(entries, published: list[int]):
+        sent.extend(entry.log_id for entry in entries)
+        published.extend(entry.id for entry in entries)
+
+    return publish
+
+
+async def relay_once() -> None:
+    async with DB_Manager(session_factory=sessionmaker_null_pool) as relay_db:
+        await relay.relay_outbox_batch(relay_db)
+
+
+async def test_relay_releases_entries_when_publishing_fails(
+    db, prepare_db, monkeypatch
+):
+    log_id = await add_outbox_entry(db, prepare_db["user_id"], "relay@example.com")
+
+    def crash(entries, published):
+        raise ConnectionError("broker is gone")
+
+    monkeypatch.setattr(relay, "publish_outbox_entries", crash)
+    with pytest.raises(ConnectionError):
+        await relay_once()
+
+    entry = await db.outbox.get_one(log_id=log_id)
+    assert entry.relayed_at is None
+
+    sent: list[int] = []
+    monkeypatch.setattr(relay, "publish_outbox_entries", record_publishing(sent))
+    await relay_once()
+    assert sent.count(log_id) == 1
+    assert not await db.outbox.get_all_filtered(log_id=log_id)
+
+
+async def test_relay_republishes_only_expired_entries(db, prepare_db, monkeypatch):
+    log_id = await add_outbox_entry(db, prepare_db["user_id"], "expired@example.com")
+
+    # a relay that died after marking the batch and before deleting it
+    now = datetime.now(timezone.utc)
+    await db.outbox.claim_batch(limit=1000, now=now, expired_before=now)
+    await db.commit()
+
+    sent: list[int] = []
+    monkeypatch.setattr(relay, "publish_outbox_entries", record_publishing(sent))
+    await relay_once()
+    assert log_id not in sent
+
+    monkeypatch.setattr(type(settings), "OUTBOX_RELAY_TIMEOUT", -60)
+    await relay_once()
+    assert sent.count(log_id) == 1
+    assert not await db.outbox.get_all_filtered(log_id=log_id)
+
+
+async def test_scheduler_metrics_unavailable(admin: AsyncClient, monkeypatch):
+    async def read():
+        raise RedisConnectionError("redis is gone")
+
+    monkeypatch.setattr(scheduler_metrics, "read", read)
+    result = await admin.get("/notifications/getSchedulerMetrics")
+    assert result.status_code == 503
@@ -0,0 +1,301 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from httpx import AsyncClient
+
+from src.db import sessionmaker_null_pool
+from src.models import NotificationLog, NotificationSchedule, UserContactChannel
+from src.schemas.channels import AddChannelDTO
+from src.schemas.notifications import AddScheduleDTO, RequestAddLogDTO
+from src.services.users import UserService
+from src.tasks.beat import _execute_schedules
+from src.tasks.fanout import process_next_job
+from src.utils.db_manager import DB_Manager
+from src.utils.enums import (
+    BroadcastAudience,
+    ContactChannelType,
+    MisfirePolicy,
+    ScheduleType,
+)
+
+
+async def claim_due_schedules(channel_id: int, claimed: list[int]):
+    now = datetime.now(timezone.utc)
+    after_id = 0
+    async with DB_Manager(session_factory=sessionmaker_null_pool) as db:
+        while schedules := await db.schedules.get_current_schedules_to_perform(
+            NotificationSchedule.channel_id == channel_id,
+            now=now,
+            after_id=after_id,
+            limit=5,
+            skip_locked=True,
+        ):
+            claimed.extend(schedule.id for schedule in schedules)
+            await _execute_schedules(db, schedules, now)
+            await asyncio.sleep(0.01)
+            await db.commit()
+            after_id = schedules[-1].id
+
+
+async def test_concurrent_schedule_claimers(db, admin: AsyncClient):
+    token = admin.cookies.get("access_token")
+    assert token
+    user_id = int(UserService.decode_access_token(token)["user_id"])
+
+    channel = await db.channels.add(
+        AddChannelDTO(
+            channel_type=ContactChannelType.EMAIL,
+            contact_value="claimers@example.com",
+            user_id=user_id,
+        )
+    )
+    assert channel and channel.id is not None
+
+    due_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+    schedule_ids = await db.schedules.add_bulk(
+        [
+            AddScheduleDTO(
+                message=f"claimers test {i}",
+                channel_id=channel.id,
+                schedule_type=(
+                    ScheduleType.RECURRING if i % 2 == 0 else ScheduleType.ONCE
+                ),
+                crontab="0 0 1 1 *" if i % 2 == 0 else None,
+                max_executions=5 if i % 2 == 0 else 0,
+                scheduled_at=None if i % 2 == 0 else due_at,
+                next_execution_at=due_at,
+            )
+            for i in range(60)
+        ]
+    )
+    await db.commit()
+    assert len(schedule_ids) == 60
+
+    claimed: list[list[int]] = [[] for _ in range(4)]
+    await asyncio.gather(*[claim_due_schedules(channel.id, ids) for ids in claimed])
+    all_claimed = [schedule_id for ids in claimed for schedule_id in ids]
+    assert sorted(all_claimed) == sorted(schedule_ids)
+    assert sum(1 for ids in claimed if ids) > 1
+
+    logs = await db.notification_logs.get_all_filtered(
+        NotificationLog.message.like("claimers test %")
+    )
+    assert len(logs) == 60
+    assert len({log.message for log in logs}) == 60
+
+    schedules = await db.schedules.get_all_filtered(
+        NotificationSchedule.id.in_(schedule_ids)
+    )
+    assert len(schedules) == 30
+    assert all(schedule.current_executions == 1 for schedule in schedules)
+    assert all(schedule.next_execution_at > due_at for schedule in schedules)
+
+
+async def test_misfire_policies(db, admin: AsyncClient):
+    token = admin.cookies.get("access_token")
+    assert token
+    user_id = int(UserService.decode_access_token(token)["user_id"])
+
+    channel = await db.channels.add(
+        AddChannelDTO(
+            channel_type=ContactChannelType.EMAIL,
+            contact_value="misfire@example.com",
+            user_id=user_id,
+        )
+    )
+    assert channel and channel.id is not None
+
+    now = datetime.now(timezone.utc)
+    missed_at = now - timedelta(hours=5)
+    policies = list(MisfirePolicy)
+    await db.schedules.add_bulk(
+        [
+            AddScheduleDTO(
+                message=f"misfire test {policy.value}",
+                channel_id=channel.id,
+                schedule_type=ScheduleType.RECURRING,
+                crontab="*/10 * * * *",
+                max_executions=5,
+                misfire_policy=policy,
+                next_execution_at=missed_at,
+            )
+            for policy in policies
+        ]
+    )
+    await db.commit()
+
+    async with DB_Manager(session_factory=sessionmaker_null_pool) as claimer:
+        schedules = await claimer.schedules.get_current_schedules_to_perform(
+            NotificationSchedule.channel_id == channel.id, now=now, skip_locked=True
+        )
+        assert len(schedules) == len(policies)
+        await _execute_schedules(claimer, schedules, now)
+        await claimer.commit()
+
+    logs = await db.notification_logs.get_all_filtered(
+        NotificationLog.message.like("misfire test %")
+    )
+    assert sorted(log.message for log in logs) == [
+        "misfire test FIRE_ALL",
+        "misfire test FIRE_ONCE",
+    ]
+
+    schedules = await db.schedules.get_all_filtered(
+        NotificationSchedule.channel_id == channel.id
+    )
+    by_policy = {schedule.misfire_policy: schedule for schedule in schedules}
+    assert by_policy[MisfirePolicy.FIRE_ONCE].next_execution_at > now
+    assert by_policy[MisfirePolicy.FIRE_ONCE].current_executions == 1
+    assert by_policy[MisfirePolicy.SKIP].next_execution_at > now
+    assert by_policy[MisfirePolicy.SKIP].current_executions == 0
+    assert missed_at < by_policy[MisfirePolicy.FIRE_ALL].next_execution_at <= now
+    assert by_policy[MisfirePolicy.FIRE_ALL].current_executions == 1
+
+
+async def test_broadcast_schedule_fans_out_at_fire_time(db, admin: AsyncClient):
+    token = admin.cookies.get("access_token")
+    assert token
+    user_id = int(UserService.decode_access_token(token)["user_id"])
+
+    for i in range(3):
+        await db.channels.add(
+            AddChannelDTO(
+                channel_type=ContactChannelType.EMAIL,
+                contact_value=f"broadcast{i}@example.com",
+                user_id=user_id,
+            )
+        )
+    now = datetime.now(timezone.utc)
+    [schedule_id] = await db.schedules.add_bulk(
+        [
+            AddScheduleDTO(
+                message="broadcast test",
+                sender_id=user_id,
+                audience=BroadcastAudience.EMAIL,
+                schedule_type=ScheduleType.RECURRING,
+                crontab="0 0 1 1 *",
+                max_executions=5,
+                next_execution_at=now - timedelta(seconds=1),
+            )
+        ]
+    )
+    await db.commit()
+
+    email_channels = await db.channels.get_all_filtered(
+        UserContactChannel.channel_type == ContactChannelType.EMAIL
+    )
+    recipients = {channel.contact_value for channel in email_channels}
+
+    async with DB_Manager(session_factory=sessionmaker_null_pool) as claimer:
+        schedules = await claimer.schedules.get_current_schedules_to_perform(
+            NotificationSchedule.id == schedule_id, now=now, skip_locked=True
+        )
+        assert len(schedules) == 1 and schedules[0].channel is None
+        await _execute_schedules(claimer, schedules, now)
+        await claimer.commit()
+
+    logs = await db.notification_logs.get_all_filtered(
+        NotificationLog.message == "broadcast test"
+    )
+    assert logs == []
+
+    while await process_next_job(session_factory=sessionmaker_null_pool):
+        pass
+    logs = await db.notification_logs.get_all_filtered(
+        NotificationLog.message == "broadcast test"
+    )
+    assert len(logs) == len(recipients)
+    assert all(log.sender_id == user_id for log in logs)
+    assert all(log.provider_name == ContactChannelType.EMAIL for log in logs)
+
+    [schedule] = await db.schedules.get_all_filtered(
+        NotificationSchedule.id == schedule_id
+    )
+    assert schedule.current_executions == 1
+    assert schedule.next_execution_at > now
+
+
+async def test_copy_bulk_keeps_conflict_semantics(db, admin: AsyncClient):
+    token = admin.cookies.get("access_token")
+    assert token
+    user_id = int(UserService.decode_access_token(token)["user_id"])
+
+    channel = await db.channels.add(
+        AddChannelDTO(
+            channel_type=ContactChannelType.EMAIL,
+            contact_value="copy_bulk@example.com",
+            user_id=user_id,
+        )
+    )
+    assert channel and channel.id is not None
+
+    pendings = [
+        RequestAddLogDTO(
+            sender_id=user_id,
+            message=f"copy bulk test {i % 3}",
+            contact_data=channel.contact_value,
+            provider_name=ContactChannelType.EMAIL,
+        )
+        for i in range(6)
+    ]
+    logs = await db.notification_logs.copy_bulk(pendings)
+    assert sorted(log.message for log in logs) == [
+        f"copy bulk test {i}" for i in range(3)
+    ]
+    assert await db.notification_logs.copy_bulk(iter(pendings)) == []
+
+    next_execution_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    schedules = [
+        AddScheduleDTO(
+            message=f"copy bulk test {i}",
+            channel_id=channel.id,
+            schedule_type=ScheduleType.RECURRING,
+            crontab="0 * * * *",
+            max_executions=5,
+            next_execution_at=next_execution_at,
+        )
+        for i in range(3)
+    ]
+    schedule_ids = await db.schedules.copy_bulk(schedules)
+    later = next_execution_at + timedelta(hours=1)
+    assert sorted(
+        await db.schedules.copy_bulk(
+            schedule.model_copy(update={"next_execution_at": later})
+            for schedule in schedules
+        )
+    ) == sorted(schedule_ids)
+    await db.commit()
+
+    stored = await db.schedules.get_all_filtered(
+        NotificationSchedule.id.in_(schedule_ids)
+    )
+    assert all(schedule.next_execution_at == later for schedule in stored)
+
+
+async def test_resubmitted_broadcast_schedule_is_upserted(db, admin: AsyncClient):
+    token = admin.cookies.get("access_token")
+    assert token
+    user_id = int(UserService.decode_access_token(token)["user_id"])
+
+    next_execution_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    broadcast = AddScheduleDTO(
+        message="broadcast upsert test",
+        sender_id=user_id,
+        audience=BroadcastAudience.ALL,
+        schedule_type=ScheduleType.RECURRING,
+        crontab="0 * * * *",
+        max_executions=5,
+        next_execution_at=next_execution_at,
+    )
+    [schedule_id] = await db.schedules.add_bulk([broadcast])
+    later = next_execution_at + timedelta(hours=1)
+    resubmitted = broadcast.model_copy(update={"next_execution_at": later})
+    assert await db.schedules.add_bulk([resubmitted]) == [schedule_id]
+    assert await db.schedules.copy_bulk([resubmitted]) == [schedule_id]
+    await db.commit()
+
+    schedules = await db.schedules.get_all_filtered(
+        NotificationSchedule.message == "broadcast upsert test"
+    )
+    assert [schedule.id for schedule in schedules] == [schedule_id]
+    assert schedules[0].next_execution_at == later
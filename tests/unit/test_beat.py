@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.schemas.notifications import ScheduleWithChannelsDTO
+from src.tasks import beat
+from src.tasks.beat import RecoveryBacklog, _advance_schedule, _measure_recovery_backlog
+from src.utils.enums import ScheduleType
+
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def make_schedule(**fields) -> ScheduleWithChannelsDTO:
+    return ScheduleWithChannelsDTO(
+        id=1,
+        message="advance test",
+        channel_id=1,
+        created_at=NOW,
+        updated_at=NOW,
+        next_execution_at=NOW,
+        **fields,
+    )
+
+
+@pytest.mark.parametrize("current_executions", [0, 7])
+def test_infinite_recurring_schedule_keeps_execution_count(current_executions: int):
+    schedule = make_schedule(
+        schedule_type=ScheduleType.RECURRING,
+        crontab="0 * * * *",
+        max_executions=0,
+        current_executions=current_executions,
+    )
+
+    advanced = _advance_schedule(schedule, NOW)
+    assert advanced is not None
+    assert advanced.current_executions == current_executions
+    assert advanced.last_executed_at == NOW
+    assert advanced.next_execution_at == NOW + timedelta(hours=1)
+
+
+def test_limited_recurring_schedule_counts_until_deleted():
+    schedule = make_schedule(
+        schedule_type=ScheduleType.RECURRING,
+        crontab="0 * * * *",
+        max_executions=2,
+        current_executions=0,
+    )
+
+    advanced = _advance_schedule(schedule, NOW)
+    assert advanced is not None and advanced.current_executions == 1
+
+    schedule = schedule.model_copy(update={"current_executions": 1})
+    assert _advance_schedule(schedule, NOW) is None
+
+
+def test_once_schedule_is_deleted():
+    schedule = make_schedule(
+        schedule_type=ScheduleType.ONCE,
+        scheduled_at=NOW + timedelta(minutes=1),
+        current_executions=0,
+    )
+    assert _advance_schedule(schedule, NOW) is None
+
+
+async def test_recovery_backlog_is_sampled_once_per_interval(monkeypatch):
+    counts = []
+
+    class Schedules:
+        async def count_overdue(self, *filter, before):
+            counts.append(before)
+            return 5
+
+    class DB:
+        schedules = Schedules()
+
+    recorded = []
+
+    async def record(counters, gauges=None):
+        recorded.append(gauges)
+
+    monkeypatch.setattr(beat, "recovery_backlog", RecoveryBacklog(60))
+    monkeypatch.setattr(beat.scheduler_metrics, "record", record)
+
+    await _measure_recovery_backlog(DB(), NOW)  # type: ignore
+    await _measure_recovery_backlog(DB(), NOW)  # type: ignore
+    assert len(counts) == 1
+    assert recorded == [{"recovery_backlog": 5}]
+
+    beat.recovery_backlog.recovered(7)
+    assert beat.recovery_backlog.value == 0
+
+
+def test_manual_check_runs_on_worker_runtime(monkeypatch):
+    ran = []
+
+    async def process():
+        ran.append("processed")
+
+    monkeypatch.setattr(beat, "_process_scheduled_notifications", process)
+    monkeypatch.setattr(beat.worker_runtime, "run", lambda coro: asyncio.run(coro))
+    beat.check_notification_schedule()
+
+    assert ran == ["processed"]
@@ -0,0 +1,97 @@
+import pytest
+from fakeredis.aioredis import FakeRedis
+
+from src.utils.circuit_breaker import CircuitBreaker
+from src.utils.enums import ContactChannelType
+
+
+EMAIL = ContactChannelType.EMAIL
+
+
+@pytest.fixture
+def redis() -> FakeRedis:
+    return FakeRedis()
+
+
+@pytest.fixture
+def breaker(redis: FakeRedis) -> CircuitBreaker:
+    return CircuitBreaker(
+        redis,
+        failure_threshold=3,
+        failure_window=60,
+        recovery_timeout=30,
+        half_open_probes=2,
+        prefix="test",
+    )
+
+
+async def expire(redis: FakeRedis, key: str) -> None:
+    # stands in for the TTL running out
+    await redis.delete(f"test:{EMAIL.value}:{key}")
+
+
+async def fail(breaker: CircuitBreaker, times: int) -> None:
+    for _ in range(times):
+        await breaker.record_failure(EMAIL)
+
+
+async def test_circuit_opens_at_failure_threshold(breaker: CircuitBreaker):
+    await fail(breaker, 2)
+    assert await breaker.open_for(EMAIL) == 0
+    assert await breaker.allow(EMAIL) == 0
+
+    await fail(breaker, 1)
+    assert 29.9 < await breaker.open_for(EMAIL) <= 30
+    assert 29.9 < await breaker.allow(EMAIL) <= 30
+
+
+async def test_failures_outside_the_window_are_forgotten(
+    breaker: CircuitBreaker, redis: FakeRedis
+):
+    await fail(breaker, 2)
+    await expire(redis, "failures")
+    await fail(breaker, 2)
+    assert await breaker.open_for(EMAIL) == 0
+
+    await fail(breaker, 1)
+    assert await breaker.open_for(EMAIL) > 0
+
+
+async def test_half_open_lets_through_limited_probes(
+    breaker: CircuitBreaker, redis: FakeRedis
+):
+    await fail(breaker, 3)
+    await expire(redis, "open")
+
+    assert await breaker.open_for(EMAIL) == 0
+    assert [await breaker.allow(EMAIL) for _ in range(2)] == [0, 0]
+    assert 29.9 < await breaker.allow(EMAIL) <= 30
+
+
+async def test_half_open_failure_reopens_immediately(
+    breaker: CircuitBreaker, redis: FakeRedis
+):
+    await fail(breaker, 3)
+    await expire(redis, "open")
+    await breaker.allow(EMAIL)
+
+    await fail(breaker, 1)
+    assert 29.9 < await breaker.open_for(EMAIL) <= 30
+
+
+async def test_half_open_success_closes_circuit(
+    breaker: CircuitBreaker, redis: FakeRedis
+):
+    await fail(breaker, 3)
+    await breaker.record_success(EMAIL)
+    assert await breaker.open_for(EMAIL) > 0
+
+    await expire(redis, "open")
+    assert await breaker.allow(EMAIL) == 0
+    await breaker.record_success(EMAIL)
+
+    assert [await breaker.allow(EMAIL) for _ in range(3)] == [0, 0, 0]
+    await fail(breaker, 2)
+    assert await breaker.open_for(EMAIL) == 0
+    await fail(breaker, 1)
+    assert await breaker.open_for(EMAIL) > 0
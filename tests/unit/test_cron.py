@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from croniter import croniter
+
+from src.utils.cron import is_valid_crontab, next_fire_time, next_fire_times
+
+
+@pytest.mark.parametrize(
+    "crontab", ["* * * * *", "*/5 * * * *", "0 9 * * 1-5", "0 0 1 1 *"]
+)
+def test_next_fire_times_match_croniter(crontab: str):
+    now = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+    starts = [now + timedelta(minutes=(i * 37) % 5000 - 2500) for i in range(300)]
+
+    expected = [croniter(crontab, start).get_next(datetime) for start in starts]
+    assert next_fire_times(crontab, starts) == expected
+    assert next_fire_time(crontab, starts[0]) == expected[0]
+
+
+@pytest.mark.parametrize(
+    "crontab, valid",
+    [
+        ("*/5 * * * *", True),
+        ("0 9 * * MON-FRI", True),
+        ("61 * * * *", False),
+        ("not a crontab", False),
+    ],
+)
+def test_is_valid_crontab(crontab: str, valid: bool):
+    assert is_valid_crontab(crontab) is valid
@@ -0,0 +1,25 @@
+import hashlib
+
+from src.repos.bodies import hash_messages, message_hash
+
+
+def test_message_hash_is_sha256_of_utf8_body():
+    body = "<p>Привет</p>"
+    assert message_hash(body) == hashlib.sha256(body.encode("utf-8")).digest()
+    assert len(message_hash(body)) == 32
+
+
+def test_hash_messages_keeps_each_body_once():
+    bodies: dict[bytes, str] = {}
+    rows = list(
+        hash_messages(({"id": i, "message": f"body {i % 2}"} for i in range(4)), bodies)
+    )
+
+    assert [row["message"] for row in rows] == ["body 0", "body 1", None, None]
+    assert [row["message_hash"] for row in rows] == [
+        message_hash(f"body {i % 2}") for i in range(4)
+    ]
+    assert bodies == {
+        message_hash("body 0"): "body 0",
+        message_hash("body 1"): "body 1",
+    }
@@ -0,0 +1,81 @@
+import pytest
+from fakeredis.aioredis import FakeRedis
+
+from src.utils import rate_limiter
+from src.utils.enums import ContactChannelType
+from src.utils.rate_limiter import TokenBucketRateLimiter
+
+
+EMAIL = ContactChannelType.EMAIL
+BUCKET = "test:EMAIL"
+
+
+@pytest.fixture
+def redis() -> FakeRedis:
+    return FakeRedis()
+
+
+def make_limiter(redis: FakeRedis, **limits) -> TokenBucketRateLimiter:
+    return TokenBucketRateLimiter(redis, {EMAIL.value: limits}, prefix="test")
+
+
+async def take(limiter: TokenBucketRateLimiter, destination: str = "a") -> int:
+    keys, args = limiter._buckets(EMAIL, destination)
+    return int(await limiter._script(keys=keys, args=args))
+
+
+async def rewind(redis: FakeRedis, key: str, milliseconds: float) -> None:
+    await redis.hincrbyfloat(key, "ts", -milliseconds)
+
+
+async def test_burst_is_exhausted_after_capacity(redis: FakeRedis):
+    limiter = make_limiter(redis, **{"global": (2, 3)})
+
+    assert [await take(limiter) for _ in range(3)] == [0, 0, 0]
+    # one token is missing and two are refilled per second
+    assert 450 < await take(limiter) <= 500
+
+
+async def test_tokens_are_refilled_with_time(redis: FakeRedis):
+    limiter = make_limiter(redis, **{"global": (1, 2)})
+    assert [await take(limiter) for _ in range(3)][-1] > 0
+
+    await rewind(redis, BUCKET, 1000)
+    assert await take(limiter) == 0
+    assert await take(limiter) > 0
+
+    # the bucket never holds more than its capacity
+    await rewind(redis, BUCKET, 60_000)
+    waits = [await take(limiter) for _ in range(3)]
+    assert waits[:2] == [0, 0] and waits[2] > 0
+
+
+async def test_destination_bucket_limits_only_its_destination(redis: FakeRedis):
+    limiter = make_limiter(redis, **{"global": (100, 100), "destination": (1, 1)})
+
+    assert await take(limiter, "a") == 0
+    assert 950 < await take(limiter, "a") <= 1000
+    assert await take(limiter, "b") == 0
+
+
+async def test_pause_is_returned_as_retry_after(redis: FakeRedis):
+    limiter = make_limiter(redis, **{"global": (100, 100)})
+    await limiter.pause(EMAIL, 5)
+
+    assert 4900 < await take(limiter) <= 5000
+
+
+async def test_acquire_waits_for_retry_after(redis: FakeRedis, monkeypatch):
+    limiter = make_limiter(redis, **{"global": (1, 1)})
+    slept: list[float] = []
+
+    async def sleep(seconds: float):
+        slept.append(seconds)
+        await rewind(redis, BUCKET, seconds * 1000)
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", sleep)
+    assert await limiter.acquire(EMAIL, "a") == 0
+    waited = await limiter.acquire(EMAIL, "a")
+
+    assert slept == [waited]
+    assert 0.95 < waited <= 1
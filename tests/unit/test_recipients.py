@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.settings import settings
+from src.utils.exceptions import UnsupportedRecipientsFormatError
+from src.utils.recipients import chunked, iter_recipients, render_messages
+from src.utils.template_cache import compile_template
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(items):
+    return [item async for item in items]
+
+
+async def test_ndjson_recipients_across_chunk_boundaries():
+    body = (
+        '{"user_id": 1, "name": "Аня"}\n'
+        '{"user_id": "2", "name": "Bob", "code": 42}\n'
+        "not json\n"
+        '{"name": "no id"}\n'
+        "\n"
+        '{"user_id": 3}'
+    ).encode()
+    chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+
+    recipients = await collect(iter_recipients(stream(*chunks), "application/x-ndjson"))
+    assert recipients == [
+        (1, {"name": "Аня"}),
+        (2, {"name": "Bob", "code": "42"}),
+        None,
+        None,
+        (3, {}),
+    ]
+
+
+async def test_csv_recipients_with_quoted_newlines():
+    body = (
+        b"user_id,name,note\r\n"
+        b'1,Ann,"line one\r\nline two"\r\n'
+        b"2,Bob\r\n"
+        b'3,"Doe, John",ok\r\n'
+    )
+    recipients = await collect(
+        iter_recipients(stream(body[:20], body[20:]), "text/csv; charset=utf-8")
+    )
+    assert recipients == [
+        (1, {"name": "Ann", "note": "line one\nline two"}),
+        None,
+        (3, {"name": "Doe, John", "note": "ok"}),
+    ]
+
+
+async def test_unsupported_content_type():
+    with pytest.raises(UnsupportedRecipientsFormatError):
+        await collect(iter_recipients(stream(b"{}"), "application/json"))
+
+
+async def test_chunked():
+    chunks = await collect(chunked(stream(*[bytes([i]) for i in range(5)]), 2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+
+
+def test_render_messages_skips_recipients_without_variables():
+    compiled = compile_template(
+        settings.JINGA2_ENV,
+        "{{ greeting }}, {{ name }}! {{ code }}",
+        datetime.now(timezone.utc),
+    )
+    messages, skipped = render_messages(
+        compiled,
+        {"greeting": "Привет", "code": "1"},
+        [(1, {"name": "Аня"}), (2, {}), (3, {"name": "Bob", "greeting": "Hi"})],
+    )
+
+    assert messages == {1: "Привет, Аня! 1", 3: "Hi, Bob! 1"}
+    assert skipped == 1
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from src.utils.redis_manager import RedisManager
+from src.utils.schedule_index import ScheduleIndex
+
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def redis(monkeypatch) -> RedisManager:
+    server = FakeServer()
+    monkeypatch.setattr(
+        RedisManager, "_new_client", lambda self: FakeRedis(server=server)
+    )
+    return RedisManager(host="localhost", port=6379)
+
+
+async def test_upcoming_reads_only_owned_shards(redis: RedisManager):
+    index = ScheduleIndex(redis=redis, key="index", shards=2)
+    await index.apply(
+        {
+            1: (None, NOW + timedelta(minutes=1)),
+            2: (None, NOW + timedelta(minutes=2)),
+            3: (4, NOW + timedelta(minutes=3)),
+            4: (7, NOW + timedelta(minutes=4)),
+        }
+    )
+
+    assert sorted(await redis.client().keys("index:*")) == [b"index:0", b"index:1"]
+    assert await index.upcoming(limit=10, shards={0}) == [
+        NOW + timedelta(minutes=2),
+        NOW + timedelta(minutes=3),
+    ]
+    assert await index.due_ids(NOW + timedelta(minutes=5), limit=10, shards={1}) == [
+        1,
+        4,
+    ]
+    assert await index.due_ids(NOW + timedelta(minutes=3), limit=2) == [1, 2]
+
+
+async def test_removal_clears_every_shard(redis: RedisManager):
+    index = ScheduleIndex(redis=redis, key="index", shards=3)
+    await index.apply({1: (None, NOW), 2: (None, NOW)})
+    await index.apply({2: (None, None)}, removals=[1])
+
+    assert await index.due_ids(NOW, limit=10) == []
+    assert await redis.client().keys("index:*") == []
+
+
+async def test_rebuild_drops_stale_and_misplaced_members(redis: RedisManager):
+    index = ScheduleIndex(redis=redis, key="index", shards=2)
+    await index.apply({1: (None, NOW), 2: (None, NOW), 9: (None, NOW)})
+    await redis.client().zadd(index.shard_key(0), {"3": NOW.timestamp()})
+
+    async def chunks():
+        yield [(2, None, NOW + timedelta(minutes=1)), (3, 5, NOW)]
+
+    assert await index.rebuild(chunks()) == 2
+    assert await index.scores([(2, None), (3, 5)]) == [
+        (NOW + timedelta(minutes=1)).timestamp(),
+        NOW.timestamp(),
+    ]
+    # 1 is gone from Postgres, 3 sat in the wrong shard, 9 was added after the read
+    assert await index.due_ids(NOW + timedelta(minutes=1), limit=10) == [3, 9, 2]
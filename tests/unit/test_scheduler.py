@@ -0,0 +1,25 @@
+from src.tasks.scheduler import Scheduler
+
+
+class Leases:
+    def __init__(self, *rounds: set[int]):
+        self.rounds = list(rounds)
+
+    async def rebalance(self) -> set[int]:
+        return self.rounds.pop(0)
+
+
+async def test_rebalance_refreshes_only_when_ownership_changes(monkeypatch):
+    scheduler = Scheduler(heap_size=10, resync_interval=300, shards=4)
+    refreshed: list[set[int]] = []
+
+    async def refresh():
+        refreshed.append(set(scheduler._owned))
+
+    monkeypatch.setattr(scheduler, "refresh", refresh)
+    leases = Leases({0, 1}, {0, 1}, {0, 1}, {1}, {1})
+    for _ in range(5):
+        await scheduler.rebalance(leases)  # type: ignore
+
+    assert refreshed == [{0, 1}, {1}]
+    assert scheduler._owned == {1}
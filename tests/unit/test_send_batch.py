@@ -0,0 +1,42 @@
+import aiosmtplib
+
+from src.schemas.notifications import PendingLogDTO
+from src.tasks import tasks
+from src.utils.enums import ContactChannelType, NotificationStatus
+
+
+async def test_send_batch_logs_non_retryable_email_error(monkeypatch):
+    log_schema = PendingLogDTO(
+        id=1,
+        sender_id=1,
+        message="Hello",
+        contact_data="user@notihub.test",
+        provider_name=ContactChannelType.EMAIL,
+    )
+
+    async def load_pending_logs(logs_data):
+        return [log_schema]
+
+    async def send_email_message(log_schema):
+        raise aiosmtplib.SMTPDataError(554, "Message rejected")
+
+    results = []
+
+    async def put(result):
+        results.append(result)
+
+    monkeypatch.setattr(tasks, "load_pending_logs", load_pending_logs)
+    monkeypatch.setattr(tasks, "_send_email_message", send_email_message)
+    monkeypatch.setattr(tasks.result_sink, "put", put)
+
+    outcome = await tasks.send_batch(
+        ContactChannelType.EMAIL,
+        [{"id": 1, "provider_name": ContactChannelType.EMAIL}],
+        can_retry=True,
+    )
+
+    assert outcome == ([{"id": 1, "status": "FAILURE"}], [], [], 0.0)
+    assert [(result.id, result.status) for result in results] == [
+        (1, NotificationStatus.FAILURE)
+    ]
+    assert results[0].details and "Message rejected" in results[0].details
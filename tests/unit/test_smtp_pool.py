@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from src.tasks.smtp_pool import SMTPConnectionPool
+
+
+class StubController(Controller):
+    def _trigger_server(self):
+        self.port = self.server.sockets[0].getsockname()[1]
+        super()._trigger_server()
+
+
+class CountingHandler:
+    def __init__(self):
+        self.connections = 0
+        self.messages = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 OK"
+
+
+def start_stub(handler: CountingHandler, port: int = 0) -> StubController:
+    controller = StubController(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    return controller
+
+
+async def send(pool: SMTPConnectionPool):
+    await pool.sendmail(
+        sender="noreply@notihub.test",
+        recipients=["user@notihub.test"],
+        message="Subject: test\n\nHello",
+    )
+
+
+@pytest.mark.parametrize("max_size, concurrency", [(1, 1), (2, 8), (4, 32)])
+async def test_smtp_pool_reuses_connections(max_size: int, concurrency: int):
+    handler = CountingHandler()
+    controller = start_stub(handler)
+    pool = SMTPConnectionPool(
+        hostname="127.0.0.1", port=controller.port, use_tls=False, max_size=max_size
+    )
+    try:
+        for _ in range(3):
+            await asyncio.gather(*[send(pool) for _ in range(concurrency)])
+    finally:
+        await pool.close()
+        controller.stop()
+
+    assert handler.messages == 3 * concurrency
+    assert handler.connections <= max_size
+
+
+async def test_smtp_pool_reconnects_after_server_restart():
+    handler = CountingHandler()
+    controller = start_stub(handler)
+    pool = SMTPConnectionPool(
+        hostname="127.0.0.1",
+        port=controller.port,
+        use_tls=False,
+        max_size=1,
+        idle_check_after=0,
+    )
+    try:
+        await send(pool)
+        controller.stop()
+        controller = start_stub(handler, port=controller.port)
+        await send(pool)
+    finally:
+        await pool.close()
+        controller.stop()
+
+    assert handler.messages == 2
+    assert handler.connections == 2
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta, timezone
+
+import jinja2
+import pytest
+
+from src.utils.template_cache import TemplateCache
+
+
+@pytest.fixture()
+def cache() -> TemplateCache:
+    env = jinja2.Environment(undefined=jinja2.StrictUndefined)
+    return TemplateCache(env=env, maxsize=2)
+
+
+def test_compiled_template_is_reused_until_updated(cache: TemplateCache):
+    updated_at = datetime.now(timezone.utc)
+    first = cache.get(1, updated_at, "Hello {{ name }}")
+    assert first.variables == {"name"}
+    assert first.template.render(name="world") == "Hello world"
+    assert cache.get(1, updated_at, "Hello {{ name }}") is first
+
+    edited = cache.get(1, updated_at + timedelta(seconds=1), "Bye {{ user }}")
+    assert edited is not first
+    assert edited.variables == {"user"}
+
+
+def test_invalidate_and_eviction(cache: TemplateCache):
+    updated_at = datetime.now(timezone.utc)
+    first = cache.get(1, updated_at, "{{ a }}")
+    cache.invalidate(1)
+    assert cache.get(1, updated_at, "{{ a }}") is not first
+
+    second = cache.get(2, updated_at, "{{ b }}")
+    cache.get(3, updated_at, "{{ c }}")
+    assert cache.get(2, updated_at, "{{ b }}") is second
+    assert cache.get(1, updated_at, "{{ a }}").variables == {"a"}
+
+
+def test_syntax_errors_are_not_cached(cache: TemplateCache):
+    with pytest.raises(jinja2.TemplateSyntaxError):
+        cache.get(1, datetime.now(timezone.utc), "{{ broken ")
+    assert cache.get(1, datetime.now(timezone.utc), "{{ fixed }}").variables == {
+        "fixed"
+    }